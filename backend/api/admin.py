@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import User, Income, Expense, Category
+from .models import User, Income, Expense, Category, DailySummary, ReportJob
 
 
 @admin.register(Income, Expense)
@@ -27,3 +27,5 @@ class TransferingAdmin(admin.ModelAdmin):
 
 admin.site.register(User)
 admin.site.register(Category)
+admin.site.register(ReportJob)
+admin.site.register(DailySummary)
@@ -0,0 +1,41 @@
+"""
+Management command generating synthetic users and transfers.
+"""
+
+from django.core.management.base import BaseCommand
+
+from ...utils import generate_synthetic_data
+
+
+class Command(BaseCommand):
+    help = "Creates users with categories and incomes and expenses for benchmarks."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=10, help="Number of users.")
+        parser.add_argument(
+            "--transfers", type=int, default=10000, help="Incomes and expenses per user."
+        )
+        parser.add_argument("--categories", type=int, default=10, help="Categories per user.")
+        parser.add_argument(
+            "--days", type=int, default=365, help="Transfers are spread over this many days."
+        )
+        parser.add_argument(
+            "--prefix",
+            default="synthetic",
+            help="Prefix of the usernames and chat ids of the users.",
+        )
+        parser.add_argument("--seed", type=int, help="Seed of the random amounts and dates.")
+
+    def handle(self, *args, **options):
+        result = generate_synthetic_data(
+            options["users"],
+            options["transfers"],
+            options["categories"],
+            days=options["days"],
+            prefix=options["prefix"],
+            seed=options["seed"],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {len(result['users'])} user(s), {result['categories']} categories, "
+            f"{result['incomes']} incomes and {result['expenses']} expenses."
+        ))
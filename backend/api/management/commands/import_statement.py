@@ -0,0 +1,47 @@
+"""
+Management command for importing bank statements.
+"""
+
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...models import User
+from ...utils import STATEMENT_FORMATS, import_statement
+
+
+class Command(BaseCommand):
+    help = "Imports a CSV or OFX bank statement into incomes and expenses of a user."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Path of the statement file.")
+        parser.add_argument("--user", required=True, help="Username of the owner.")
+        parser.add_argument(
+            "--format",
+            choices=STATEMENT_FORMATS,
+            help="Format of the statement, guessed from the file extension by default.",
+        )
+        parser.add_argument("--encoding", default="utf-8-sig")
+
+    def handle(self, *args, **options):
+        path = Path(options["path"])
+        statement_format = options["format"] or path.suffix.lstrip(".").lower()
+        if statement_format not in STATEMENT_FORMATS:
+            raise CommandError(f"Unknown statement format: {statement_format}")
+
+        try:
+            user = User.objects.get(username=options["user"])
+        except User.DoesNotExist:
+            raise CommandError(f"User not found: {options['user']}")
+
+        with open(path, encoding=options["encoding"], newline="") as file:
+            result = import_statement(user, file, statement_format)
+
+        for error in result["errors"]:
+            self.stderr.write(error)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {result['incomes']} income(s) and {result['expenses']} "
+                f"expense(s), skipped {result['duplicates']} duplicate(s)."
+            )
+        )
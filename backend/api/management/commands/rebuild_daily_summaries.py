@@ -0,0 +1,24 @@
+"""
+Management command for rebuilding the daily summaries of incomes and expenses.
+"""
+
+from django.core.management.base import BaseCommand
+
+from ...models import DailySummary
+
+
+class Command(BaseCommand):
+    help = "Recomputes the daily summaries from the incomes and expenses."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user",
+            type=int,
+            action="append",
+            dest="users",
+            help="Id of a user to rebuild the summaries of, all users by default.",
+        )
+
+    def handle(self, *args, **options):
+        created = DailySummary.rebuild(options["users"])
+        self.stdout.write(self.style.SUCCESS(f"Created {created} daily summaries."))
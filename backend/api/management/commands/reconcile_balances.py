@@ -0,0 +1,59 @@
+"""
+Management command for detecting and repairing drifted user balances.
+"""
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Sum
+
+from ...models import User, Income, Expense
+
+
+class Command(BaseCommand):
+    help = "Compares stored user balances with DB-side sums of incomes and expenses."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--fix",
+            action="store_true",
+            help="Overwrite drifted balances with the recalculated value.",
+        )
+
+    def handle(self, *args, **options):
+        incomes = self.get_totals(Income)
+        expenses = self.get_totals(Expense)
+
+        drifted = []
+        for user in User.objects.only("id", "username", "balance").iterator():
+            expected = round(
+                float(incomes.get(user.pk, 0) - expenses.get(user.pk, 0)), 2
+            )
+            if abs(user.balance - expected) >= 0.005:
+                self.stdout.write(
+                    f"{user.username}: stored {user.balance}, expected {expected}"
+                )
+                user.balance = expected
+                drifted.append(user)
+
+        if drifted and options["fix"]:
+            with transaction.atomic():
+                User.objects.bulk_update(drifted, ["balance"], batch_size=500)
+            self.stdout.write(self.style.SUCCESS(f"Fixed {len(drifted)} balance(s)."))
+        elif drifted:
+            self.stdout.write(
+                self.style.WARNING(f"Found {len(drifted)} drifted balance(s).")
+            )
+        else:
+            self.stdout.write(self.style.SUCCESS("All balances are consistent."))
+
+    @staticmethod
+    def get_totals(transfer_type) -> dict:
+        """
+        Returns {user id: sum of amounts} computed by the database.
+        """
+        return dict(
+            transfer_type.objects.order_by()
+            .values("user")
+            .annotate(total=Sum("amount"))
+            .values_list("user", "total")
+        )
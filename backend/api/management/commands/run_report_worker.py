@@ -0,0 +1,114 @@
+"""
+Management command running the background report worker.
+"""
+
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.utils import timezone
+
+from ...models import ReportJob
+from ...utils import (
+    claim_report_job,
+    delete_expired_report_jobs,
+    fail_stale_report_jobs,
+    run_report_job,
+)
+
+# Expired and stale jobs are cleaned up at most this often, in seconds
+CLEANUP_INTERVAL = 60
+
+
+def init_worker_process():
+    # Connections inherited from the parent process must not be shared
+    django.setup()
+    connections.close_all()
+
+
+class Command(BaseCommand):
+    help = "Generates the pending report jobs in a pool of processes."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=settings.REPORT_WORKER_PROCESSES,
+            help="Number of worker processes, 0 runs the jobs in this process.",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Exit once there are no pending jobs left.",
+        )
+
+    def handle(self, *args, **options):
+        processes = options["processes"]
+        self.once = options["once"]
+        self.last_cleanup = None
+
+        if processes == 0:
+            self.run_inline()
+            return
+
+        connections.close_all()
+        with ProcessPoolExecutor(processes, initializer=init_worker_process) as pool:
+            self.run_pool(pool, processes)
+
+    def run_inline(self):
+        while True:
+            self.cleanup()
+            job = claim_report_job()
+            if job is not None:
+                self.report(job, run_report_job(job.pk))
+            elif self.once:
+                return
+            else:
+                time.sleep(settings.REPORT_WORKER_POLL_INTERVAL)
+
+    def run_pool(self, pool, processes: int):
+        running = {}
+        while True:
+            self.cleanup()
+            while len(running) < processes:
+                job = claim_report_job()
+                if job is None:
+                    break
+                running[pool.submit(run_report_job, job.pk)] = job
+
+            if not running:
+                if self.once:
+                    return
+                time.sleep(settings.REPORT_WORKER_POLL_INTERVAL)
+                continue
+
+            done, _ = wait(
+                running, timeout=settings.REPORT_WORKER_POLL_INTERVAL, return_when=FIRST_COMPLETED
+            )
+            for future in done:
+                job = running.pop(future)
+                try:
+                    status = future.result()
+                except Exception as ex:
+                    status = ReportJob.Status.FAILED
+                    ReportJob.objects.filter(pk=job.pk).update(
+                        status=status, error=str(ex), finished=timezone.now()
+                    )
+                self.report(job, status)
+
+    def cleanup(self):
+        now = time.monotonic()
+        if self.last_cleanup is None or now - self.last_cleanup >= CLEANUP_INTERVAL:
+            self.last_cleanup = now
+            failed = fail_stale_report_jobs()
+            if failed:
+                self.stdout.write(f"Failed {failed} stale report job(s).")
+            deleted = delete_expired_report_jobs()
+            if deleted:
+                self.stdout.write(f"Deleted {deleted} expired report job(s).")
+
+    def report(self, job, status: str):
+        self.stdout.write(f"Report job {job.pk} of {job.user}: {status}")
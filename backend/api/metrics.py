@@ -0,0 +1,204 @@
+"""
+In-process metrics exported in the Prometheus text format.
+
+Metrics are kept per process: with several server workers every worker
+exports its own values, which Prometheus tells apart by the scraped instance.
+"""
+
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+REPORT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (100, 1000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+
+def format_value(value) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def format_labels(names, values, extra: str = "") -> str:
+    pairs = [
+        '{}="{}"'.format(name, str(value).replace("\\", "\\\\").replace('"', '\\"'))
+        for name, value in zip(names, values)
+    ]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Metric:
+    """
+    Base of the metrics, one value per combination of label values.
+    """
+
+    type = None
+
+    def __init__(self, name: str, documentation: str, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def get_key(self, labels: dict) -> tuple:
+        return tuple(labels[name] for name in self.labels)
+
+    def render(self) -> list:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type}",
+        ]
+        with self._lock:
+            values = sorted(self._values.items())
+        for key, value in values:
+            lines.extend(self.render_value(key, value))
+        return lines
+
+    def render_value(self, key: tuple, value) -> list:
+        return [f"{self.name}{format_labels(self.labels, key)} {format_value(value)}"]
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self.get_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def get(self, **labels):
+        with self._lock:
+            return self._values.get(self.get_key(labels), 0)
+
+
+class Histogram(Metric):
+    """
+    Counts observations into cumulative buckets, with their count and sum.
+    """
+
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(buckets) + (math.inf,)
+
+    def observe(self, value, **labels):
+        key = self.get_key(labels)
+        with self._lock:
+            counts, total = self._values.get(key) or ([0] * len(self.buckets), 0)
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+                    break
+            self._values[key] = (counts, total + value)
+
+    @contextmanager
+    def time(self, **labels):
+        """
+        Observes the duration of the block in seconds.
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def get(self, **labels) -> tuple:
+        """
+        Returns (count, sum) of the observations with the labels.
+        """
+        with self._lock:
+            counts, total = self._values.get(self.get_key(labels)) or ([], 0)
+            return sum(counts), total
+
+    def render_value(self, key: tuple, value) -> list:
+        counts, total = value
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, counts):
+            cumulative += count
+            bucket_label = 'le="{}"'.format(format_value(bound))
+            lines.append(
+                f"{self.name}_bucket{format_labels(self.labels, key, bucket_label)} {cumulative}"
+            )
+        lines.append(f"{self.name}_sum{format_labels(self.labels, key)} {format_value(total)}")
+        lines.append(f"{self.name}_count{format_labels(self.labels, key)} {cumulative}")
+        return lines
+
+
+class CallbackCounter(Metric):
+    """
+    Counter whose values are read from `callback()`, {label values: value},
+    when the metrics are rendered.
+    """
+
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labels, callback):
+        super().__init__(name, documentation, labels)
+        self.callback = callback
+
+    def render(self) -> list:
+        with self._lock:
+            self._values = dict(self.callback())
+        return super().render()
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+request_duration = registry.register(Histogram(
+    "http_request_duration_seconds",
+    "Time spent handling requests.",
+    ("view", "method", "status"),
+))
+response_size = registry.register(Histogram(
+    "http_response_size_bytes",
+    "Size of the response bodies in bytes.",
+    ("view",),
+    SIZE_BUCKETS,
+))
+db_queries = registry.register(Histogram(
+    "db_queries_per_request",
+    "Number of database queries per request.",
+    ("view",),
+    QUERY_BUCKETS,
+))
+db_query_duration = registry.register(Histogram(
+    "db_query_duration_seconds",
+    "Time spent in database queries per request.",
+    ("view",),
+))
+report_duration = registry.register(Histogram(
+    "report_generation_duration_seconds",
+    "Time spent generating reports missing from the report cache.",
+    ("format",),
+    REPORT_BUCKETS,
+))
+report_cache_requests = registry.register(Counter(
+    "report_cache_requests_total",
+    "Reports requested from the report cache.",
+    ("format", "result"),
+))
@@ -1,7 +1,79 @@
-from .models import User
+import logging
+import random
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections, router
 from django.http import JsonResponse
 
+from . import metrics
+from .models import User
+
+query_logger = logging.getLogger("api.queries")
+
+# Fields of the user kept in the chat_id cache. The rest of the fields are
+# deferred and loaded from the database only if a view touches them.
+CACHED_USER_FIELDS = [
+    field.attname
+    for field in User._meta.concrete_fields
+    if field.attname in ("id", "username", "chat_id", "is_active")
+]
+
+
+class CacheStats:
+    """
+    Thread-safe hit/miss counters of a cache.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def hit(self):
+        with self._lock:
+            self.hits += 1
+
+    def miss(self):
+        with self._lock:
+            self.misses += 1
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses}
+
+
+def get_chat_id_cache():
+    return caches[settings.CHAT_ID_CACHE_ALIAS]
+
+
+def get_chat_id_cache_key(chat_id) -> str:
+    return f"chat_id_user:{chat_id}"
+
+
+def invalidate_chat_id(*chat_ids):
+    """
+    Drops cached users of the given chat ids.
+    """
+    get_chat_id_cache().delete_many(
+        [get_chat_id_cache_key(chat_id) for chat_id in chat_ids if chat_id]
+    )
+
+
 class ChatIDMiddleware:
+    """
+    Authenticates bot requests by the `chat_id` parameter.
+
+    Resolved users are cached by chat id for CHAT_ID_CACHE_TTL seconds, so
+    repeated bot traffic doesn't look the user up on every request.
+    """
+
+    stats = CacheStats()
+
     def __init__(self, get_response):
         self.get_response = get_response
 
@@ -9,13 +81,188 @@ class ChatIDMiddleware:
         chat_id = request.GET.get("chat_id") or request.POST.get("chat_id")
         
         if chat_id:
-            try:
-                request.user = User.objects.get(chat_id=chat_id)
-            except User.DoesNotExist:
-                # return self.process_exception(request, User.DoesNotExist)
+            user = self.get_user(chat_id)
+            if user is None:
                 return JsonResponse({"message": "User not found"}, status=404)
-                
-                
+
+            request.user = user
+
         return self.get_response(request)
-        
-    
\ No newline at end of file
+
+    def get_user(self, chat_id):
+        cache = get_chat_id_cache()
+        cache_key = get_chat_id_cache_key(chat_id)
+
+        cached_values = cache.get(cache_key)
+        if cached_values is not None:
+            self.stats.hit()
+            return User.from_db(
+                router.db_for_read(User), CACHED_USER_FIELDS, cached_values
+            )
+
+        self.stats.miss()
+        try:
+            user = User.objects.get(chat_id=chat_id)
+        except User.DoesNotExist:
+            return None
+
+        cache.set(
+            cache_key,
+            [getattr(user, field) for field in CACHED_USER_FIELDS],
+            settings.CHAT_ID_CACHE_TTL,
+        )
+        return user
+
+
+class QueryRecorder:
+    """
+    Database execute wrapper counting the queries and their duration.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+
+
+class QueryLoggingMiddleware:
+    """
+    Logs the number and duration of the queries of a sample of requests,
+    per view, to the `api.queries` logger.
+
+    QUERY_LOG_SAMPLE_RATE is the share of the requests logged, from 0 to 1.
+    With 0 the middleware removes itself from the chain, so it costs nothing.
+    """
+
+    def __init__(self, get_response):
+        self.sample_rate = settings.QUERY_LOG_SAMPLE_RATE
+        if self.sample_rate <= 0:
+            raise MiddlewareNotUsed
+
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if random.random() >= self.sample_rate:
+            return self.get_response(request)
+
+        recorder = QueryRecorder()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(recorder))
+            response = self.get_response(request)
+        duration = time.perf_counter() - started
+
+        match = request.resolver_match
+        view = match.view_name if match else "-"
+        query_logger.info(
+            f"{request.method} {view} {response.status_code}: "
+            f"{recorder.count} queries in {recorder.duration * 1000:.1f} ms, "
+            f"{duration * 1000:.1f} ms in total",
+            extra={
+                "view": view,
+                "method": request.method,
+                "status_code": response.status_code,
+                "queries": recorder.count,
+                "query_duration": recorder.duration,
+                "duration": duration,
+            },
+        )
+        return response
+
+
+metrics.registry.register(metrics.CallbackCounter(
+    "chat_id_cache_lookups_total",
+    "Users looked up by chat id, by result in the chat id cache.",
+    ("result",),
+    lambda: {
+        (result,): count for result, count in ChatIDMiddleware.stats.as_dict().items()
+    },
+))
+
+
+class MetricsMiddleware:
+    """
+    Records the latency, response size and database queries of every
+    request, labeled by the URL name of the view, for the metrics endpoint.
+    Streamed responses are recorded once their body was sent.
+
+    Switched off with METRICS_ENABLED = False.
+    """
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+
+        self.get_response = get_response
+
+    def __call__(self, request):
+        recorder = QueryRecorder()
+        started = time.perf_counter()
+        with self.record_queries(recorder):
+            response = self.get_response(request)
+
+        match = request.resolver_match
+        # Unmatched paths share one label, so scanners can't grow the metrics
+        view = (match.url_name or match.view_name) if match else "unmatched"
+
+        if response.streaming and not response.is_async:
+            # The body of a streamed response, and its queries, are produced
+            # after the view returns, so it is recorded once it was sent
+            response.streaming_content = self.record_stream(
+                response.streaming_content, response, recorder, started, request.method, view
+            )
+        else:
+            self.observe(
+                view,
+                request.method,
+                response.status_code,
+                time.perf_counter() - started,
+                recorder,
+                self.get_response_size(response),
+            )
+
+        return response
+
+    @staticmethod
+    @contextmanager
+    def record_queries(recorder):
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(recorder))
+            yield
+
+    def record_stream(self, content, response, recorder, started, method: str, view: str):
+        size = 0
+        try:
+            with self.record_queries(recorder):
+                for chunk in content:
+                    size += len(chunk)
+                    yield chunk
+        finally:
+            self.observe(
+                view, method, response.status_code, time.perf_counter() - started, recorder, size
+            )
+
+    @staticmethod
+    def observe(view: str, method: str, status: int, duration: float, recorder, size):
+        metrics.request_duration.observe(duration, view=view, method=method, status=status)
+        metrics.db_queries.observe(recorder.count, view=view)
+        metrics.db_query_duration.observe(recorder.duration, view=view)
+        if size is not None:
+            metrics.response_size.observe(size, view=view)
+
+    @staticmethod
+    def get_response_size(response):
+        if not response.streaming:
+            return len(response.content)
+        if response.has_header("Content-Length"):
+            return int(response["Content-Length"])
+        return None
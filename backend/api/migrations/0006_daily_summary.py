@@ -0,0 +1,60 @@
+# Generated by Django 5.0.7 on 2026-10-18 06:52
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+
+
+def create_daily_summaries(apps, schema_editor):
+    DailySummary = apps.get_model("api", "DailySummary")
+    for kind, model_name in (("income", "Income"), ("expense", "Expense")):
+        rows = (
+            apps.get_model("api", model_name).objects
+            .annotate(day=TruncDate("created"))
+            .values("user", "day", "category")
+            .annotate(total=Sum("amount"), count=Count("id"))
+            .order_by()
+        )
+        DailySummary.objects.bulk_create(
+            (
+                DailySummary(
+                    user_id=row["user"],
+                    kind=kind,
+                    date=row["day"],
+                    category_id=row["category"],
+                    total=row["total"],
+                    count=row["count"],
+                )
+                for row in rows.iterator()
+            ),
+            batch_size=500,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_transfer_fingerprint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailySummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('kind', models.CharField(choices=[('income', 'Income'), ('expense', 'Expense')], max_length=7)),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('count', models.IntegerField(default=0)),
+                ('category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='api.category')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='dailysummary',
+            constraint=models.UniqueConstraint(fields=('user', 'kind', 'date', 'category'), name='api_dailysummary_uniq'),
+        ),
+        migrations.RunPython(create_daily_summaries, migrations.RunPython.noop),
+    ]
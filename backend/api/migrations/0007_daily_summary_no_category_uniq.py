@@ -0,0 +1,38 @@
+from django.db import migrations, models
+from django.db.models import Count, Min, Sum
+
+
+def merge_no_category_summaries(apps, schema_editor):
+    """
+    Merges the summaries without a category left duplicated by queryset
+    deletes of categories into one per user, kind and date.
+    """
+    DailySummary = apps.get_model("api", "DailySummary")
+    duplicates = (
+        DailySummary.objects.filter(category__isnull=True)
+        .values("user", "kind", "date")
+        .annotate(first=Min("id"), rows=Count("id"), total=Sum("total"), count=Sum("count"))
+        .filter(rows__gt=1)
+        .order_by()
+    )
+    for row in list(duplicates):
+        summaries = DailySummary.objects.filter(
+            category__isnull=True, user=row["user"], kind=row["kind"], date=row["date"]
+        )
+        summaries.exclude(id=row["first"]).delete()
+        summaries.update(total=row["total"], count=row["count"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_daily_summary'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_no_category_summaries, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='dailysummary',
+            constraint=models.UniqueConstraint(condition=models.Q(('category__isnull', True)), fields=('user', 'kind', 'date'), name='api_dailysummary_no_category_uniq'),
+        ),
+    ]
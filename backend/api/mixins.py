@@ -1,3 +1,5 @@
+import codecs
+import io
 from django.shortcuts import get_object_or_404
 from rest_framework import status, generics
 from rest_framework.response import Response
@@ -16,9 +18,7 @@ class UserFilteredMixin(generics.GenericAPIView):
         """
         Returns the queryset filtered by the current user.
         """
-        response = super().get_queryset().filter(user=self.request.user)
-        print(response)
-        return response
+        return super().get_queryset().filter(user=self.request.user)
 
     def perform_create(self, serializer):
         """
@@ -43,6 +43,77 @@ class ContentTypeValidationMixin:
         return None
 
 
+class TextUploadMixin:
+    """
+    Mixin to decode uploaded text files in the encoding given by the
+    `encoding` query parameter, `default_encoding` if it isn't given.
+    """
+
+    default_encoding = "utf-8"
+
+    def get_encoding(self):
+        """
+        Returns the encoding of the upload, None if it is unknown.
+        """
+        encoding = self.request.query_params.get("encoding") or self.default_encoding
+        try:
+            return codecs.lookup(encoding).name
+        except LookupError:
+            return None
+
+    def decode_lines(self, file, encoding: str):
+        """
+        Decodes the file lazily as text, with line endings left for the CSV
+        reader. Decoded before it is split into lines, so multi-byte
+        encodings like UTF-16 keep their line breaks.
+        """
+        if file is None:
+            return io.StringIO()
+        return io.TextIOWrapper(
+            io.BufferedReader(ReadableStream(file)), encoding=encoding, newline=""
+        )
+
+    def encoding_error_response(self, encoding=None):
+        """
+        Returns the response to an upload which isn't text in the encoding.
+        """
+        if encoding is None:
+            message = f"Unknown encoding: {self.request.query_params.get('encoding')}."
+        else:
+            message = (
+                f"The file isn't valid {encoding}, "
+                "pass its encoding in the encoding parameter."
+            )
+        return Response(data={"message": message}, status=status.HTTP_400_BAD_REQUEST)
+
+    def csv_error_response(self, error):
+        """
+        Returns the response to an upload which isn't a valid CSV file.
+        """
+        return Response(
+            data={"message": f"Invalid CSV file: {error}."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+
+class ReadableStream(io.RawIOBase):
+    """
+    Binary file over an object with only `read(size)`, such as a request, so
+    it can be buffered and decoded by the `io` classes.
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        data = self.stream.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+
 class ListMixin:
     """
     Mixin to handle GET requests for listing objects.
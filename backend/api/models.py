@@ -1,4 +1,11 @@
-from django.db import models
+import uuid
+from collections import defaultdict
+from itertools import islice
+from django.conf import settings
+from django.db import IntegrityError, models, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import Round, TruncDate
+from django.utils import timezone
 from django.contrib.auth.models import AbstractUser, BaseUserManager
 from django.core.validators import MinValueValidator
 from decimal import Decimal
@@ -26,6 +33,9 @@ class User(AbstractUser):
     username = models.CharField(max_length=50, unique=True)
     chat_id = models.CharField(max_length=300, unique=True, null=True, blank=True)
     balance = models.FloatField(default=0)
+    # Bumped on every write to the incomes, expenses or categories of the
+    # user, so anything derived from them can be cached per version
+    data_version = models.PositiveBigIntegerField(default=0)
 
     is_active = models.BooleanField(default=True)
     is_staff = models.BooleanField(default=False)
@@ -35,14 +45,24 @@ class User(AbstractUser):
     USERNAME_FIELD = "username"
 
     def update_balance(self) -> float:
-        expenses = sum(expense.amount for expense in self.expense_set.all())
-        incomes = sum(income.amount for income in self.income_set.all())
+        """
+        Recalculates the stored balance from scratch with DB-side sums.
 
-        self.balance = round(incomes - expenses, 2)
-        self.save()
+        Incomes and expenses keep the balance up to date on their own, so this
+        is only needed to repair a drifted balance.
+        """
+        expenses = self.expense_set.aggregate(total=Sum("amount"))["total"] or 0
+        incomes = self.income_set.aggregate(total=Sum("amount"))["total"] or 0
+
+        self.balance = round(float(incomes - expenses), 2)
+        self.save(update_fields=["balance"])
 
         return self.balance
 
+    @classmethod
+    def bump_data_version(cls, user_id):
+        cls.objects.filter(pk=user_id).update(data_version=F("data_version") + 1)
+
     def __str__(self) -> str:
         return self.username
 
@@ -51,27 +71,228 @@ class Category(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     name = models.CharField(max_length=20)
 
+    def save(self, *args, **kwargs):
+        with transaction.atomic(using=kwargs.get("using")):
+            super().save(*args, **kwargs)
+            User.bump_data_version(self.user_id)
+
     def __str__(self):
         return f"{self.name.capitalize()}"
 
 
-class Income(models.Model):
+class DailySummary(models.Model):
+    """
+    Total and count of the incomes or expenses of a user per day and category.
+
+    Transfers keep their summaries up to date on save and delete, so totals of
+    periods are summed over days instead of over every transfer. Queryset
+    updates bypass that; `rebuild` recomputes the summaries from scratch.
+    Summaries of a deleted category are merged into the ones without a
+    category by a `pre_delete` receiver, so queryset deletes are covered.
+    """
+
+    class Kind(models.TextChoices):
+        INCOME = "income", "Income"
+        EXPENSE = "expense", "Expense"
+
+    # Changes of up to this many summaries are applied one row at a time
+    ROW_UPDATE_LIMIT = 4
+
     user = models.ForeignKey(User, on_delete=models.CASCADE)
-    amount = models.DecimalField(
-        max_digits=10, decimal_places=2, validators=[MinValueValidator(Decimal(0.01))]
-    )
-    description = models.TextField()
+    date = models.DateField()
+    kind = models.CharField(max_length=7, choices=Kind.choices)
     category = models.ForeignKey(
         Category, on_delete=models.SET_NULL, null=True, blank=True
     )
-    created = models.DateTimeField(auto_now_add=True)
-    updated = models.DateTimeField(auto_now=True)
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "kind", "date", "category"],
+                name="api_dailysummary_uniq",
+            ),
+            # NULLs are distinct in the constraint above, so the summaries
+            # without a category need their own
+            models.UniqueConstraint(
+                fields=["user", "kind", "date"],
+                condition=Q(category__isnull=True),
+                name="api_dailysummary_no_category_uniq",
+            ),
+        ]
+
+    @staticmethod
+    def add_change(changes: dict, key: tuple, total: Decimal, count: int):
+        """
+        Adds a change to `changes`, {(user id, kind, date, category id): [total, count]}.
+        """
+        change = changes.setdefault(key, [Decimal(0), 0])
+        change[0] += total
+        change[1] += count
+
+    @classmethod
+    def apply_changes(cls, changes: dict):
+        """
+        Applies the changes collected with `add_change` with `F()` updates,
+        creating the summaries which don't exist yet and deleting the ones
+        left without transfers.
+        """
+        changes = {key: change for key, change in changes.items() if any(change)}
+        if not changes:
+            return
+
+        if len(changes) <= cls.ROW_UPDATE_LIMIT:
+            for key, (total, count) in changes.items():
+                cls._apply_change(key, total, count)
+        else:
+            cls._apply_changes_in_bulk(changes)
+
+        emptied = [key for key, (_, count) in changes.items() if count < 0]
+        if emptied:
+            cls.objects.filter(
+                user_id__in={key[0] for key in emptied},
+                date__in={key[2] for key in emptied},
+                count__lte=0,
+            ).delete()
+
+    @classmethod
+    def _apply_change(cls, key: tuple, total: Decimal, count: int):
+        user_id, kind, date, category_id = key
+        lookup = {"user_id": user_id, "kind": kind, "date": date, "category_id": category_id}
+        changes = {"total": F("total") + total, "count": F("count") + count}
+
+        if cls.objects.filter(**lookup).update(**changes):
+            return
+        try:
+            with transaction.atomic():
+                cls.objects.create(**lookup, total=total, count=count)
+        except IntegrityError:
+            # Created by a concurrent transaction in the meantime
+            cls.objects.filter(**lookup).update(**changes)
+
+    @classmethod
+    def _apply_changes_in_bulk(cls, changes: dict):
+        """
+        Reads the existing summaries of the changed days in one query, then
+        updates and creates the summaries with one query per batch.
+        """
+        dates = [key[2] for key in changes]
+        existing = {
+            (summary.user_id, summary.kind, summary.date, summary.category_id): summary
+            for summary in cls.objects.filter(
+                user_id__in={key[0] for key in changes},
+                date__range=(min(dates), max(dates)),
+            ).only("id", "user_id", "kind", "date", "category_id")
+        }
+
+        updated, created = [], []
+        for key, (total, count) in changes.items():
+            summary = existing.get(key)
+            if summary is None:
+                user_id, kind, date, category_id = key
+                created.append(cls(
+                    user_id=user_id,
+                    kind=kind,
+                    date=date,
+                    category_id=category_id,
+                    total=total,
+                    count=count,
+                ))
+            else:
+                summary.total = F("total") + total
+                summary.count = F("count") + count
+                updated.append(summary)
+
+        cls.objects.bulk_update(updated, ["total", "count"], batch_size=500)
+        try:
+            with transaction.atomic():
+                cls.objects.bulk_create(created, batch_size=500)
+        except IntegrityError:
+            for summary in created:
+                cls._apply_change(
+                    (summary.user_id, summary.kind, summary.date, summary.category_id),
+                    summary.total,
+                    summary.count,
+                )
+
+    @classmethod
+    def move_to_no_category(cls, category_id):
+        """
+        Merges the summaries of the category into the summaries without one.
+        """
+        summaries = cls.objects.filter(category_id=category_id)
+        changes = {}
+        for user_id, kind, date, total, count in summaries.values_list(
+            "user_id", "kind", "date", "total", "count"
+        ):
+            cls.add_change(changes, (user_id, kind, date, None), total, count)
+
+        summaries.delete()
+        cls.apply_changes(changes)
+
+    @classmethod
+    def rebuild(cls, user_ids=None, batch_size: int = 500) -> int:
+        """
+        Recomputes the summaries of the users, all users if `user_ids` is None,
+        from their transfers grouped by the database.
+
+        Returns:
+            int: Number of created summaries.
+        """
+        created = 0
+        with transaction.atomic():
+            summaries = cls.objects.all()
+            if user_ids is not None:
+                summaries = summaries.filter(user_id__in=user_ids)
+            summaries.delete()
+
+            for transfer_type in (Income, Expense):
+                transfers = transfer_type.objects.all()
+                if user_ids is not None:
+                    transfers = transfers.filter(user_id__in=user_ids)
+
+                rows = (
+                    transfers.annotate(day=TruncDate("created"))
+                    .values("user", "day", "category")
+                    .annotate(total=Sum("amount"), count=Count("id"))
+                    .order_by()
+                ).iterator(chunk_size=batch_size)
+                new_summaries = (
+                    cls(
+                        user_id=row["user"],
+                        kind=transfer_type.summary_kind,
+                        date=row["day"],
+                        category_id=row["category"],
+                        total=row["total"],
+                        count=row["count"],
+                    )
+                    for row in rows
+                )
+                while batch := list(islice(new_summaries, batch_size)):
+                    cls.objects.bulk_create(batch)
+                    created += len(batch)
+
+        return created
 
     def __str__(self):
-        return f"{self.amount} by {self.user}"
+        return f"{self.kind} of {self.user} on {self.date}: {self.total}"
+
+
+class Transfer(models.Model):
+    """
+    Common fields of incomes and expenses.
 
+    Keeps the stored user balance in sync: every save or delete applies only
+    the difference it makes to the balance with an `F()` update in the same
+    transaction, instead of re-summing the whole history. The same update
+    bumps the data version of the user. Daily summaries are kept in sync the
+    same way.
+    """
+
+    balance_sign = 1
+    summary_kind = None
 
-class Expense(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     amount = models.DecimalField(
         max_digits=10, decimal_places=2, validators=[MinValueValidator(Decimal(0.01))]
@@ -80,8 +301,212 @@ class Expense(models.Model):
     category = models.ForeignKey(
         Category, on_delete=models.SET_NULL, null=True, blank=True
     )
-    created = models.DateTimeField(auto_now_add=True)
+    created = models.DateTimeField(default=timezone.now)
     updated = models.DateTimeField(auto_now=True)
+    # Hash of the date, amount and description of an imported statement
+    # row, so importing the same statement again skips its rows
+    fingerprint = models.CharField(max_length=32, null=True, blank=True, editable=False)
+
+    class Meta:
+        abstract = True
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "fingerprint"],
+                name="%(app_label)s_%(class)s_user_fingerprint_uniq",
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["user", "created", "amount"],
+                name="%(app_label)s_%(class)s_user_created_idx",
+            ),
+            models.Index(
+                fields=["user", "category"],
+                name="%(app_label)s_%(class)s_user_category_idx",
+            ),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._remember_stored_state()
+        return instance
+
+    @classmethod
+    def bulk_create_with_balance(cls, transfers, batch_size: int = 500) -> int:
+        """
+        Inserts the transfers with `bulk_create`, `batch_size` at a time, and
+        applies one balance delta per user at the end, all in one transaction.
+
+        `transfers` may be any iterable, e.g. a generator reading a file, so
+        only one batch is held in memory.
+
+        Returns:
+            int: Number of created transfers.
+        """
+        transfers = iter(transfers)
+        totals = defaultdict(Decimal)
+        summary_changes = {}
+        created = 0
+
+        with transaction.atomic():
+            while batch := list(islice(transfers, batch_size)):
+                cls.objects.bulk_create(batch)
+                for transfer in batch:
+                    amount = transfer._get_amount()
+                    totals[transfer.user_id] += amount
+                    DailySummary.add_change(
+                        summary_changes, transfer._get_summary_key(), amount, 1
+                    )
+                    transfer._remember_stored_state()
+                created += len(batch)
+
+            for user_id, total in totals.items():
+                cls._change_balance(user_id, total)
+            DailySummary.apply_changes(summary_changes)
+
+        return created
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic(using=kwargs.get("using")):
+            stored_state = None if self._state.adding else self._get_stored_state()
+            super().save(*args, **kwargs)
+
+            amount = self._get_amount()
+            summary_changes = {}
+            DailySummary.add_change(summary_changes, self._get_summary_key(), amount, 1)
+
+            if stored_state is None:
+                self._change_balance(self.user_id, amount)
+            else:
+                DailySummary.add_change(
+                    summary_changes, self._get_summary_key(stored_state), -stored_state[1], -1
+                )
+                if stored_state[0] == self.user_id:
+                    self._change_balance(self.user_id, amount - stored_state[1])
+                else:
+                    self._change_balance(stored_state[0], -stored_state[1])
+                    self._change_balance(self.user_id, amount)
+
+            DailySummary.apply_changes(summary_changes)
+
+        self._remember_stored_state()
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic(using=kwargs.get("using")):
+            stored_state = self._get_stored_state()
+            result = super().delete(*args, **kwargs)
+            self._change_balance(stored_state[0], -stored_state[1])
+
+            summary_changes = {}
+            DailySummary.add_change(
+                summary_changes, self._get_summary_key(stored_state), -stored_state[1], -1
+            )
+            DailySummary.apply_changes(summary_changes)
+
+        return result
+
+    def _get_amount(self) -> Decimal:
+        return self._meta.get_field("amount").to_python(self.amount)
+
+    @staticmethod
+    def _get_day(created):
+        if timezone.is_aware(created):
+            return timezone.localdate(created)
+        return created.date()
+
+    def _get_summary_key(self, state=None) -> tuple:
+        """
+        Returns the key of the daily summary of the transfer, or of its stored
+        state if given.
+        """
+        if state is None:
+            created = self._meta.get_field("created").to_python(self.created)
+            state = (self.user_id, None, self._get_day(created), self.category_id)
+        return (state[0], self.summary_kind, state[2], state[3])
+
+    def _remember_stored_state(self):
+        if all(
+            name in self.__dict__ for name in ("user_id", "amount", "created", "category_id")
+        ):
+            _, _, day, category_id = self._get_summary_key()
+            self._stored_state = (self.user_id, self._get_amount(), day, category_id)
+
+    def _get_stored_state(self):
+        """
+        Returns (user id, amount, day, category id) of the row as it is
+        currently stored.
+        """
+        stored_state = getattr(self, "_stored_state", None)
+        if stored_state is None:
+            user_id, amount, created, category_id = (
+                type(self)._base_manager.filter(pk=self.pk)
+                .values_list("user_id", "amount", "created", "category_id")
+                .get()
+            )
+            stored_state = (user_id, amount, self._get_day(created), category_id)
+        return stored_state
+
+    @classmethod
+    def _change_balance(cls, user_id, amount: Decimal):
+        """
+        Applies the amount to the balance of the user and bumps its data version.
+        """
+        changes = {"data_version": F("data_version") + 1}
+        delta = float(amount) * cls.balance_sign
+        if delta:
+            changes["balance"] = Round(F("balance") + delta, 2)
+        User.objects.filter(pk=user_id).update(**changes)
 
     def __str__(self):
         return f"{self.amount} by {self.user}"
+
+
+class Income(Transfer):
+    balance_sign = 1
+    summary_kind = DailySummary.Kind.INCOME
+
+
+class Expense(Transfer):
+    balance_sign = -1
+    summary_kind = DailySummary.Kind.EXPENSE
+
+
+class ReportJob(models.Model):
+    """
+    Report requested by a user, generated in the background by a report worker.
+    """
+
+    class Format(models.TextChoices):
+        CSV = "csv", "CSV"
+        XLSX = "xlsx", "Excel"
+
+    class Status(models.TextChoices):
+        PENDING = "pending", "Pending"
+        RUNNING = "running", "Running"
+        DONE = "done", "Done"
+        FAILED = "failed", "Failed"
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    format = models.CharField(max_length=4, choices=Format.choices)
+    status = models.CharField(
+        max_length=7, choices=Status.choices, default=Status.PENDING
+    )
+    file_name = models.CharField(max_length=100, blank=True)
+    error = models.TextField(blank=True)
+    created = models.DateTimeField(auto_now_add=True)
+    started = models.DateTimeField(null=True, blank=True)
+    finished = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "created"], name="api_reportjob_status_idx"),
+        ]
+
+    @property
+    def file_path(self):
+        return settings.REPORT_JOBS_DIRECTORY / self.file_name
+
+    def __str__(self):
+        return f"{self.format} report of {self.user} ({self.status})"
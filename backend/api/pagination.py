@@ -0,0 +1,26 @@
+"""
+Pagination classes for the finance tracker application.
+"""
+
+from rest_framework.pagination import CursorPagination
+
+
+class TransferCursorPagination(CursorPagination):
+    """
+    Keyset pagination over (created, id).
+
+    Pages are fetched by seeking to the cursor position instead of counting
+    an offset, so deep pages are as cheap as the first one.
+    """
+
+    ordering = ("created", "id")
+    page_size_query_param = "page_size"
+    max_page_size = 500
+
+
+class CategoryCursorPagination(TransferCursorPagination):
+    """
+    Keyset pagination over category ids.
+    """
+
+    ordering = ("id",)
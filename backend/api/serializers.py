@@ -2,8 +2,9 @@
 Serializers for the finance tracker application.
 """
 
+from django.conf import settings
 from rest_framework import serializers
-from .models import User, Expense, Income, Category
+from .models import User, Expense, Income, Category, ReportJob
 
 
 
@@ -30,15 +31,70 @@ class UserSerializer(serializers.ModelSerializer):
 
 
 
+class PreloadedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    Primary key field which looks objects up in `preloaded` while a list
+    serializer has loaded them in bulk, instead of with a query per row.
+    """
+
+    preloaded = None
+
+    def to_internal_value(self, data):
+        if self.preloaded is None:
+            return super().to_internal_value(data)
+
+        try:
+            return self.preloaded[int(data)]
+        except KeyError:
+            self.fail("does_not_exist", pk_value=data)
+        except (TypeError, ValueError):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+
+
+class TransferListSerializer(serializers.ListSerializer):
+    """
+    Creates many incomes or expenses with one `bulk_create`.
+
+    The categories of all rows are loaded with one query before the rows
+    are validated.
+    """
+
+    def to_internal_value(self, data):
+        category_field = self.child.fields["category"]
+        category_ids = set()
+        for row in data if isinstance(data, list) else []:
+            try:
+                category_ids.add(int(row.get("category")))
+            except (AttributeError, TypeError, ValueError):
+                pass
+
+        category_field.preloaded = category_field.get_queryset().in_bulk(category_ids)
+        try:
+            return super().to_internal_value(data)
+        finally:
+            category_field.preloaded = None
+
+    def create(self, validated_data):
+        model = self.child.Meta.model
+        transfers = [model(**attrs) for attrs in validated_data]
+        model.bulk_create_with_balance(transfers, settings.BULK_CREATE_BATCH_SIZE)
+        return transfers
+
+
 class ExpenseSerializer(serializers.ModelSerializer):
     """
     Serializer for the Expense model.
     """
 
+    category = PreloadedPrimaryKeyRelatedField(
+        queryset=Category.objects.all(), allow_null=True, required=False
+    )
+
     class Meta:
         model = Expense
         fields = ["id", "amount", "description", "category", "user"]
         read_only_fields = ["user"]
+        list_serializer_class = TransferListSerializer
 
     def create(self, validated_data):
         """
@@ -54,10 +110,15 @@ class IncomeSerializer(serializers.ModelSerializer):
     Serializer for the Income model.
     """
 
+    category = PreloadedPrimaryKeyRelatedField(
+        queryset=Category.objects.all(), allow_null=True, required=False
+    )
+
     class Meta:
         model = Income
         fields = ["id", "amount", "description", "category", "user"]
         read_only_fields = ["user"]
+        list_serializer_class = TransferListSerializer
 
     def create(self, validated_data):
         """
@@ -83,3 +144,14 @@ class CategorySerializer(serializers.ModelSerializer):
         """
         user = validated_data.pop("user")
         return Category.objects.create(user=user, **validated_data)
+
+
+class ReportJobSerializer(serializers.ModelSerializer):
+    """
+    Serializer for the ReportJob model.
+    """
+
+    class Meta:
+        model = ReportJob
+        fields = ["id", "format", "status", "error", "created", "finished"]
+        read_only_fields = ["status", "error", "created", "finished"]
@@ -0,0 +1,49 @@
+"""
+Signal receivers of the finance tracker application.
+"""
+
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete
+from django.dispatch import receiver
+
+from .middleware import invalidate_chat_id
+from .models import Category, DailySummary, User
+
+
+@receiver(pre_save, sender=User)
+def remember_stored_chat_id(sender, instance, update_fields=None, **kwargs):
+    """
+    Remembers the chat id the user had before the save, so the cache entry
+    of the old chat id can be dropped too.
+    """
+    if instance._state.adding or (update_fields and "chat_id" not in update_fields):
+        instance._stored_chat_id = None
+        return
+
+    instance._stored_chat_id = (
+        sender._base_manager.filter(pk=instance.pk)
+        .values_list("chat_id", flat=True)
+        .first()
+    )
+
+
+@receiver(post_save, sender=User)
+def invalidate_saved_user(sender, instance, created, update_fields=None, **kwargs):
+    if created or (update_fields and set(update_fields) <= {"balance", "last_login"}):
+        return
+    invalidate_chat_id(instance.chat_id, getattr(instance, "_stored_chat_id", None))
+
+
+@receiver(post_delete, sender=User)
+def invalidate_deleted_user(sender, instance, **kwargs):
+    invalidate_chat_id(instance.chat_id)
+
+
+@receiver(pre_delete, sender=Category)
+def merge_deleted_category_summaries(sender, instance, **kwargs):
+    """
+    Merges the daily summaries of the category into the summaries without
+    one before its transfers are left without a category, and bumps the data
+    version of the user. Runs for queryset deletes too, e.g. in the admin.
+    """
+    DailySummary.move_to_no_category(instance.pk)
+    User.bump_data_version(instance.user_id)
@@ -0,0 +1,81 @@
+from datetime import datetime, timezone
+from decimal import Decimal
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from api.models import User, Expense, Income, Category
+
+
+class CategoryBreakdownTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="test_user", chat_id=111, password="12345678")
+        self.client.force_authenticate(user=self.user)
+        self.food = Category.objects.create(user=self.user, name="food")
+        self.taxi = Category.objects.create(user=self.user, name="taxi")
+        self.gifts = Category.objects.create(user=self.user, name="gifts")
+
+    def create_expense(self, amount, day, category=None):
+        Expense.objects.create(
+            user=self.user,
+            amount=amount,
+            description="Expense",
+            category=category,
+            created=datetime(2024, 1, day, 12, tzinfo=timezone.utc),
+        )
+
+    def get_breakdown(self, **params):
+        return self.client.get(reverse("category_breakdown"), params)
+
+    def test_breakdown_with_previous_period(self):
+        # Previous period: 1-5 January
+        self.create_expense("50.00", 2, self.food)
+        self.create_expense("10.00", 3, self.gifts)
+        # Current period: 6-10 January
+        self.create_expense("60.00", 6, self.food)
+        self.create_expense("15.00", 10, self.food)
+        self.create_expense("20.00", 7, self.taxi)
+        self.create_expense("5.00", 8)
+        # Outside of both periods
+        self.create_expense("999.00", 11, self.food)
+        Income.objects.create(user=self.user, amount="100.00", description="Salary")
+
+        with self.assertNumQueries(2):
+            response = self.get_breakdown(start="2024-01-06", end="2024-01-10")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["previous_start"], "01.01.2024")
+        self.assertEqual(response.data["previous_end"], "05.01.2024")
+        self.assertEqual(response.data["total_amount"], Decimal("100.00"))
+        self.assertEqual(response.data["count"], 4)
+        self.assertEqual(
+            [
+                (category["name"], category["total_amount"], category["count"], category["share"], category["change"])
+                for category in response.data["categories"]
+            ],
+            [
+                ("Food", Decimal("75.00"), 2, Decimal("75.00"), Decimal("50.00")),
+                ("Taxi", Decimal("20.00"), 1, Decimal("20.00"), None),
+                ("-", Decimal("5.00"), 1, Decimal("5.00"), None),
+                ("Gifts", Decimal("0"), 0, Decimal("0"), Decimal("-100.00")),
+            ],
+        )
+
+    def test_income_breakdown_of_empty_range(self):
+        response = self.get_breakdown(type="income", start="2024-01-01", end="2024-01-31")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["total_amount"], 0)
+        self.assertEqual(response.data["categories"], [])
+
+    def test_invalid_parameters(self):
+        for params in (
+            {"type": "transfer"},
+            {"start": "06.01.2024"},
+            {"start": "2024-01-10", "end": "2024-01-06"},
+            # The previous range would start before the first representable date
+            {"start": "0001-01-01", "end": "0001-01-05"},
+        ):
+            with self.subTest(params=params):
+                response = self.get_breakdown(**params)
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,68 @@
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase
+from api.models import User, Income, Expense, Category
+
+
+class BalanceTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="test_user", chat_id=111, password="12345678")
+        self.category = Category.objects.create(name="Salary", user=self.user)
+
+    def get_balance(self):
+        self.user.refresh_from_db()
+        return self.user.balance
+
+    def test_balance_follows_transfers(self):
+        income = Income.objects.create(user=self.user, amount="1000.00", description="Salary")
+        expense = Expense.objects.create(user=self.user, amount="250.50", description="Rent")
+        self.assertEqual(self.get_balance(), 749.5)
+
+        expense.amount = "300.00"
+        expense.save()
+        self.assertEqual(self.get_balance(), 700)
+
+        income.description = "August salary"
+        income.save()
+        self.assertEqual(self.get_balance(), 700)
+
+        Income.objects.get(pk=income.pk).delete()
+        self.assertEqual(self.get_balance(), -300)
+
+    def test_balance_update_does_not_rescan_history(self):
+        for _ in range(20):
+            Income.objects.create(user=self.user, amount="10.00", description="Tip")
+
+        income = Income.objects.get(pk=Income.objects.latest("id").pk)
+        income.amount = "15.00"
+        # savepoint, UPDATE of the income, UPDATE of the balance, UPDATE of
+        # the daily summary, release
+        with self.assertNumQueries(5):
+            income.save()
+
+        self.assertEqual(self.get_balance(), 205)
+
+    def test_reconcile_balances(self):
+        Income.objects.create(user=self.user, amount="100.00", description="Salary")
+        Expense.objects.create(user=self.user, amount="40.00", description="Food")
+        User.objects.filter(pk=self.user.pk).update(balance=1)
+
+        out = StringIO()
+        call_command("reconcile_balances", stdout=out)
+        self.assertIn("test_user: stored 1.0, expected 60.0", out.getvalue())
+        self.assertEqual(self.get_balance(), 1)
+
+        call_command("reconcile_balances", "--fix", stdout=out)
+        self.assertEqual(self.get_balance(), 60)
+
+        out = StringIO()
+        call_command("reconcile_balances", stdout=out)
+        self.assertIn("All balances are consistent.", out.getvalue())
+
+    def test_update_balance(self):
+        Income.objects.create(user=self.user, amount="100.00", description="Salary")
+        User.objects.filter(pk=self.user.pk).update(balance=0)
+
+        self.assertEqual(self.user.update_balance(), 100)
+        self.assertEqual(self.get_balance(), 100)
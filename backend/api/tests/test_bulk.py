@@ -0,0 +1,139 @@
+import csv
+from decimal import Decimal
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from api.models import User, Income, Expense, Category
+
+
+class BulkCreateTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="test_user", chat_id=111, password="12345678")
+        self.category = Category.objects.create(name="Salary", user=self.user)
+        self.client.force_authenticate(user=self.user)
+
+    def get_balance(self):
+        return User.objects.get(pk=self.user.pk).balance
+
+    def test_bulk_create_incomes_from_json(self):
+        rows = [
+            {"amount": "10.50", "description": f"Income {index}", "category": self.category.id}
+            for index in range(1200)
+        ]
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(reverse("income_bulk"), rows, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["created"], 1200)
+        self.assertEqual(response.data["total_amount"], Decimal("12600.00"))
+        self.assertEqual(Income.objects.filter(user=self.user).count(), 1200)
+        self.assertEqual(self.get_balance(), 12600)
+        # Batches of rows, not a query per row, one balance change and one
+        # daily summary write
+        self.assertLess(len(queries), 25)
+        self.assertEqual(
+            len([query for query in queries if query["sql"].startswith('UPDATE "api_user"')]), 1
+        )
+
+    def test_invalid_rows_are_reported(self):
+        rows = [
+            {"amount": "10.00", "description": "Salary"},
+            {"amount": "-5.00", "description": "Refund"},
+            {"amount": "7.00", "description": "Tip"},
+            {"description": "Bonus"},
+        ]
+
+        response = self.client.post(reverse("income_bulk"), rows, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual([error["row"] for error in response.data["errors"]], [2, 4])
+        self.assertIn("amount", response.data["errors"][1]["errors"])
+        self.assertFalse(Income.objects.exists())
+        self.assertEqual(self.get_balance(), 0)
+
+    def test_bulk_create_from_csv_body(self):
+        body = "amount,description,category\n10.00,Salary,\n2.50,Tip,{}\n".format(self.category.id)
+
+        response = self.client.post(reverse("income_bulk"), body, content_type="text/csv")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            list(Income.objects.order_by("id").values_list("description", "category")),
+            [("Salary", None), ("Tip", self.category.id)],
+        )
+        self.assertEqual(self.get_balance(), 12.5)
+
+    def test_bulk_create_from_csv_upload(self):
+        Income.objects.create(user=self.user, amount="100.00", description="Salary")
+        upload = SimpleUploadedFile(
+            "statement.csv", b"amount,description\n20.00,Lunch\n30.00,Dinner\n", content_type="text/csv"
+        )
+
+        response = self.client.post(reverse("expense_bulk"), {"file": upload}, format="multipart")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Expense.objects.count(), 2)
+        self.assertEqual(self.get_balance(), 50)
+
+    def test_csv_in_another_encoding(self):
+        body = "amount,description\n10.00,Caf\u00e9\n".encode("latin-1")
+
+        response = self.client.post(reverse("income_bulk"), body, content_type="text/csv")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("encoding", response.data["message"])
+        self.assertFalse(Income.objects.exists())
+
+        response = self.client.post(
+            reverse("income_bulk") + "?encoding=latin-1", body, content_type="text/csv"
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Income.objects.get().description, "Caf\u00e9")
+
+    def test_csv_in_utf_16(self):
+        body = "amount,description\n10.00,Salary\n2.50,Tip\n".encode("utf-16")
+
+        response = self.client.post(
+            reverse("income_bulk") + "?encoding=utf-16", body, content_type="text/csv"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            list(Income.objects.order_by("id").values_list("description", flat=True)),
+            ["Salary", "Tip"],
+        )
+
+    def test_malformed_csv_is_rejected(self):
+        # Longer than the field size limit of the CSV reader
+        body = "amount,description\n10.00,{}\n".format("x" * (csv.field_size_limit() + 1))
+
+        response = self.client.post(reverse("income_bulk"), body, content_type="text/csv")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Income.objects.exists())
+
+    def test_unknown_encoding_is_rejected(self):
+        response = self.client.post(
+            reverse("income_bulk") + "?encoding=nope", "amount,description\n", content_type="text/csv"
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_expenses_need_enough_balance(self):
+        Income.objects.create(user=self.user, amount="40.00", description="Salary")
+        rows = [{"amount": "30.00", "description": "Lunch"}, {"amount": "30.00", "description": "Dinner"}]
+
+        response = self.client.post(reverse("expense_bulk"), rows, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+        self.assertFalse(Expense.objects.exists())
+        self.assertEqual(self.get_balance(), 40)
+
+    def test_object_body_is_rejected(self):
+        response = self.client.post(
+            reverse("income_bulk"), {"amount": "10.00", "description": "Salary"}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -25,7 +25,7 @@ class CategoryTests(APITestCase):
         url = reverse("category")
         response = self.client.get(url, format="json")
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)  # Only the initial category created in setUp
+        self.assertEqual(len(response.data["results"]), 1)  # Only the initial category created in setUp
 
     def test_retrieve_category(self):
         url = reverse("category", args=[self.category.id])
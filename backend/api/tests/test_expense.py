@@ -1,6 +1,9 @@
+from concurrent.futures import ThreadPoolExecutor
+from django.db import connection, OperationalError
+from django.test import TransactionTestCase
 from django.urls import reverse
 from rest_framework import status
-from rest_framework.test import APITestCase
+from rest_framework.test import APIClient, APITestCase
 from api.models import User, Expense, Category
 from decimal import Decimal
 
@@ -24,7 +27,7 @@ class ExpenseTests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
         
         # ADD SOME BALANCE
-        self.user.balance = 500
+        User.objects.filter(pk=self.user.pk).update(balance=500)
         
         # SUCCESS
         response = self.client.post(url, data, format="json")
@@ -44,7 +47,7 @@ class ExpenseTests(APITestCase):
         url = reverse("expense")
         response = self.client.get(url, format="json")
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
+        self.assertEqual(len(response.data["results"]), 1)
 
     def test_retrieve_expense(self):
         expense = Expense.objects.create(
@@ -89,3 +92,41 @@ class ExpenseTests(APITestCase):
         response = self.client.delete(url, format="json")
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
         self.assertEqual(Expense.objects.count(), 0)
+
+
+class ConcurrentExpenseTests(TransactionTestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="test_user", chat_id=111, password="12345678")
+        User.objects.filter(pk=self.user.pk).update(balance=100)
+        self.user.refresh_from_db()
+
+    def post_expense(self):
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        try:
+            return client.post(
+                reverse("expense"),
+                {"amount": "30.00", "description": "Lunch"},
+                format="json",
+            ).status_code
+        except OperationalError:
+            # SQLite has no row locks: a concurrent writer fails with
+            # "database is locked" instead of waiting for the lock.
+            return None
+        finally:
+            connection.close()
+
+    def test_parallel_expenses_do_not_overdraw_balance(self):
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            statuses = list(executor.map(lambda _: self.post_expense(), range(8)))
+
+        created = Expense.objects.count()
+        self.user.refresh_from_db()
+        self.assertLessEqual(created, 3)
+        self.assertGreaterEqual(created, statuses.count(status.HTTP_201_CREATED))
+        self.assertEqual(self.user.balance, 100 - 30 * created)
+
+        if connection.features.has_select_for_update:
+            self.assertEqual(statuses.count(status.HTTP_201_CREATED), 3)
+            self.assertEqual(statuses.count(status.HTTP_405_METHOD_NOT_ALLOWED), 5)
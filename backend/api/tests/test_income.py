@@ -35,7 +35,7 @@ class IncomeTests(APITestCase):
         url = reverse("income")
         response = self.client.get(url, format="json")
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
+        self.assertEqual(len(response.data["results"]), 1)
 
 
     def test_retrieve_income(self):
@@ -0,0 +1,60 @@
+from django.db import connection
+from django.db.models import Sum
+from django.db.models.functions import TruncDate
+from django.test import TestCase
+from api.models import User, Expense, Income, Category
+
+
+class TransferIndexTests(TestCase):
+    """
+    The hot per-user queries must be answered from the composite indexes
+    instead of scanning the transfer tables.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="test_user", chat_id=111, password="12345678")
+        other_user = User.objects.create_user(username="other_user", chat_id=222, password="12345678")
+        category = Category.objects.create(user=self.user, name="Food")
+
+        for user in (self.user, other_user):
+            for transfer_type in (Income, Expense):
+                transfer_type.objects.bulk_create(
+                    transfer_type(user=user, amount="1.00", description="Test", category=category)
+                    for _ in range(50)
+                )
+
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute("SET enable_seqscan TO off")
+
+    def assertUsesIndex(self, queryset, index_name):
+        plan = queryset.explain()
+        self.assertIn(index_name, plan)
+
+    def test_period_query_uses_user_created_index(self):
+        for transfer_type in (Income, Expense):
+            queryset = (
+                transfer_type.objects.filter(user=self.user)
+                .annotate(day=TruncDate("created"))
+                .values("day")
+                .annotate(total=Sum("amount"))
+                .order_by("day")
+            )
+            self.assertUsesIndex(queryset, f"api_{transfer_type._meta.model_name}_user_created_idx")
+
+    def test_report_query_uses_user_created_index(self):
+        self.assertUsesIndex(
+            self.user.expense_set.order_by("created", "id"), "api_expense_user_created_idx"
+        )
+        self.assertUsesIndex(
+            self.user.income_set.order_by("created", "id"), "api_income_user_created_idx"
+        )
+
+    def test_category_query_uses_user_category_index(self):
+        queryset = (
+            Expense.objects.filter(user=self.user)
+            .values("category")
+            .annotate(total=Sum("amount"))
+            .order_by()
+        )
+        self.assertUsesIndex(queryset, "api_expense_user_category_idx")
@@ -0,0 +1,122 @@
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from api import metrics
+from api.models import User, Expense
+from .test_report import ReportCacheDirectoryMixin
+
+
+class MetricsTests(ReportCacheDirectoryMixin, APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username="test_user", chat_id=111, password="12345678")
+        self.client.force_authenticate(user=self.user)
+        Expense.objects.create(user=self.user, amount="10.00", description="Food")
+
+    def get_metrics(self) -> str:
+        response = self.client.get(reverse("metrics"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response["Content-Type"].startswith("text/plain"))
+        return response.content.decode()
+
+    def test_request_metrics(self):
+        requests, _ = metrics.request_duration.get(view="expense", method="GET", status=200)
+        requests_with_queries, queries = metrics.db_queries.get(view="expense")
+        sizes, size_sum = metrics.response_size.get(view="expense")
+
+        response = self.client.get(reverse("expense"))
+
+        self.assertEqual(
+            metrics.request_duration.get(view="expense", method="GET", status=200)[0],
+            requests + 1,
+        )
+        # The page of expenses
+        self.assertEqual(
+            metrics.db_queries.get(view="expense"), (requests_with_queries + 1, queries + 1)
+        )
+        self.assertEqual(
+            metrics.response_size.get(view="expense"),
+            (sizes + 1, size_sum + len(response.content)),
+        )
+
+        exported = self.get_metrics()
+        self.assertIn("# TYPE http_request_duration_seconds histogram", exported)
+        self.assertIn(
+            f'http_request_duration_seconds_count{{view="expense",method="GET",status="200"}} {requests + 1}',
+            exported,
+        )
+        self.assertIn('db_queries_per_request_bucket{view="expense",le="+Inf"}', exported)
+        self.assertIn("chat_id_cache_lookups_total", exported)
+
+    def test_report_metrics(self):
+        generated, _ = metrics.report_duration.get(format="csv")
+        hits = metrics.report_cache_requests.get(format="csv", result="hit")
+
+        for _ in range(2):
+            response = self.client.get(reverse("generate_csv_report"), {"stream": "true"})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            # A report missing from the cache is generated while it is streamed
+            b"".join(response.streaming_content)
+            response.close()
+
+        # Generated once, then served from the cache
+        self.assertEqual(metrics.report_duration.get(format="csv")[0], generated + 1)
+        self.assertEqual(metrics.report_cache_requests.get(format="csv", result="hit"), hits + 1)
+        self.assertIn('report_generation_duration_seconds_count{format="csv"}', self.get_metrics())
+
+    def test_streamed_report_is_recorded_once_sent(self):
+        requests, _ = metrics.request_duration.get(
+            view="generate_csv_report", method="GET", status=200
+        )
+        requests_with_queries, queries = metrics.db_queries.get(view="generate_csv_report")
+        _, size = metrics.response_size.get(view="generate_csv_report")
+
+        response = self.client.get(reverse("generate_csv_report"), {"stream": "true"})
+        self.assertEqual(
+            metrics.request_duration.get(view="generate_csv_report", method="GET", status=200)[0],
+            requests,
+        )
+        body = b"".join(response.streaming_content)
+        response.close()
+
+        self.assertEqual(
+            metrics.request_duration.get(view="generate_csv_report", method="GET", status=200)[0],
+            requests + 1,
+        )
+        # The data version, then the expenses and incomes of the report
+        self.assertEqual(
+            metrics.db_queries.get(view="generate_csv_report"),
+            (requests_with_queries + 1, queries + 3),
+        )
+        self.assertEqual(
+            metrics.response_size.get(view="generate_csv_report")[1], size + len(body)
+        )
+
+    @override_settings(METRICS_ALLOWED_IPS=["10.0.0.1"])
+    def test_metrics_are_only_served_to_allowed_addresses(self):
+        response = self.client.get(reverse("metrics"))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        response = self.client.get(reverse("metrics"), REMOTE_ADDR="10.0.0.1")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_unmatched_paths_share_a_label(self):
+        requests, _ = metrics.request_duration.get(view="unmatched", method="GET", status=404)
+
+        self.client.get("/not-found/1")
+        self.client.get("/not-found/2")
+
+        self.assertEqual(
+            metrics.request_duration.get(view="unmatched", method="GET", status=404)[0],
+            requests + 2,
+        )
+
+    @override_settings(METRICS_ENABLED=False)
+    def test_disabled_metrics(self):
+        requests, _ = metrics.request_duration.get(view="expense", method="GET", status=200)
+        self.client.get(reverse("expense"))
+        self.assertEqual(
+            metrics.request_duration.get(view="expense", method="GET", status=200)[0], requests
+        )
@@ -0,0 +1,90 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from api.middleware import ChatIDMiddleware
+from api.models import User, Income
+
+
+class ChatIDMiddlewareTests(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="test_user", chat_id=111, password="12345678")
+        Income.objects.create(user=self.user, amount="10.00", description="Tip")
+        self.url = reverse("income")
+
+    def get_chat_id_lookups(self, chat_id):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, {"chat_id": chat_id}, format="json")
+        lookups = [query for query in queries if '"api_user"."chat_id" =' in query["sql"]]
+        return response, len(lookups)
+
+    def test_unknown_chat_id(self):
+        response, _ = self.get_chat_id_lookups(999)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_repeated_requests_skip_lookup(self):
+        stats = ChatIDMiddleware.stats.as_dict()
+
+        response, lookups = self.get_chat_id_lookups(111)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["results"]), 1)
+        self.assertEqual(lookups, 1)
+
+        response, lookups = self.get_chat_id_lookups(111)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["results"]), 1)
+        self.assertEqual(lookups, 0)
+
+        self.assertEqual(ChatIDMiddleware.stats.as_dict(), {
+            "hits": stats["hits"] + 1,
+            "misses": stats["misses"] + 1,
+        })
+
+    def test_changed_chat_id_is_invalidated(self):
+        self.get_chat_id_lookups(111)
+
+        self.user.chat_id = 222
+        self.user.save()
+
+        response, _ = self.get_chat_id_lookups(111)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        response, _ = self.get_chat_id_lookups(222)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_deleted_user_is_invalidated(self):
+        self.get_chat_id_lookups(111)
+
+        self.user.delete()
+
+        response, _ = self.get_chat_id_lookups(111)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class QueryLoggingMiddlewareTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="test_user", chat_id=111, password="12345678")
+        self.client.force_authenticate(user=self.user)
+
+    @override_settings(QUERY_LOG_SAMPLE_RATE=1)
+    def test_sampled_request_is_logged(self):
+        with self.assertLogs("api.queries", "INFO") as logs:
+            response = self.client.get(reverse("income"), format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        [record] = logs.records
+        self.assertEqual(record.view, "income")
+        self.assertEqual(record.status_code, 200)
+        self.assertEqual(record.queries, 1)
+        self.assertIn("GET income 200: 1 queries", record.getMessage())
+
+    @override_settings(QUERY_LOG_SAMPLE_RATE=0)
+    def test_disabled_logging(self):
+        with self.assertNoLogs("api.queries"):
+            response = self.client.get(reverse("income"), format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
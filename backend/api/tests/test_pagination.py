@@ -0,0 +1,61 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from api.models import User, Expense, Category
+
+
+class CursorPaginationTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="test_user", chat_id=111, password="12345678")
+        self.client.force_authenticate(user=self.user)
+        Expense.objects.bulk_create(
+            Expense(user=self.user, amount="1.00", description=f"Expense {index}")
+            for index in range(25)
+        )
+
+    def test_pages_follow_created_and_id(self):
+        url = reverse("expense")
+        response = self.client.get(url, {"page_size": 10}, format="json")
+
+        ids = []
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            ids += [expense["id"] for expense in response.data["results"]]
+            if not response.data["next"]:
+                break
+            response = self.client.get(response.data["next"], format="json")
+
+        expected_ids = list(
+            Expense.objects.order_by("created", "id").values_list("id", flat=True)
+        )
+        self.assertEqual(ids, expected_ids)
+
+    def test_deep_page_costs_the_same_queries(self):
+        url = reverse("expense")
+        with CaptureQueriesContext(connection) as first_page:
+            response = self.client.get(url, {"page_size": 5}, format="json")
+
+        for _ in range(3):
+            response = self.client.get(response.data["next"], format="json")
+
+        with CaptureQueriesContext(connection) as deep_page:
+            response = self.client.get(response.data["next"], format="json")
+
+        self.assertEqual(len(response.data["results"]), 5)
+        self.assertEqual(len(deep_page), len(first_page))
+        self.assertIn('"created" >', deep_page[-1]["sql"])
+        self.assertNotIn("OFFSET", deep_page[-1]["sql"])
+
+    def test_categories_are_paginated_by_id(self):
+        Category.objects.bulk_create(
+            Category(user=self.user, name=f"Category {index}") for index in range(3)
+        )
+        response = self.client.get(reverse("category"), {"page_size": 2}, format="json")
+        self.assertEqual(len(response.data["results"]), 2)
+        response = self.client.get(response.data["next"], format="json")
+        self.assertEqual(
+            [category["name"] for category in response.data["results"]], ["Category 2"]
+        )
@@ -0,0 +1,83 @@
+import os
+import tempfile
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from api.models import User, Expense, Income, Category
+from api.serializers import ExpenseSerializer, IncomeSerializer
+from api.utils import write_csv_report, write_excel_report
+from api.views import ExpenseView, IncomeView
+
+
+class QueryCountTests(APITestCase):
+    """
+    Reports and lists cost the same number of queries however many rows
+    and categories they show.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="test_user", chat_id=111, password="12345678")
+        self.client.force_authenticate(user=self.user)
+        self.created = 0
+
+    def create_transfers(self, count):
+        for _ in range(count):
+            category = Category.objects.create(user=self.user, name=f"Category {self.created}")
+            Expense.objects.create(
+                user=self.user, amount="1.00", description="Food", category=category
+            )
+            Income.objects.create(
+                user=self.user, amount="2.00", description="Salary", category=category
+            )
+            self.created += 1
+
+    def count_queries(self, function):
+        with CaptureQueriesContext(connection) as queries:
+            function()
+        return len(queries)
+
+    def assertConstantQueries(self, function, expected=None):
+        self.create_transfers(2)
+        few = self.count_queries(function)
+        self.create_transfers(20)
+        many = self.count_queries(function)
+
+        self.assertEqual(few, many)
+        if expected is not None:
+            self.assertEqual(many, expected)
+
+    def write_report(self, write):
+        fd, path = tempfile.mkstemp()
+        os.close(fd)
+        self.addCleanup(os.unlink, path)
+        return lambda: write(self.user, path)
+
+    def test_csv_report(self):
+        # Expenses and incomes with their categories
+        self.assertConstantQueries(self.write_report(write_csv_report), 2)
+
+    def test_excel_report(self):
+        self.assertConstantQueries(self.write_report(write_excel_report), 2)
+
+    def test_list_serialization(self):
+        # The columns loaded for lists are all the serializers read
+        for view, serializer_class in (
+            (ExpenseView, ExpenseSerializer),
+            (IncomeView, IncomeSerializer),
+        ):
+            with self.subTest(view=view.__name__):
+                queryset = view.queryset.filter(user=self.user).only(*view.list_fields)
+                self.assertConstantQueries(
+                    lambda: serializer_class(queryset.all(), many=True).data, 1
+                )
+
+    def test_lists(self):
+        for url in (reverse("expense"), reverse("income")):
+            with self.subTest(url=url):
+                # The page of transfers
+                self.assertConstantQueries(
+                    lambda: self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK),
+                    1,
+                )
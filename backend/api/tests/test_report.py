@@ -0,0 +1,271 @@
+import openpyxl
+import os
+import shutil
+import tempfile
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from io import BytesIO
+from pathlib import Path
+from unittest.mock import patch
+from django.http import FileResponse
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from api.models import User, Expense, Income, Category
+from api.utils import ReportCache
+
+
+class ReportCacheDirectoryMixin:
+    """
+    Keeps the report cache of the test in a temporary directory.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.cache_directory = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.cache_directory)
+        settings_override = override_settings(REPORT_CACHE_DIRECTORY=self.cache_directory)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+
+class PeriodTransfersTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="test_user", chat_id=111, password="12345678")
+        self.client.force_authenticate(user=self.user)
+        self.first_day = datetime(2024, 1, 1, 12, 0, tzinfo=timezone.utc)
+
+    def create_expense(self, amount, days_after_first):
+        Expense.objects.create(
+            user=self.user,
+            amount=amount,
+            description="Food",
+            created=self.first_day + timedelta(days=days_after_first),
+        )
+
+    def test_weekly_expenses(self):
+        self.create_expense("10.00", 0)
+        self.create_expense("5.50", 0)
+        self.create_expense("20.00", 6)
+        self.create_expense("7.00", 15)
+
+        url = reverse("weekly_expenses")
+        response = self.client.get(url, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, [
+            {
+                "period": "01.01.2024-07.01.2024",
+                "total_amount": Decimal("35.50"),
+                "days": [
+                    {"date": "01.01.2024", "total_amount": Decimal("15.50")},
+                    {"date": "07.01.2024", "total_amount": Decimal("20.00")},
+                ],
+            },
+            {
+                "period": "15.01.2024-21.01.2024",
+                "total_amount": Decimal("7.00"),
+                "days": [
+                    {"date": "16.01.2024", "total_amount": Decimal("7.00")},
+                ],
+            },
+        ])
+
+    def test_monthly_expenses(self):
+        self.create_expense("10.00", 0)
+        self.create_expense("20.00", 29)
+        self.create_expense("30.00", 30)
+
+        url = reverse("monthly_expenses")
+        response = self.client.get(url, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(period["period"], period["total_amount"]) for period in response.data],
+            [
+                ("01.01.2024-30.01.2024", Decimal("30.00")),
+                ("31.01.2024-29.02.2024", Decimal("30.00")),
+            ],
+        )
+
+    def test_no_incomes_found(self):
+        url = reverse("weekly_incomes")
+        response = self.client.get(url, format="json")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(response.data["message"], "No incomes found.")
+
+    def test_queries_do_not_grow_with_history(self):
+        for day in range(0, 365, 3):
+            self.create_expense("1.00", day)
+        Income.objects.create(user=self.user, amount="100.00", description="Salary")
+
+        url = reverse("weekly_expenses")
+        with self.assertNumQueries(1):
+            response = self.client.get(url, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class CSVReportTests(ReportCacheDirectoryMixin, APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username="test_user", chat_id=111, password="12345678")
+        self.client.force_authenticate(user=self.user)
+        self.first_day = datetime(2024, 1, 1, 12, 0, tzinfo=timezone.utc)
+
+    def create_transfer(self, transfer_type, amount, description, days_after_first):
+        transfer = transfer_type.objects.create(user=self.user, amount=amount, description=description)
+        transfer_type.objects.filter(pk=transfer.pk).update(
+            created=self.first_day + timedelta(days=days_after_first)
+        )
+
+    def test_streamed_csv_report(self):
+        self.create_transfer(Income, "100.00", "Salary", 0)
+        self.create_transfer(Expense, "20.00", "Lunch", 1)
+        self.create_transfer(Income, "5.00", "Tip", 2)
+        self.create_transfer(Expense, "7.50", "Bus", 3)
+
+        url = reverse("generate_csv_report")
+        response = self.client.get(url, {"stream": "true"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], "text/csv")
+        self.assertIn('filename="111-report.csv"', response["Content-Disposition"])
+        self.assertEqual(
+            b"".join(response.streaming_content).decode().splitlines(),
+            [
+                "Data,Type,Amount,Description,Category",
+                '"01.01.2024, 12:00:00",Income,100.00,Salary,-',
+                '"02.01.2024, 12:00:00",Expense,20.00,Lunch,-',
+                '"03.01.2024, 12:00:00",Income,5.00,Tip,-',
+                '"04.01.2024, 12:00:00",Expense,7.50,Bus,-',
+            ],
+        )
+
+
+class ExcelReportTests(ReportCacheDirectoryMixin, APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username="test_user", chat_id=111, password="12345678")
+        self.client.force_authenticate(user=self.user)
+        self.category = Category.objects.create(user=self.user, name="food")
+
+    def test_streamed_excel_report(self):
+        Income.objects.create(user=self.user, amount="100.00", description="Salary")
+        Expense.objects.create(user=self.user, amount="20.00", description="Lunch", category=self.category)
+
+        url = reverse("generate_excel_report")
+        response = self.client.get(url, {"stream": "true"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('filename="111-report.xlsx"', response["Content-Disposition"])
+
+        sheet = openpyxl.load_workbook(BytesIO(b"".join(response.streaming_content))).active
+        rows = [row[1:] for row in sheet.iter_rows(values_only=True)]
+        self.assertEqual(rows, [
+            ("Type", "Amount", "Description", "Category"),
+            ("Income", 100, "Salary", "-"),
+            ("Expense", 20, "Lunch", "Food"),
+        ])
+        self.assertEqual(sheet.column_dimensions["D"].width, 30)
+
+
+class ReportCacheTests(ReportCacheDirectoryMixin, APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username="test_user", chat_id=111, password="12345678")
+        self.client.force_authenticate(user=self.user)
+        self.category = Category.objects.create(user=self.user, name="food")
+        self.expense = Expense.objects.create(
+            user=self.user, amount="20.00", description="Lunch", category=self.category
+        )
+
+    def get_report(self):
+        response = self.client.get(reverse("generate_csv_report"), {"stream": "true"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return b"".join(response.streaming_content).decode()
+
+    def test_repeated_report_is_served_from_cache(self):
+        report = self.get_report()
+
+        # Only the data version is read
+        with self.assertNumQueries(1):
+            self.assertEqual(self.get_report(), report)
+
+    def test_missing_report_is_streamed_into_the_cache(self):
+        response = self.client.get(reverse("generate_csv_report"), {"stream": "true"})
+        self.assertNotIsInstance(response, FileResponse)
+        self.assertEqual(list(self.cache_directory.iterdir()), [])
+
+        report = b"".join(response.streaming_content).decode()
+        self.assertEqual([path.suffix for path in self.cache_directory.iterdir()], [".csv"])
+
+        response = self.client.get(reverse("generate_csv_report"), {"stream": "true"})
+        self.assertIsInstance(response, FileResponse)
+        self.assertEqual(b"".join(response.streaming_content).decode(), report)
+
+    def test_cached_report_has_the_bytes_of_the_streamed_one(self):
+        self.expense.description = "\u041a\u0430\u0432\u0430"
+        self.expense.save()
+
+        streamed = self.get_report()
+        self.assertIn("\u041a\u0430\u0432\u0430", streamed)
+        self.assertEqual(self.get_report(), streamed)
+
+    def test_partly_streamed_report_is_not_cached(self):
+        response = self.client.get(reverse("generate_csv_report"), {"stream": "true"})
+        next(iter(response.streaming_content))
+        response.close()
+
+        self.assertEqual(list(self.cache_directory.iterdir()), [])
+
+    def test_report_evicted_before_it_is_opened_is_generated_again(self):
+        self.get_report()
+        missing_path = self.cache_directory / "missing.csv"
+
+        with patch.object(ReportCache, "get", return_value=missing_path):
+            self.assertIn("Lunch", self.get_report())
+
+    def test_writes_invalidate_the_cached_report(self):
+        self.assertIn("Lunch", self.get_report())
+
+        self.expense.description = "Dinner"
+        self.expense.save()
+        self.assertIn("Dinner", self.get_report())
+
+        self.category.name = "restaurants"
+        self.category.save()
+        self.assertIn("Restaurants", self.get_report())
+
+        Income.objects.create(user=self.user, amount="5.00", description="Tip")
+        self.assertIn("Tip", self.get_report())
+
+        self.category.delete()
+        self.assertIn("Dinner,-", self.get_report())
+
+        # Only the report of the current version is kept
+        self.assertEqual(len(list(self.cache_directory.glob("*.csv"))), 1)
+
+    def test_least_recently_used_reports_are_evicted(self):
+        cache = ReportCache(self.cache_directory, max_size=25)
+
+        def write(path):
+            with open(path, "w") as file:
+                file.write("x" * 10)
+
+        first = cache.put(1, 0, "csv", write)
+        second = cache.put(2, 0, "csv", write)
+        os.utime(first, (0, 0))
+        os.utime(second, (1, 1))
+        self.assertEqual(cache.get(1, 0, "csv"), first)
+        third = cache.put(3, 0, "csv", write)
+
+        self.assertFalse(second.exists())
+        self.assertTrue(first.exists())
+        self.assertTrue(third.exists())
+        self.assertIsNone(cache.get(2, 0, "csv"))
@@ -0,0 +1,132 @@
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from pathlib import Path
+from unittest.mock import Mock, patch
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+from api.models import User, Income, ReportJob
+from api.utils import claim_report_job, delete_expired_report_jobs, fail_stale_report_jobs
+
+
+class ReportJobTests(APITestCase):
+
+    def setUp(self):
+        self.jobs_directory = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.jobs_directory)
+        settings_override = override_settings(
+            REPORT_JOBS_DIRECTORY=self.jobs_directory / "jobs",
+            REPORT_CACHE_DIRECTORY=self.jobs_directory / "cache",
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = User.objects.create_user(username="test_user", chat_id=111, password="12345678")
+        self.client.force_authenticate(user=self.user)
+        Income.objects.create(user=self.user, amount="100.00", description="Salary")
+
+    def enqueue(self, report_format):
+        response = self.client.post(reverse("report_jobs"), {"format": report_format}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        return response.data["id"]
+
+    def run_worker(self):
+        output = StringIO()
+        call_command("run_report_worker", processes=0, once=True, stdout=output)
+        return output.getvalue()
+
+    def test_csv_report_job(self):
+        job_id = self.enqueue("csv")
+
+        response = self.client.get(reverse("report_job", args=[job_id]))
+        self.assertEqual(response.data["status"], "pending")
+        response = self.client.get(reverse("report_job_download", args=[job_id]))
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+        self.assertIn(f"Report job {job_id} of test_user: done", self.run_worker())
+
+        response = self.client.get(reverse("report_job", args=[job_id]))
+        self.assertEqual(response.data["status"], "done")
+        response = self.client.get(reverse("report_job_download", args=[job_id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('filename="111-report.csv"', response["Content-Disposition"])
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], "Data,Type,Amount,Description,Category")
+        self.assertTrue(lines[1].endswith("Income,100.00,Salary,-"))
+
+    def test_excel_report_job(self):
+        job_id = self.enqueue("xlsx")
+        self.run_worker()
+
+        response = self.client.get(reverse("report_job_download", args=[job_id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue((self.jobs_directory / "jobs" / f"{job_id}.xlsx").exists())
+
+    def test_unknown_format_is_rejected(self):
+        response = self.client.post(reverse("report_jobs"), {"format": "pdf"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_jobs_of_other_users_are_hidden(self):
+        job_id = self.enqueue("csv")
+        other_user = User.objects.create_user(username="other_user", chat_id=222, password="12345678")
+        self.client.force_authenticate(user=other_user)
+
+        response = self.client.get(reverse("report_job", args=[job_id]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        response = self.client.get(reverse("report_jobs"))
+        self.assertEqual(response.data, [])
+
+    def test_jobs_are_listed(self):
+        first_id = self.enqueue("csv")
+        second_id = self.enqueue("xlsx")
+
+        response = self.client.get(reverse("report_jobs"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([job["id"] for job in response.data], [second_id, first_id])
+
+    def test_failed_job_records_the_error(self):
+        job_id = self.enqueue("csv")
+
+        failing_writer = Mock(side_effect=OSError("Disk full"))
+        with patch.dict("api.utils.report_cache.REPORT_WRITERS", {"csv": failing_writer}):
+            self.run_worker()
+
+        response = self.client.get(reverse("report_job", args=[job_id]))
+        self.assertEqual(response.data["status"], "failed")
+        self.assertEqual(response.data["error"], "Disk full")
+
+    def test_job_is_claimed_once(self):
+        self.enqueue("csv")
+
+        self.assertIsNotNone(claim_report_job())
+        self.assertIsNone(claim_report_job())
+
+    def test_stale_running_jobs_are_failed(self):
+        job_id = self.enqueue("csv")
+        claim_report_job()
+
+        with override_settings(REPORT_JOB_TIMEOUT=60):
+            self.assertEqual(fail_stale_report_jobs(timezone.now() + timedelta(seconds=30)), 0)
+            self.assertEqual(fail_stale_report_jobs(timezone.now() + timedelta(seconds=90)), 1)
+
+        job = ReportJob.objects.get(pk=job_id)
+        self.assertEqual(job.status, ReportJob.Status.FAILED)
+        self.assertIsNotNone(job.finished)
+
+    def test_expired_jobs_are_deleted(self):
+        job_id = self.enqueue("csv")
+        self.run_worker()
+        report_path = self.jobs_directory / "jobs" / f"{job_id}.csv"
+        self.assertTrue(report_path.exists())
+
+        with override_settings(REPORT_JOB_RETENTION=60):
+            self.assertEqual(delete_expired_report_jobs(timezone.now() + timedelta(seconds=30)), 0)
+            self.assertEqual(delete_expired_report_jobs(timezone.now() + timedelta(seconds=90)), 1)
+
+        self.assertFalse(report_path.exists())
+        self.assertFalse(ReportJob.objects.exists())
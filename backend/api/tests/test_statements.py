@@ -0,0 +1,158 @@
+import csv
+import os
+import tempfile
+from datetime import datetime, timezone
+from io import StringIO
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from api.models import User, Income, Expense, Category
+
+CSV_STATEMENT = """Date,Amount,Description,Category
+2024-01-01,1500.00,Salary,
+02.01.2024,-12.50,Coffee,food
+02.01.2024,-12.50,Coffee,Food
+2024-01-03,-40,Groceries,Food
+"""
+
+OFX_STATEMENT = """OFXHEADER:100
+DATA:OFXSGML
+
+<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><BANKTRANLIST>
+<STMTTRN>
+<TRNTYPE>CREDIT
+<DTPOSTED>20240105120000[0:GMT]
+<TRNAMT>200.00
+<FITID>1
+<NAME>Refund
+</STMTTRN>
+<STMTTRN><TRNTYPE>DEBIT<DTPOSTED>20240106<TRNAMT>-30.00<FITID>2<MEMO>Taxi</STMTTRN>
+</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>
+"""
+
+
+class StatementImportTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="test_user", chat_id=111, password="12345678")
+        self.client.force_authenticate(user=self.user)
+
+    def upload(self, content, name="statement.csv", encoding="utf-8", url=None):
+        statement = SimpleUploadedFile(name, content.encode(encoding))
+        return self.client.post(
+            url or reverse("import_statement"), {"file": statement}, format="multipart"
+        )
+
+    def get_balance(self):
+        return User.objects.get(pk=self.user.pk).balance
+
+    def test_import_csv_statement(self):
+        response = self.upload(CSV_STATEMENT)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {"incomes": 1, "expenses": 3, "duplicates": 0, "errors": []})
+        self.assertEqual(self.get_balance(), 1435)
+        self.assertEqual(Category.objects.filter(user=self.user).count(), 1)
+        self.assertEqual(Expense.objects.filter(category__name="food").count(), 3)
+        self.assertEqual(
+            Income.objects.get().created, datetime(2024, 1, 1, tzinfo=timezone.utc)
+        )
+
+    def test_reimport_is_idempotent(self):
+        self.upload(CSV_STATEMENT)
+
+        response = self.upload(CSV_STATEMENT)
+
+        self.assertEqual(response.data, {"incomes": 0, "expenses": 0, "duplicates": 4, "errors": []})
+        self.assertEqual(Expense.objects.count(), 3)
+        self.assertEqual(self.get_balance(), 1435)
+
+    def test_overlapping_statement_imports_only_new_rows(self):
+        self.upload(CSV_STATEMENT)
+
+        response = self.upload(CSV_STATEMENT + "2024-01-04,-5.00,Coffee,\n")
+
+        self.assertEqual(response.data["expenses"], 1)
+        self.assertEqual(response.data["duplicates"], 4)
+        self.assertEqual(self.get_balance(), 1430)
+
+    def test_invalid_rows_are_reported(self):
+        response = self.upload(
+            "date,amount,description\n2024-01-01,abc,Salary\n2024-13-01,5,Tip\n2024-01-02,7,Tip\n"
+        )
+
+        self.assertEqual(response.data["incomes"], 1)
+        self.assertEqual(
+            response.data["errors"],
+            ["Line 2: Invalid amount: 'abc'", "Line 3: Invalid date: '2024-13-01'"],
+        )
+
+    def test_import_ofx_statement_body(self):
+        response = self.client.post(
+            reverse("import_statement"), OFX_STATEMENT, content_type="application/x-ofx"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["incomes"], 1)
+        self.assertEqual(response.data["expenses"], 1)
+        self.assertEqual(Expense.objects.get().description, "Taxi")
+        self.assertEqual(self.get_balance(), 170)
+
+    def test_statement_in_another_encoding(self):
+        statement = "Date,Amount,Description\n2024-01-01,-4.20,\u041a\u0430\u0432\u0430\n"
+
+        response = self.upload(statement, encoding="cp1251")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("encoding", response.data["message"])
+        self.assertFalse(Expense.objects.exists())
+
+        response = self.upload(
+            statement, encoding="cp1251", url=reverse("import_statement") + "?encoding=cp1251"
+        )
+        self.assertEqual(response.data["expenses"], 1)
+        self.assertEqual(Expense.objects.get().description, "\u041a\u0430\u0432\u0430")
+
+    def test_statement_in_utf_16(self):
+        response = self.upload(
+            CSV_STATEMENT, encoding="utf-16", url=reverse("import_statement") + "?encoding=utf-16"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["expenses"], 3)
+
+    def test_malformed_csv_is_rejected(self):
+        response = self.upload(
+            "date,amount,description\n2024-01-01,5,{}\n".format("x" * (csv.field_size_limit() + 1))
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Income.objects.exists())
+
+    def test_amounts_which_are_not_numbers_are_reported(self):
+        response = self.upload(
+            "date,amount,description\n2024-01-01,NaN,Salary\n2024-01-01,-Infinity,Tip\n"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data["errors"],
+            ["Line 2: Invalid amount: 'NaN'", "Line 3: Invalid amount: '-Infinity'"],
+        )
+
+    def test_unknown_format_is_rejected(self):
+        response = self.upload("<xml/>", name="statement.xml")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_import_statement_command(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".ofx", delete=False) as file:
+            file.write(OFX_STATEMENT)
+        self.addCleanup(os.unlink, file.name)
+
+        output = StringIO()
+        call_command("import_statement", file.name, user="test_user", stdout=output)
+        call_command("import_statement", file.name, user="test_user", stdout=output)
+
+        self.assertIn("Imported 1 income(s) and 1 expense(s), skipped 0 duplicate(s).", output.getvalue())
+        self.assertIn("Imported 0 income(s) and 0 expense(s), skipped 2 duplicate(s).", output.getvalue())
@@ -0,0 +1,127 @@
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase
+from api.models import User, Income, Expense, Category, DailySummary
+
+
+class DailySummaryTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="test_user", chat_id=111, password="12345678")
+        self.food = Category.objects.create(name="Food", user=self.user)
+        self.taxi = Category.objects.create(name="Taxi", user=self.user)
+
+    def create_expense(self, amount, day, category=None):
+        return Expense.objects.create(
+            user=self.user,
+            amount=amount,
+            description="Expense",
+            category=category,
+            created=datetime(2024, 1, day, 12, tzinfo=timezone.utc),
+        )
+
+    def get_summaries(self):
+        return set(
+            DailySummary.objects.values_list("kind", "date", "category", "total", "count")
+        )
+
+    def assertSummariesRebuilt(self):
+        """
+        The incrementally kept summaries equal the ones rebuilt from scratch.
+        """
+        summaries = self.get_summaries()
+        DailySummary.rebuild()
+        self.assertEqual(summaries, self.get_summaries())
+
+    def test_summaries_follow_transfers(self):
+        first = self.create_expense("10.00", 1, self.food)
+        self.create_expense("5.50", 1, self.food)
+        second = self.create_expense("20.00", 2)
+        Income.objects.create(
+            user=self.user,
+            amount="100.00",
+            description="Salary",
+            created=datetime(2024, 1, 1, tzinfo=timezone.utc),
+        )
+
+        self.assertEqual(self.get_summaries(), {
+            ("expense", date(2024, 1, 1), self.food.pk, Decimal("15.50"), 2),
+            ("expense", date(2024, 1, 2), None, Decimal("20.00"), 1),
+            ("income", date(2024, 1, 1), None, Decimal("100.00"), 1),
+        })
+
+        first.amount = "12.00"
+        first.created = datetime(2024, 1, 3, tzinfo=timezone.utc)
+        first.category = self.taxi
+        first.save()
+        Expense.objects.get(pk=second.pk).delete()
+
+        self.assertEqual(self.get_summaries(), {
+            ("expense", date(2024, 1, 1), self.food.pk, Decimal("5.50"), 1),
+            ("expense", date(2024, 1, 3), self.taxi.pk, Decimal("12.00"), 1),
+            ("income", date(2024, 1, 1), None, Decimal("100.00"), 1),
+        })
+        self.assertSummariesRebuilt()
+
+    def test_bulk_create_updates_summaries(self):
+        self.create_expense("1.00", 3, self.food)
+        Expense.bulk_create_with_balance(
+            (
+                Expense(
+                    user=self.user,
+                    amount="2.00",
+                    description="Expense",
+                    category=self.food if day % 2 else None,
+                    created=datetime(2024, 1, day, tzinfo=timezone.utc),
+                )
+                for day in range(1, 11)
+            ),
+            batch_size=3,
+        )
+
+        self.assertEqual(DailySummary.objects.count(), 10)
+        self.assertEqual(
+            DailySummary.objects.get(date=date(2024, 1, 3), category=self.food).total,
+            Decimal("3.00"),
+        )
+        self.assertSummariesRebuilt()
+
+    def test_deleted_category_is_merged_into_no_category(self):
+        self.create_expense("10.00", 1, self.food)
+        self.create_expense("5.00", 1)
+        self.create_expense("7.00", 2, self.food)
+
+        self.food.delete()
+
+        self.assertEqual(self.get_summaries(), {
+            ("expense", date(2024, 1, 1), None, Decimal("15.00"), 2),
+            ("expense", date(2024, 1, 2), None, Decimal("7.00"), 1),
+        })
+        self.assertSummariesRebuilt()
+
+    def test_queryset_delete_of_category_is_merged_into_no_category(self):
+        self.create_expense("10.00", 1, self.food)
+        self.create_expense("20.00", 1, self.taxi)
+
+        Category.objects.filter(pk__in=[self.food.pk, self.taxi.pk]).delete()
+        self.create_expense("5.00", 1)
+
+        self.assertEqual(self.get_summaries(), {
+            ("expense", date(2024, 1, 1), None, Decimal("35.00"), 3),
+        })
+        self.assertSummariesRebuilt()
+
+    def test_rebuild_command(self):
+        expense = self.create_expense("10.00", 1, self.food)
+        # Queryset updates bypass the summaries
+        Expense.objects.filter(pk=expense.pk).update(amount="30.00")
+
+        out = StringIO()
+        call_command("rebuild_daily_summaries", "--user", str(self.user.pk), stdout=out)
+
+        self.assertIn("Created 1 daily summaries.", out.getvalue())
+        self.assertEqual(self.get_summaries(), {
+            ("expense", date(2024, 1, 1), self.food.pk, Decimal("30.00"), 1),
+        })
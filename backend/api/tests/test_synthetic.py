@@ -0,0 +1,59 @@
+from io import StringIO
+from django.core.management import call_command
+from django.db.models import Sum
+from django.test import TestCase
+from api.models import User, Income, Expense, Category, DailySummary
+
+
+class SyntheticDataTests(TestCase):
+
+    def generate(self, *args):
+        out = StringIO()
+        call_command(
+            "generate_synthetic_data", "--users", "2", "--transfers", "50",
+            "--categories", "3", "--seed", "1", *args, stdout=out,
+        )
+        return out.getvalue()
+
+    def test_generated_data(self):
+        self.assertIn(
+            "Created 2 user(s), 6 categories, 30 incomes and 70 expenses.", self.generate()
+        )
+
+        users = User.objects.filter(username__startswith="synthetic-")
+        self.assertEqual(
+            [user.username for user in users.order_by("id")], ["synthetic-0", "synthetic-1"]
+        )
+        self.assertEqual(Category.objects.filter(user__in=users).count(), 6)
+        self.assertFalse(any(user.has_usable_password() for user in users))
+
+        for user in users:
+            self.assertEqual(
+                Income.objects.filter(user=user).count() + Expense.objects.filter(user=user).count(),
+                50,
+            )
+            # The balances and daily summaries were kept up to date
+            self.assertGreater(user.balance, 0)
+            self.assertEqual(user.update_balance(), user.balance)
+            self.assertEqual(
+                DailySummary.objects.filter(user=user, kind="expense").aggregate(total=Sum("total"))["total"],
+                Expense.objects.filter(user=user).aggregate(total=Sum("amount"))["total"],
+            )
+
+    def test_repeated_runs_add_users(self):
+        self.generate()
+        self.generate()
+
+        self.assertEqual(User.objects.filter(username__startswith="synthetic-").count(), 4)
+        self.assertTrue(User.objects.filter(chat_id="synthetic-3").exists())
+
+    def test_numbers_are_not_reused_after_a_deletion(self):
+        self.generate()
+        User.objects.get(username="synthetic-0").delete()
+
+        self.generate()
+
+        self.assertEqual(
+            sorted(User.objects.filter(username__startswith="synthetic-").values_list("username", flat=True)),
+            ["synthetic-1", "synthetic-2", "synthetic-3"],
+        )
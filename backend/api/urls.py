@@ -4,6 +4,9 @@ from .views import (
     IncomeView,
     ExpenseView,
     CategoryView,
+    ExpenseBulkView,
+    IncomeBulkView,
+    StatementImportView,
     GetUserView,
     GenerateCSVReportView,
     WeeklyExpensesView,
@@ -11,14 +14,20 @@ from .views import (
     WeeklyIncomesView,
     MonthlyIncomesView,
     GenerateExcelReportView,
+    ReportJobView,
+    ReportJobDownloadView,
+    CategoryBreakdownView,
 )
 
 urlpatterns = [
     path("register/", UserCreateView.as_view(), name="register_user"),
     path("income/", IncomeView.as_view(), name="income"),
+    path("income/bulk/", IncomeBulkView.as_view(), name="income_bulk"),
     path("income/<int:pk>/", IncomeView.as_view(), name="income"),
     path("expense/<int:pk>", ExpenseView.as_view(), name="expense"),
     path("expense/", ExpenseView.as_view(), name="expense"),
+    path("expense/bulk/", ExpenseBulkView.as_view(), name="expense_bulk"),
+    path("statements/import/", StatementImportView.as_view(), name="import_statement"),
     path("category/", CategoryView.as_view(), name="category"),
     path("category/<int:pk>", CategoryView.as_view(), name="category"),
     path("get_user/", GetUserView.as_view(), name="get_user"),
@@ -32,8 +41,20 @@ urlpatterns = [
         GenerateExcelReportView.as_view(),
         name="generate_excel_report",
     ),
+    path("report_jobs/", ReportJobView.as_view(), name="report_jobs"),
+    path("report_jobs/<uuid:pk>/", ReportJobView.as_view(), name="report_job"),
+    path(
+        "report_jobs/<uuid:pk>/download/",
+        ReportJobDownloadView.as_view(),
+        name="report_job_download",
+    ),
     path("weekly_expenses/", WeeklyExpensesView.as_view(), name="weekly_expenses"),
     path("monthly_expenses/", MonthlyExpensesView.as_view(), name="monthly_expenses"),
     path("weekly_incomes/", WeeklyIncomesView.as_view(), name="weekly_incomes"),
     path("monthly_incomes/", MonthlyIncomesView.as_view(), name="montly_incomes"),
+    path(
+        "category_breakdown/",
+        CategoryBreakdownView.as_view(),
+        name="category_breakdown",
+    ),
 ]
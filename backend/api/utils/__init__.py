@@ -1,4 +1,28 @@
+from .analytics import get_category_breakdown, get_category_totals
 from .report import (
     create_report_data,
-    generate_transfers
-)
\ No newline at end of file
+    generate_transfers,
+    iter_transfers,
+    stream_csv_report,
+    write_csv_report,
+    write_excel_report,
+)
+from .report_cache import (
+    ReportCache,
+    get_cached_report,
+    get_report_cache,
+    stream_cached_report,
+)
+from .report_jobs import (
+    claim_report_job,
+    delete_expired_report_jobs,
+    enqueue_report_job,
+    fail_stale_report_jobs,
+    run_report_job,
+)
+from .statements import (
+    STATEMENT_FORMATS,
+    StatementImporter,
+    import_statement,
+)
+from .synthetic import generate_synthetic_data
@@ -0,0 +1,83 @@
+"""
+Analytics of user transfers, aggregated by the database from the daily
+summaries.
+"""
+
+from datetime import date, timedelta
+from decimal import Decimal
+from django.db.models import Sum
+
+from ..models import DailySummary
+
+HUNDRED = Decimal(100)
+PERCENT = Decimal("0.01")
+
+
+def get_category_totals(user, transfer_type, start: date, end: date) -> dict:
+    """
+    Returns {category id: (category name, total, count)} of the transfers
+    made from `start` to `end` inclusive, grouped in one query over the daily
+    summaries of the range.
+    """
+    rows = (
+        DailySummary.objects.filter(
+            user=user, kind=transfer_type.summary_kind, date__range=(start, end)
+        )
+        .values("category", "category__name")
+        .annotate(total=Sum("total"), count=Sum("count"))
+        .order_by()
+    )
+    return {
+        row["category"]: (row["category__name"], row["total"], row["count"])
+        for row in rows
+    }
+
+
+def get_percentage(part: Decimal, whole: Decimal):
+    if not whole:
+        return None
+    return (part * HUNDRED / whole).quantize(PERCENT)
+
+
+def get_category_breakdown(user, transfer_type, start: date, end: date) -> dict:
+    """
+    Breaks the transfers of the range down by category and compares every
+    category with the previous range of the same length.
+
+    Returns:
+        dict: Totals and counts of the range and, per category, its total,
+            count, share of the range total in percent and the change against
+            the previous range in percent (None if it had no transfers).
+    """
+    previous_end = start - timedelta(days=1)
+    previous_start = previous_end - (end - start)
+
+    current = get_category_totals(user, transfer_type, start, end)
+    previous = get_category_totals(user, transfer_type, previous_start, previous_end)
+
+    total_amount = sum((total for _, total, _ in current.values()), Decimal(0))
+    categories = []
+    for category in current.keys() | previous.keys():
+        name, total, count = current.get(category) or (previous[category][0], Decimal(0), 0)
+        previous_total = previous[category][1] if category in previous else Decimal(0)
+        categories.append({
+            "category": category,
+            "name": name.capitalize() if name else "-",
+            "total_amount": total,
+            "count": count,
+            "share": get_percentage(total, total_amount) or Decimal(0),
+            "previous_total_amount": previous_total,
+            "change": get_percentage(total - previous_total, previous_total),
+        })
+    categories.sort(key=lambda category: (-category["total_amount"], category["name"]))
+
+    return {
+        "type": transfer_type.__name__.lower(),
+        "start": start.strftime("%d.%m.%Y"),
+        "end": end.strftime("%d.%m.%Y"),
+        "previous_start": previous_start.strftime("%d.%m.%Y"),
+        "previous_end": previous_end.strftime("%d.%m.%Y"),
+        "total_amount": total_amount,
+        "count": sum(count for _, _, count in current.values()),
+        "categories": categories,
+    }
@@ -1,11 +1,45 @@
+import csv
+import heapq
+import openpyxl # type: ignore
 from datetime import timedelta
+from itertools import groupby
 from rest_framework.response import Response
 from rest_framework import status
-from datetime import datetime
+from django.conf import settings
 from django.db.models import Sum
 
+from ..models import DailySummary, Expense, Income
 
-def create_report_data(request):
+
+def get_report_queryset(transfer_type, user):
+    # Filtered on the model rather than through the related manager of the
+    # user, which would fetch the deferred user id of every row
+    return (
+        transfer_type.objects.filter(user=user)
+        .select_related("category")
+        .only("created", "amount", "description", "category__name")
+        .order_by("created", "id")
+    )
+
+
+def iter_transfers(user, chunk_size: int = None):
+    """
+    Yields all incomes and expenses of the user ordered by creation time.
+
+    Both querysets are already ordered by the database, so they are read in
+    chunks and merged lazily instead of being loaded and sorted in memory.
+    Only the columns of the report are loaded, categories joined in the same
+    query.
+    """
+    chunk_size = chunk_size or settings.REPORT_CHUNK_SIZE
+
+    expenses = get_report_queryset(Expense, user).iterator(chunk_size=chunk_size)
+    incomes = get_report_queryset(Income, user).iterator(chunk_size=chunk_size)
+
+    return heapq.merge(expenses, incomes, key=lambda transfer: transfer.created)
+
+
+def create_report_data(user, chunk_size: int = None):
     """
     Creates data for reports in this way:
     (
@@ -20,15 +54,7 @@ def create_report_data(request):
     
     returns (transfer titles, transfer data)
     """
-    
-    expenses = request.user.expense_set.all().order_by("created")
-    incomes = request.user.income_set.all().order_by("created")
-    
-    transfers = sorted(
-        list(expenses) + list(incomes),
-        key=lambda transfer: transfer.created
-    )
-    
+
     transfer_titles = ["Data", "Type", "Amount", "Description", "Category"]
     transfer_data = (
         [
@@ -36,57 +62,131 @@ def create_report_data(request):
             transfer.__class__.__name__,
             transfer.amount,
             transfer.description or "-",
-            transfer.category or "-"
-        ] for transfer in transfers
+            str(transfer.category or "-")
+        ] for transfer in iter_transfers(user, chunk_size)
     )
     
     return (transfer_titles, transfer_data)
 
 
+class Echo:
+    """
+    File-like object that returns written values instead of storing them.
+    """
+
+    def write(self, value):
+        return value
+
+
+def stream_csv_report(user, rows_per_chunk: int = 500):
+    """
+    Yields the CSV report of the user in chunks of `rows_per_chunk` rows.
+    """
+    csv_titles, csv_rows = create_report_data(user)
+    writer = csv.writer(Echo())
+
+    yield writer.writerow(csv_titles)
+
+    chunk = []
+    for row in csv_rows:
+        chunk.append(writer.writerow(row))
+        if len(chunk) == rows_per_chunk:
+            yield "".join(chunk)
+            chunk = []
+
+    if chunk:
+        yield "".join(chunk)
+
+
+def write_csv_report(user, path):
+    """
+    Writes the CSV report of the user to the file at `path`.
+    """
+    csv_titles, csv_rows = create_report_data(user)
+
+    with open(path, "w", encoding="utf-8", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(csv_titles)
+        writer.writerows(csv_rows)
+
+
+def write_excel_report(user, file):
+    """
+    Writes the Excel report of the user to `file` (a path or a binary file).
+
+    Uses a write-only workbook, which flushes rows as they are appended
+    instead of keeping every cell of the sheet in memory.
+    """
+    excel_titles, excel_rows = create_report_data(user)
+
+    excel_file = openpyxl.Workbook(write_only=True)
+    excel_file_list = excel_file.create_sheet()
+
+    excel_file_list.column_dimensions["A"].width = 20  # Дата
+    excel_file_list.column_dimensions["B"].width = 10  # Тип (Expense | Income)
+    excel_file_list.column_dimensions["C"].width = 7  # Сума
+    excel_file_list.column_dimensions["D"].width = 30  # Опис
+    excel_file_list.column_dimensions["E"].width = 20  # Категорія
+
+    excel_file_list.append(excel_titles)
+
+    for row in excel_rows:
+        excel_file_list.append(row)
+
+    excel_file.save(file)
+
+
 def generate_transfers(request, transfer_type, days: int, *args, **kwargs):
-    transfers = transfer_type.objects.filter(user=request.user).order_by("created")
+    """
+    Groups user transfers into consecutive periods of `days` days, starting
+    from the day of the first transfer.
 
-    if not transfers:
+    Daily totals are read from the daily summaries in a single grouped query
+    and bucketed into periods in memory, so neither the number of queries nor
+    the rows they read depend on the number of transfers.
+    """
+    daily_totals = list(
+        DailySummary.objects.filter(user=request.user, kind=transfer_type.summary_kind)
+        .values("date")
+        .annotate(total=Sum("total"))
+        .order_by("date")
+    )
+
+    if not daily_totals:
         return Response({"message": f"No {transfer_type.__name__.lower()}s found."}, status=status.HTTP_404_NOT_FOUND)
-    
-    start_of_week = transfers[0].created.date()
-    end_of_week = start_of_week + timedelta(days=(days-1))
 
+    first_day = daily_totals[0]["date"]
     time_transfers = []
 
-    while start_of_week <= datetime.now().date():
+    for period, period_days in groupby(
+        daily_totals, key=lambda daily: (daily["date"] - first_day).days // days
+    ):
+        start_of_period = first_day + timedelta(days=period * days)
+        end_of_period = start_of_period + timedelta(days=(days-1))
         time_period = "{}-{}".format(
-            start_of_week.strftime("%d.%m.%Y"),
-            end_of_week.strftime("%d.%m.%Y")
+            start_of_period.strftime("%d.%m.%Y"),
+            end_of_period.strftime("%d.%m.%Y")
         )
-        
-        filtered_transfers = transfers.filter(created__gte=start_of_week, created__lte=end_of_week)
-        
-        if filtered_transfers:
-            total_amount = filtered_transfers.aggregate(total=Sum("amount"))["total"] or 0
-            time_transfers.append({
-                "period": time_period,
-                "total_amount": total_amount,
-                "days": count_transfers_by_day(transfers, days, start_of_week)
-            })
-            
-        start_of_week = end_of_week + timedelta(days=1)
-        end_of_week = start_of_week + timedelta(days=(days-1))
-        
-    return Response(time_transfers, status=status.HTTP_200_OK)
 
-def count_transfers_by_day(transfers, days: int,  current_date):
-    daily_transfers = []
-    for _ in range(days):
-        filtered_transfers = transfers.filter(created__date=current_date)
+        daily_transfers = count_transfers_by_day(period_days)
+        time_transfers.append({
+            "period": time_period,
+            "total_amount": sum(daily["total_amount"] for daily in daily_transfers),
+            "days": daily_transfers
+        })
 
-        if filtered_transfers:
-            total_amount = filtered_transfers.aggregate(total=Sum("amount"))["total"] or 0
-            daily_transfers.append({
-                "date": current_date.strftime("%d.%m.%Y"),
-                "total_amount": total_amount,
-            })
+    return Response(time_transfers, status=status.HTTP_200_OK)
 
-        current_date += timedelta(days=1)
-    
-    return daily_transfers
+
+def count_transfers_by_day(daily_totals):
+    """
+    Formats rows of the grouped (date, total) query into the daily breakdown
+    of a period.
+    """
+    return [
+        {
+            "date": daily["date"].strftime("%d.%m.%Y"),
+            "total_amount": daily["total"] or 0,
+        }
+        for daily in daily_totals
+    ]
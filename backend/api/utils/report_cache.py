@@ -0,0 +1,209 @@
+"""
+On-disk cache of generated reports.
+
+A report only depends on the data of its user, so it is stored under the data
+version of the user and served as is until the next write bumps the version.
+The files are evicted least recently used first once the cache grows beyond
+`REPORT_CACHE_MAX_SIZE` bytes.
+
+Streamed CSV reports missing from the cache are sent while they are written
+into it, so the first byte doesn't wait for the whole report. An Excel
+workbook is only written out when it is saved, so it is cached first.
+"""
+
+import os
+import tempfile
+from pathlib import Path
+from django.conf import settings
+
+from .. import metrics
+from ..models import User
+from .report import stream_csv_report, write_csv_report, write_excel_report
+
+REPORT_WRITERS = {
+    "csv": write_csv_report,
+    "xlsx": write_excel_report,
+}
+# Formats whose reports can be generated as chunks of text
+REPORT_STREAMERS = {
+    "csv": stream_csv_report,
+}
+
+
+class ReportCache:
+    """
+    Directory of report files named `{user id}-{data version}.{format}`.
+
+    Hits update the modification time of the file, which is the recency
+    the eviction goes by.
+    """
+
+    def __init__(self, directory, max_size: int):
+        self.directory = Path(directory)
+        self.max_size = max_size
+
+    def get_path(self, user_id, version: int, report_format: str) -> Path:
+        return self.directory / f"{user_id}-{version}.{report_format}"
+
+    def get(self, user_id, version: int, report_format: str):
+        """
+        Returns the path of the cached report, None if it isn't cached.
+        """
+        path = self.get_path(user_id, version, report_format)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def put(self, user_id, version: int, report_format: str, write) -> Path:
+        """
+        Stores the report written by `write(path)` and returns its path.
+        """
+        path = self.get_path(user_id, version, report_format)
+        temporary_path = self._create_temporary_file()
+        try:
+            write(temporary_path)
+        except BaseException:
+            os.unlink(temporary_path)
+            raise
+
+        return self._store(temporary_path, path, user_id, report_format)
+
+    def put_stream(self, user_id, version: int, report_format: str, chunks):
+        """
+        Yields the chunks of text of a report while writing them to the cache,
+        and stores the report once every chunk was consumed. A report which
+        isn't consumed to the end, e.g. because the client disconnected, is
+        dropped.
+        """
+        path = self.get_path(user_id, version, report_format)
+        temporary_path = self._create_temporary_file()
+        try:
+            with open(temporary_path, "w", encoding="utf-8", newline="") as file:
+                for chunk in chunks:
+                    file.write(chunk)
+                    yield chunk
+        except BaseException:
+            os.unlink(temporary_path)
+            raise
+
+        self._store(temporary_path, path, user_id, report_format)
+
+    def _create_temporary_file(self) -> str:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        fd, temporary_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        os.close(fd)
+        return temporary_path
+
+    def _store(self, temporary_path, path: Path, user_id, report_format: str) -> Path:
+        """
+        Renames the written report into place, so a report being written is
+        never served, and drops the reports it replaces.
+        """
+        os.replace(temporary_path, path)
+
+        # Reports of older versions can't be requested anymore
+        for stale_path in self.directory.glob(f"{user_id}-*.{report_format}"):
+            if stale_path != path:
+                stale_path.unlink(missing_ok=True)
+
+        self.evict(keep=path)
+        return path
+
+    def evict(self, keep=None) -> int:
+        """
+        Deletes the least recently used reports until the cache fits its size.
+
+        Returns:
+            int: Number of deleted reports.
+        """
+        entries = []
+        for path in self.directory.glob("*-*.*"):
+            if path.suffix[1:] not in REPORT_WRITERS:
+                continue
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total_size = sum(size for _, size, _ in entries)
+        deleted = 0
+        for _, size, path in sorted(entries, key=lambda entry: entry[0]):
+            if total_size <= self.max_size:
+                break
+            if path == keep:
+                continue
+            path.unlink(missing_ok=True)
+            total_size -= size
+            deleted += 1
+        return deleted
+
+
+def get_report_cache() -> ReportCache:
+    return ReportCache(settings.REPORT_CACHE_DIRECTORY, settings.REPORT_CACHE_MAX_SIZE)
+
+
+def get_cached_report(user, report_format: str) -> Path:
+    """
+    Returns the path of the report of the user, generating it only if the
+    data of the user changed since it was cached.
+    """
+    cache = get_report_cache()
+    version = User.objects.values_list("data_version", flat=True).get(pk=user.pk)
+
+    path = cache.get(user.pk, version, report_format)
+    if path is not None:
+        metrics.report_cache_requests.inc(format=report_format, result="hit")
+        return path
+
+    metrics.report_cache_requests.inc(format=report_format, result="miss")
+    with metrics.report_duration.time(format=report_format):
+        return cache.put(
+            user.pk,
+            version,
+            report_format,
+            lambda file: REPORT_WRITERS[report_format](user, file),
+        )
+
+
+def stream_cached_report(user, report_format: str):
+    """
+    Returns the report of the user as an iterable of chunks: the cached file
+    opened in binary mode, or, if the data of the user changed since it was
+    cached, the chunks of the report streamed while it is generated and
+    cached.
+    """
+    cache = get_report_cache()
+    version = User.objects.values_list("data_version", flat=True).get(pk=user.pk)
+
+    path = cache.get(user.pk, version, report_format)
+    if path is not None:
+        try:
+            report = open(path, "rb")
+        except FileNotFoundError:
+            # Evicted by another request in the meantime, generated again
+            pass
+        else:
+            metrics.report_cache_requests.inc(format=report_format, result="hit")
+            return report
+
+    metrics.report_cache_requests.inc(format=report_format, result="miss")
+    if report_format not in REPORT_STREAMERS:
+        with metrics.report_duration.time(format=report_format):
+            path = cache.put(
+                user.pk,
+                version,
+                report_format,
+                lambda file: REPORT_WRITERS[report_format](user, file),
+            )
+        return open(path, "rb")
+
+    def generate():
+        with metrics.report_duration.time(format=report_format):
+            yield from cache.put_stream(
+                user.pk, version, report_format, REPORT_STREAMERS[report_format](user)
+            )
+
+    return generate()
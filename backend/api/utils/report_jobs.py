@@ -0,0 +1,115 @@
+"""
+Background generation of reports.
+
+A request only enqueues a `ReportJob`; the `run_report_worker` command claims
+pending jobs and writes the reports to `REPORT_JOBS_DIRECTORY` in a pool of
+processes, so building a large report never holds a web worker.
+"""
+
+import logging
+import shutil
+from datetime import timedelta
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+from ..models import ReportJob
+from .report_cache import get_cached_report
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue_report_job(user, report_format: str) -> ReportJob:
+    """
+    Creates a pending report job of the user.
+    """
+    return ReportJob.objects.create(user=user, format=report_format)
+
+
+def claim_report_job():
+    """
+    Marks the oldest pending job as running and returns it, None if there is
+    no pending job.
+
+    The status is switched with a conditional update, so two workers can't
+    claim the same job even without row locks.
+    """
+    pending = ReportJob.objects.filter(status=ReportJob.Status.PENDING)
+    for job_id in pending.order_by("created").values_list("id", flat=True)[:10]:
+        claimed = pending.filter(pk=job_id).update(
+            status=ReportJob.Status.RUNNING, started=timezone.now()
+        )
+        if claimed:
+            return ReportJob.objects.select_related("user").get(pk=job_id)
+    return None
+
+
+def fail_stale_report_jobs(now=None) -> int:
+    """
+    Fails the jobs running for longer than `REPORT_JOB_TIMEOUT` seconds, left
+    behind by a worker that crashed or was stopped, so they don't stay
+    running until they expire.
+
+    Returns:
+        int: Number of failed jobs.
+    """
+    now = now or timezone.now()
+    return ReportJob.objects.filter(
+        status=ReportJob.Status.RUNNING,
+        started__lt=now - timedelta(seconds=settings.REPORT_JOB_TIMEOUT),
+    ).update(
+        status=ReportJob.Status.FAILED,
+        error="Report worker stopped before finishing the report.",
+        finished=now,
+    )
+
+
+def run_report_job(job_id) -> str:
+    """
+    Writes the report of a claimed job and records the outcome.
+
+    Runs in the worker processes, so it only takes the id of the job.
+
+    Returns:
+        str: The final status of the job.
+    """
+    close_old_connections()
+    job = ReportJob.objects.select_related("user").get(pk=job_id)
+    file_name = f"{job.pk}.{job.format}"
+
+    try:
+        settings.REPORT_JOBS_DIRECTORY.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(
+            get_cached_report(job.user, job.format),
+            settings.REPORT_JOBS_DIRECTORY / file_name,
+        )
+    except Exception as ex:
+        logger.exception(f"Report job {job.pk} failed")
+        job.status = ReportJob.Status.FAILED
+        job.error = str(ex)
+    else:
+        job.status = ReportJob.Status.DONE
+        job.file_name = file_name
+
+    job.finished = timezone.now()
+    job.save(update_fields=["status", "file_name", "error", "finished"])
+    return job.status
+
+
+def delete_expired_report_jobs(now=None) -> int:
+    """
+    Deletes the jobs older than `REPORT_JOB_RETENTION` seconds and their files.
+
+    Returns:
+        int: Number of deleted jobs.
+    """
+    now = now or timezone.now()
+    expired = ReportJob.objects.filter(
+        created__lt=now - timedelta(seconds=settings.REPORT_JOB_RETENTION)
+    )
+
+    for file_name in expired.exclude(file_name="").values_list("file_name", flat=True):
+        (settings.REPORT_JOBS_DIRECTORY / file_name).unlink(missing_ok=True)
+
+    deleted, _ = expired.delete()
+    return deleted
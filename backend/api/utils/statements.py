@@ -0,0 +1,264 @@
+"""
+Streaming import of bank statements into incomes and expenses.
+
+Statements are parsed row by row and imported in batches, so only one batch
+of rows is held in memory, next to a counter of the distinct rows. Every row
+gets a fingerprint of its date, amount and description; the unique (user,
+fingerprint) index of the transfers makes finding the rows imported before a
+single indexed lookup per batch.
+"""
+
+import csv
+import hashlib
+import re
+from collections import Counter
+from datetime import datetime, time
+from datetime import timezone as dt_timezone
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+from typing import Iterable, Iterator, NamedTuple, Optional
+from django.conf import settings
+from django.db import transaction
+
+from ..models import Category, Expense, Income
+
+STATEMENT_FORMATS = ("csv", "ofx")
+DATE_FORMATS = ("%Y-%m-%d", "%d.%m.%Y", "%d/%m/%Y", "%Y%m%d")
+CENT = Decimal("0.01")
+# Amounts of transfers have 10 digits, 2 of them decimal
+MAX_AMOUNT = Decimal(10) ** 8
+
+OFX_TRANSACTION = re.compile(r"<STMTTRN>(.*?)</STMTTRN>", re.IGNORECASE | re.DOTALL)
+OFX_FIELD = re.compile(r"<(\w+)>([^<\r\n]*)")
+
+
+class StatementError(ValueError):
+    """
+    Raised for a statement row that can't be imported.
+    """
+
+
+class StatementRow(NamedTuple):
+    line: int
+    created: datetime
+    # Positive for incomes, negative for expenses
+    amount: Decimal
+    description: str
+    category: Optional[str] = None
+
+
+def parse_date(value: str) -> datetime:
+    """
+    Parses the date of a statement row into midnight UTC of that day.
+    """
+    for date_format in DATE_FORMATS:
+        try:
+            date = datetime.strptime(value.strip(), date_format).date()
+        except ValueError:
+            continue
+        return datetime.combine(date, time(), tzinfo=dt_timezone.utc)
+    raise StatementError(f"Invalid date: {value!r}")
+
+
+def parse_amount(value: str) -> Decimal:
+    """
+    Parses the amount of a statement row, rounded to cents.
+    """
+    try:
+        amount = Decimal(value.strip().replace(" ", "").replace(",", ".")).quantize(CENT)
+    except (AttributeError, InvalidOperation):
+        raise StatementError(f"Invalid amount: {value!r}")
+    if not amount.is_finite() or not amount or abs(amount) >= MAX_AMOUNT:
+        raise StatementError(f"Invalid amount: {value!r}")
+    return amount
+
+
+def parse_csv_statement(lines: Iterable[str]) -> Iterator:
+    """
+    Yields the rows of a CSV statement with `date`, `amount`, `description`
+    and optional `category` columns, or a StatementError for an invalid row.
+    """
+    reader = csv.DictReader(lines)
+    if reader.fieldnames is None:
+        return
+    reader.fieldnames = [name.strip().lower() for name in reader.fieldnames]
+
+    for row in reader:
+        try:
+            yield StatementRow(
+                line=reader.line_num,
+                created=parse_date(row.get("date") or ""),
+                amount=parse_amount(row.get("amount") or ""),
+                description=(row.get("description") or "").strip(),
+                category=(row.get("category") or "").strip() or None,
+            )
+        except StatementError as error:
+            yield StatementError(f"Line {reader.line_num}: {error}")
+
+
+def parse_ofx_statement(chunks: Iterable[str]) -> Iterator:
+    """
+    Yields the transactions of an OFX statement, SGML (1.x) or XML (2.x),
+    or a StatementError for an invalid transaction.
+
+    The statement is read chunk by chunk; only the text after the last
+    complete transaction is kept in memory.
+    """
+    buffer = ""
+    number = 0
+    for chunk in chunks:
+        buffer += chunk
+        end = 0
+        for match in OFX_TRANSACTION.finditer(buffer):
+            end = match.end()
+            number += 1
+            fields = {
+                tag.upper(): value.strip() for tag, value in OFX_FIELD.findall(match.group(1))
+            }
+            try:
+                yield StatementRow(
+                    line=number,
+                    # DTPOSTED is YYYYMMDD, optionally followed by the time
+                    created=parse_date(fields.get("DTPOSTED", "")[:8]),
+                    amount=parse_amount(fields.get("TRNAMT", "")),
+                    description=fields.get("NAME") or fields.get("MEMO", ""),
+                )
+            except StatementError as error:
+                yield StatementError(f"Transaction {number}: {error}")
+        buffer = buffer[end:]
+
+
+STATEMENT_PARSERS = {
+    "csv": parse_csv_statement,
+    "ofx": parse_ofx_statement,
+}
+
+
+def get_fingerprint_key(row: StatementRow) -> str:
+    """
+    Returns the date, amount and normalized description of the row.
+    """
+    description = " ".join(row.description.split()).casefold()
+    return f"{row.created.date().isoformat()}|{row.amount}|{description}"
+
+
+def get_fingerprint(key: str, occurrence: int) -> str:
+    """
+    Returns the fingerprint of the `occurrence`-th row of the statement with
+    the fingerprint key, so two equal payments on the same day are both
+    imported, but only once.
+    """
+    return hashlib.blake2b(f"{key}|{occurrence}".encode(), digest_size=16).hexdigest()
+
+
+class StatementImporter:
+    """
+    Imports the rows of a statement for one user.
+
+    Rows are imported in batches: the fingerprints of a batch that already
+    exist are fetched with one query per table, and only the new rows are
+    turned into transfers, inserted with `bulk_create` and applied to the
+    balance with one delta.
+    """
+
+    def __init__(self, user, batch_size: int = None):
+        self.user = user
+        self.batch_size = batch_size or settings.BULK_CREATE_BATCH_SIZE
+        self.occurrences = Counter()
+        self.categories = {}
+        self.result = {"incomes": 0, "expenses": 0, "duplicates": 0, "errors": []}
+
+    def import_rows(self, rows: Iterable) -> dict:
+        """
+        Imports the parsed rows in one transaction.
+
+        Returns:
+            dict: Numbers of imported incomes and expenses, skipped duplicates
+                and the errors of the rows which couldn't be imported.
+        """
+        rows = iter(rows)
+        with transaction.atomic():
+            while batch := list(islice(rows, self.batch_size)):
+                self.import_batch(batch)
+        return self.result
+
+    def import_batch(self, batch):
+        # {transfer type: {fingerprint: row}}
+        rows = {Income: {}, Expense: {}}
+        for row in batch:
+            if isinstance(row, StatementError):
+                self.add_error(str(row))
+                continue
+            key = get_fingerprint_key(row)
+            self.occurrences[key] += 1
+            transfer_type = Income if row.amount > 0 else Expense
+            rows[transfer_type][get_fingerprint(key, self.occurrences[key])] = row
+
+        for transfer_type, result_key in ((Income, "incomes"), (Expense, "expenses")):
+            if not rows[transfer_type]:
+                continue
+            existing = set(
+                transfer_type.objects.filter(
+                    user=self.user, fingerprint__in=list(rows[transfer_type])
+                ).values_list("fingerprint", flat=True)
+            )
+            self.result["duplicates"] += len(existing)
+
+            transfers = []
+            for fingerprint, row in rows[transfer_type].items():
+                if fingerprint in existing:
+                    continue
+                try:
+                    transfers.append(self.build_transfer(transfer_type, row, fingerprint))
+                except StatementError as error:
+                    self.add_error(f"Line {row.line}: {error}")
+
+            self.result[result_key] += transfer_type.bulk_create_with_balance(
+                transfers, self.batch_size
+            )
+
+    def build_transfer(self, transfer_type, row: StatementRow, fingerprint: str):
+        return transfer_type(
+            user=self.user,
+            amount=abs(row.amount),
+            description=row.description,
+            category=self.get_category(row.category),
+            created=row.created,
+            fingerprint=fingerprint,
+        )
+
+    def get_category(self, name: Optional[str]):
+        """
+        Returns the category of the user with the name, creating it if needed.
+        """
+        if name is None:
+            return None
+
+        key = name.casefold()
+        if key not in self.categories:
+            if len(name) > Category._meta.get_field("name").max_length:
+                raise StatementError(f"Category name is too long: {name!r}")
+            self.categories[key] = (
+                Category.objects.filter(user=self.user, name__iexact=name).first()
+                or Category.objects.create(user=self.user, name=name)
+            )
+        return self.categories[key]
+
+    def add_error(self, error: str):
+        if len(self.result["errors"]) < settings.BULK_CREATE_MAX_ERRORS:
+            self.result["errors"].append(error)
+
+
+def import_statement(user, lines: Iterable[str], statement_format: str) -> dict:
+    """
+    Parses the statement and imports its rows for the user.
+
+    Args:
+        user (User): Owner of the imported incomes and expenses.
+        lines (iterable): Text of the statement, line by line.
+        statement_format (str): "csv" or "ofx".
+
+    Returns:
+        dict: See `StatementImporter.import_rows`.
+    """
+    return StatementImporter(user).import_rows(STATEMENT_PARSERS[statement_format](lines))
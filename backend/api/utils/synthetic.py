@@ -0,0 +1,105 @@
+"""
+Synthetic users, categories and transfers for benchmarks and load tests.
+"""
+
+import random
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+from decimal import Decimal
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+
+from ..models import Category, Expense, Income, User
+
+# Incomes are larger than expenses, so the balances of the users stay positive
+INCOME_SHARE = 0.3
+INCOME_AMOUNTS = (1000, 50000)
+EXPENSE_AMOUNTS = (100, 10000)
+
+
+def iter_synthetic_transfers(transfer_type, user, categories, count: int, days: int, generator):
+    """
+    Yields `count` unsaved transfers of the user spread over the last `days`
+    days, in random categories, a tenth of them without one.
+    """
+    low, high = INCOME_AMOUNTS if transfer_type is Income else EXPENSE_AMOUNTS
+    end = datetime.now(dt_timezone.utc)
+    seconds = days * 24 * 60 * 60
+    for index in range(count):
+        yield transfer_type(
+            user=user,
+            amount=Decimal(generator.randint(low, high)) / 100,
+            description=f"Synthetic {transfer_type.__name__.lower()} {index}",
+            category=(
+                generator.choice(categories) if categories and generator.random() >= 0.1 else None
+            ),
+            created=end - timedelta(seconds=generator.randrange(seconds)),
+        )
+
+
+def get_next_number(prefix: str) -> int:
+    """
+    Returns the number after the highest one of the users of the prefix, so
+    deleted users don't make a number be used twice.
+    """
+    numbers = (
+        username[len(prefix) + 1:]
+        for username in User.objects.filter(username__startswith=f"{prefix}-")
+        .values_list("username", flat=True)
+        .iterator()
+    )
+    return max((int(number) for number in numbers if number.isdigit()), default=-1) + 1
+
+
+def generate_synthetic_data(
+    users: int,
+    transfers: int,
+    categories: int,
+    days: int = 365,
+    prefix: str = "synthetic",
+    seed: int = None,
+    batch_size: int = None,
+) -> dict:
+    """
+    Creates `users` users with `categories` categories and `transfers`
+    incomes and expenses each, all with `bulk_create`.
+
+    Usernames and chat ids are `{prefix}-{number}`, numbered after the
+    highest number of the users of the prefix created before. The users get
+    an unusable password, so they can't be logged into.
+
+    Returns:
+        dict: Ids of the created users and the numbers of created rows.
+    """
+    generator = random.Random(seed)
+    batch_size = batch_size or settings.BULK_CREATE_BATCH_SIZE
+    password = make_password(None)
+    first = get_next_number(prefix)
+
+    result = {"users": [], "categories": 0, "incomes": 0, "expenses": 0}
+    with transaction.atomic():
+        created_users = User.objects.bulk_create(
+            User(username=f"{prefix}-{number}", chat_id=f"{prefix}-{number}", password=password)
+            for number in range(first, first + users)
+        )
+        for user in created_users:
+            user_categories = Category.objects.bulk_create(
+                Category(user=user, name=f"category {number}") for number in range(categories)
+            )
+            incomes = round(transfers * INCOME_SHARE)
+
+            result["users"].append(user.pk)
+            result["categories"] += len(user_categories)
+            result["incomes"] += Income.bulk_create_with_balance(
+                iter_synthetic_transfers(Income, user, user_categories, incomes, days, generator),
+                batch_size,
+            )
+            result["expenses"] += Expense.bulk_create_with_balance(
+                iter_synthetic_transfers(
+                    Expense, user, user_categories, transfers - incomes, days, generator
+                ),
+                batch_size,
+            )
+
+    return result
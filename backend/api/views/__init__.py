@@ -1,7 +1,11 @@
+from .metrics import MetricsView
 from .models_crud import (
     ExpenseView,
     IncomeView,
     CategoryView,
+    ExpenseBulkView,
+    IncomeBulkView,
+    StatementImportView,
 )
 from .user import (
     UserCreateView,
@@ -10,10 +14,13 @@ from .user import (
 from .utils import (
     GenerateCSVReportView,
     GenerateExcelReportView,
+    ReportJobView,
+    ReportJobDownloadView,
     WeeklyExpensesView,
     WeeklyIncomesView,
     MonthlyExpensesView,
     MonthlyIncomesView,
+    CategoryBreakdownView,
 )
 
 
@@ -0,0 +1,24 @@
+"""
+View exporting the metrics of the process.
+"""
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from django.views import View
+
+from .. import metrics
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class MetricsView(View):
+    """
+    Returns the metrics in the Prometheus text format, to the addresses of
+    METRICS_ALLOWED_IPS only.
+    """
+
+    def get(self, request, *args, **kwargs):
+        allowed_ips = settings.METRICS_ALLOWED_IPS
+        if "*" not in allowed_ips and request.META.get("REMOTE_ADDR") not in allowed_ips:
+            return HttpResponseForbidden()
+        return HttpResponse(metrics.registry.render(), content_type=PROMETHEUS_CONTENT_TYPE)
@@ -2,17 +2,25 @@
 Views for handling API requests for models and doing CRUD.
 """
 
+import csv
+from decimal import Decimal
+from itertools import islice
+from django.conf import settings
+from django.db import transaction
 from rest_framework import status, generics, mixins
 from rest_framework.response import Response
 
-from ..models import Expense, Income, Category
+from ..models import User, Expense, Income, Category
 from ..serializers import (
     ExpenseSerializer,
     IncomeSerializer,
     CategorySerializer,
 )
+from ..pagination import CategoryCursorPagination
+from ..utils import STATEMENT_FORMATS, import_statement
 from ..mixins import (
     ContentTypeValidationMixin,
+    TextUploadMixin,
     UserFilteredMixin
 )
 
@@ -33,8 +41,24 @@ class BaseCRUDView(
     required fields:
     queryset = *Model*.objects.all()
     serializer_class = *ModelSerializer*
+
+    optional fields:
+    list_fields = columns read by the serializer; listed rows are only read,
+        so the other columns aren't loaded
     """
 
+    list_fields = None
+
+    def list(self, request, *args, **kwargs):
+        self.queryset_fields = self.list_fields
+        return super().list(request, *args, **kwargs)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if getattr(self, "queryset_fields", None):
+            queryset = queryset.only(*self.queryset_fields)
+        return queryset
+
     def get(self, request, *args, **kwargs):
         if "pk" in kwargs:
             return self.retrieve(request, *args, **kwargs)
@@ -64,41 +88,245 @@ class BaseCRUDView(
 class ExpenseView(BaseCRUDView):
     queryset = Expense.objects.all()
     serializer_class = ExpenseSerializer
+    list_fields = ("id", "amount", "description", "category_id", "user_id", "created")
 
     def post(self, request, *args, **kwargs):
-        amount = float(request.data.get("amount"))
-        if request.user.balance - amount < 0:
-            return Response(
-                data={
-                    "message": "You don't have enough balance to perform this operation"
-                },
-                status=status.HTTP_405_METHOD_NOT_ALLOWED,
-            )
-
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        serializer.save(user=request.user)
+        amount = float(serializer.validated_data["amount"])
+
+        # The user row stays locked until the expense and its balance change
+        # are committed, so concurrent requests can't both spend the same money.
+        with transaction.atomic():
+            user = User.objects.select_for_update().get(pk=request.user.pk)
+            if user.balance - amount < 0:
+                return Response(
+                    data={
+                        "message": "You don't have enough balance to perform this operation"
+                    },
+                    status=status.HTTP_405_METHOD_NOT_ALLOWED,
+                )
+
+            serializer.save(user=user)
 
-        request.user.update_balance()
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
 
 class IncomeView(BaseCRUDView):
     queryset = Income.objects.all()
     serializer_class = IncomeSerializer
+    list_fields = ("id", "amount", "description", "category_id", "user_id", "created")
 
     def post(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         serializer.save(user=request.user)
 
-        request.user.update_balance()
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
 
+def iter_batches(rows, size: int):
+    """
+    Yields (index of the first row, list of rows) for batches of `size` rows.
+    """
+    rows = iter(rows)
+    start = 0
+    while batch := list(islice(rows, size)):
+        yield start, batch
+        start += len(batch)
+
+
+class BaseBulkCreateView(TextUploadMixin, generics.GenericAPIView):
+    """
+    Creates many incomes or expenses of the user in one request.
+
+    Accepts a JSON array of transfers, or a CSV file with `amount`,
+    `description` and optional `category` columns, sent as the request body
+    with `Content-Type: text/csv` or uploaded as `file`, in the encoding given
+    by the `encoding` query parameter (UTF-8 by default). CSV rows are read one
+    by one. Rows are validated and inserted in batches within one transaction,
+    and the balance is changed once. If any row is invalid nothing is created
+    and the errors are reported per row.
+
+    required fields:
+    serializer_class = *ModelSerializer* with a TransferListSerializer
+    """
+
+    def get_rows(self, request, encoding: str):
+        if request.content_type.startswith("text/csv"):
+            return csv.DictReader(self.decode_lines(request.stream, encoding))
+        if "file" in request.FILES:
+            return csv.DictReader(self.decode_lines(request.FILES["file"], encoding))
+        if isinstance(request.data, list):
+            return request.data
+        return None
+
+    def check_balance(self, user, total: Decimal):
+        """
+        Returns an error response if the user can't afford the transfers.
+        """
+        return None
+
+    def post(self, request, *args, **kwargs):
+        encoding = self.get_encoding()
+        if encoding is None:
+            return self.encoding_error_response()
+
+        rows = self.get_rows(request, encoding)
+        if rows is None:
+            return Response(
+                data={"message": "Expected a JSON array or a CSV file."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            return self.create_transfers(request, rows)
+        # Raised out of the transaction, so nothing was created
+        except UnicodeDecodeError:
+            return self.encoding_error_response(encoding)
+        except csv.Error as error:
+            return self.csv_error_response(error)
+
+    def create_transfers(self, request, rows):
+        with transaction.atomic():
+            user = User.objects.select_for_update().get(pk=request.user.pk)
+            created, total, errors = self.create_rows(rows, user)
+
+            if errors:
+                transaction.set_rollback(True)
+                return Response(
+                    data={
+                        "message": "Some rows are invalid, nothing was created.",
+                        "errors": errors,
+                    },
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+
+            error_response = self.check_balance(user, total)
+            if error_response is not None:
+                transaction.set_rollback(True)
+                return error_response
+
+        return Response(
+            data={"created": created, "total_amount": total},
+            status=status.HTTP_201_CREATED,
+        )
+
+    def create_rows(self, rows, user):
+        """
+        Validates the rows batch by batch and inserts the valid ones.
+
+        After the first invalid row, the remaining rows are only validated to
+        report their errors.
+
+        Returns:
+            tuple: (number of created rows, their total amount, row errors)
+        """
+        model = self.get_serializer_class().Meta.model
+        total, errors = Decimal(0), []
+
+        def valid_transfers():
+            nonlocal total
+            for start, batch in iter_batches(rows, settings.BULK_CREATE_BATCH_SIZE):
+                serializer = self.get_serializer(data=batch, many=True)
+                if not serializer.is_valid():
+                    errors.extend(
+                        {"row": start + index + 1, "errors": row_errors}
+                        for index, row_errors in enumerate(serializer.errors)
+                        if row_errors
+                    )
+                    if len(errors) >= settings.BULK_CREATE_MAX_ERRORS:
+                        return
+                elif not errors:
+                    for attrs in serializer.validated_data:
+                        total += attrs["amount"]
+                        yield model(user=user, **attrs)
+
+        created = model.bulk_create_with_balance(
+            valid_transfers(), settings.BULK_CREATE_BATCH_SIZE
+        )
+        return created, total, errors[: settings.BULK_CREATE_MAX_ERRORS]
+
+
+class ExpenseBulkView(BaseBulkCreateView):
+    serializer_class = ExpenseSerializer
+
+    def check_balance(self, user, total: Decimal):
+        if user.balance - float(total) < 0:
+            return Response(
+                data={
+                    "message": "You don't have enough balance to perform this operation"
+                },
+                status=status.HTTP_405_METHOD_NOT_ALLOWED,
+            )
+        return None
+
+
+class IncomeBulkView(BaseBulkCreateView):
+    serializer_class = IncomeSerializer
+
+
+class StatementImportView(TextUploadMixin, generics.GenericAPIView):
+    """
+    Imports a bank statement into incomes and expenses of the user.
+
+    The statement is uploaded as `file`, with an optional `format` ("csv" or
+    "ofx") that is guessed from the file name by default, or sent as the
+    request body with `Content-Type: text/csv` or `application/x-ofx`, in the
+    encoding given by the `encoding` query parameter (UTF-8 by default). Rows
+    imported before are skipped, so a statement can be imported again safely.
+    """
+
+    default_encoding = "utf-8-sig"
+
+    BODY_FORMATS = {
+        "text/csv": "csv",
+        "application/x-ofx": "ofx",
+        "application/ofx": "ofx",
+    }
+
+    def get_statement(self, request):
+        """
+        Returns (statement file, format) of the request.
+        """
+        body_format = self.BODY_FORMATS.get(request.content_type.split(";")[0].strip())
+        if body_format is not None:
+            return request.stream, body_format
+
+        statement = request.FILES.get("file")
+        if statement is None:
+            return None, None
+        statement_format = request.data.get("format") or statement.name.rsplit(".", 1)[-1]
+        return statement, statement_format.lower()
+
+    def post(self, request, *args, **kwargs):
+        statement, statement_format = self.get_statement(request)
+        if statement is None or statement_format not in STATEMENT_FORMATS:
+            return Response(
+                data={"message": "Expected a CSV or OFX statement."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        encoding = self.get_encoding()
+        if encoding is None:
+            return self.encoding_error_response()
+
+        try:
+            result = import_statement(
+                request.user, self.decode_lines(statement, encoding), statement_format
+            )
+        # Raised out of the import transaction, so nothing was imported
+        except UnicodeDecodeError:
+            return self.encoding_error_response(encoding)
+        except csv.Error as error:
+            return self.csv_error_response(error)
+        return Response(data=result, status=status.HTTP_200_OK)
+
+
 class CategoryView(BaseCRUDView):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
+    pagination_class = CategoryCursorPagination
     
     def post(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
@@ -2,26 +2,66 @@
 Views for handling API requests in the finance tracker application.
 """
 
-import csv
-import openpyxl # type: ignore
+import shutil
+from datetime import date, timedelta
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.shortcuts import get_object_or_404
 from rest_framework import status, generics
 from rest_framework.response import Response
 
-from ..utils import create_report_data, generate_transfers
-from ..models import User, Expense, Income
+from ..utils import (
+    enqueue_report_job,
+    generate_transfers,
+    get_cached_report,
+    get_category_breakdown,
+    stream_cached_report,
+)
+from ..models import User, Expense, Income, ReportJob
+from ..serializers import ReportJobSerializer
+
+STREAM_VALUES = ("1", "true")
+XLSX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+def stream_report(user, report_format: str, content_type: str):
+    """
+    Returns the report of the user as an attachment, from the report cache
+    or streamed while it is generated.
+    """
+    report = stream_cached_report(user, report_format)
+    filename = f"{user.chat_id}-report.{report_format}"
+
+    if hasattr(report, "read"):
+        return FileResponse(
+            report, as_attachment=True, filename=filename, content_type=content_type
+        )
+
+    response = StreamingHttpResponse(report, content_type=content_type)
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
 
 
 class GenerateCSVReportView(generics.RetrieveAPIView):
+    """
+    Generates the CSV report of the user.
+
+    Reports are cached per data version of the user, so a repeated request
+    without changes in between is served from the report cache. With
+    `?stream=true` the report is returned in the response body instead of
+    being copied to the reports folder, streamed while it is generated if it
+    isn't cached.
+    """
+
     def get(self, request, *args, **kwargs):
-        try:
-            csv_titles, csv_rows = create_report_data(request)
+        if request.query_params.get("stream") in STREAM_VALUES:
+            return stream_report(request.user, "csv", "text/csv")
 
-            with open(
-                f"../reports/{request.user.chat_id}-report.csv", "w", newline=""
-            ) as file:
-                writer = csv.writer(file)
-                writer.writerow(csv_titles)
-                writer.writerows(csv_rows)
+        try:
+            shutil.copyfile(
+                get_cached_report(request.user, "csv"),
+                f"../reports/{request.user.chat_id}-report.csv",
+            )
 
             return Response(
                 data={"message": f"{request.user.chat_id}-report.csv"},
@@ -40,27 +80,23 @@ class GenerateCSVReportView(generics.RetrieveAPIView):
 
 
 class GenerateExcelReportView(generics.RetrieveAPIView):
-    def get(self, request, *args, **kwargs):
-
-        try:
-            excel_titles, excel_rows = create_report_data(request)
-
-            # with open(f"../reports/{user.chat_id}-report.excel", "w+", newline="") as file:
-            excel_file = openpyxl.Workbook()
-            excel_file_list = excel_file.active
-
-            excel_file_list.column_dimensions["A"].width = 20  # Дата
-            excel_file_list.column_dimensions["B"].width = 10  # Тип (Expense | Income)
-            excel_file_list.column_dimensions["C"].width = 7  # Сума
-            excel_file_list.column_dimensions["D"].width = 30  # Опис
-            excel_file_list.column_dimensions["E"].width = 20  # Категорія
+    """
+    Generates the Excel report of the user.
 
-            excel_file_list.append(excel_titles)
+    Served from the report cache like the CSV report. With `?stream=true` the
+    workbook is returned in the response body instead of being copied to the
+    reports folder.
+    """
 
-            for row in excel_rows:
-                excel_file_list.append(row)
+    def get(self, request, *args, **kwargs):
+        if request.query_params.get("stream") in STREAM_VALUES:
+            return stream_report(request.user, "xlsx", XLSX_CONTENT_TYPE)
 
-            excel_file.save(f"../reports/{request.user.chat_id}-report.xlsx")
+        try:
+            shutil.copyfile(
+                get_cached_report(request.user, "xlsx"),
+                f"../reports/{request.user.chat_id}-report.xlsx",
+            )
 
             return Response(
                 data={"message": f"{request.user.chat_id}-report.excel"},
@@ -78,6 +114,71 @@ class GenerateExcelReportView(generics.RetrieveAPIView):
             )
 
 
+class ReportJobView(generics.GenericAPIView):
+    """
+    Enqueues report jobs and shows their status.
+
+    POST with `{"format": "csv" | "xlsx"}` enqueues a job for the report
+    worker; GET with the id of the job returns its status, GET without one
+    the jobs of the user, newest first.
+    """
+
+    serializer_class = ReportJobSerializer
+
+    def get_queryset(self):
+        return ReportJob.objects.filter(user=self.request.user)
+
+    def get(self, request, pk=None, *args, **kwargs):
+        if pk is None:
+            jobs = self.get_queryset().order_by("-created")
+            return Response(self.get_serializer(jobs, many=True).data, status=status.HTTP_200_OK)
+
+        job = get_object_or_404(self.get_queryset(), pk=pk)
+        return Response(self.get_serializer(job).data, status=status.HTTP_200_OK)
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        job = enqueue_report_job(request.user, serializer.validated_data["format"])
+        return Response(
+            self.get_serializer(job).data, status=status.HTTP_202_ACCEPTED
+        )
+
+
+class ReportJobDownloadView(generics.GenericAPIView):
+    """
+    Returns the report of a finished report job.
+    """
+
+    def get_queryset(self):
+        return ReportJob.objects.filter(user=self.request.user)
+
+    def get(self, request, pk, *args, **kwargs):
+        job = get_object_or_404(self.get_queryset(), pk=pk)
+
+        if job.status != ReportJob.Status.DONE:
+            return Response(
+                data={"message": f"Report is {job.status}.", "status": job.status},
+                status=status.HTTP_409_CONFLICT,
+            )
+
+        try:
+            report_file = open(job.file_path, "rb")
+        except FileNotFoundError:
+            return Response(
+                data={"message": "Report has expired."}, status=status.HTTP_410_GONE
+            )
+
+        return FileResponse(
+            report_file,
+            as_attachment=True,
+            filename=f"{request.user.chat_id}-report.{job.format}",
+            content_type=(
+                XLSX_CONTENT_TYPE if job.format == ReportJob.Format.XLSX else "text/csv"
+            ),
+        )
+
+
 class WeeklyExpensesView(generics.RetrieveAPIView):
     queryset = Expense.objects.all()
 
@@ -106,3 +207,53 @@ class MonthlyIncomesView(generics.RetrieveAPIView):
         return generate_transfers(request, Income, 30, args, kwargs)
 
 
+class CategoryBreakdownView(generics.RetrieveAPIView):
+    """
+    Breaks the incomes or expenses of the user down by category.
+
+    Query parameters:
+    type -- "expense" (default) or "income"
+    start, end -- inclusive range as YYYY-MM-DD, the last 30 days by default
+
+    Every category is compared with the previous range of the same length.
+    """
+
+    TRANSFER_TYPES = {"expense": Expense, "income": Income}
+    DEFAULT_DAYS = 30
+
+    def get(self, request, *args, **kwargs):
+        transfer_type = self.TRANSFER_TYPES.get(request.query_params.get("type", "expense"))
+        if transfer_type is None:
+            return Response(
+                data={"message": "Type must be expense or income."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            end = self.parse_date("end") or timezone.localdate()
+            start = self.parse_date("start") or end - timedelta(days=self.DEFAULT_DAYS - 1)
+        except ValueError:
+            return Response(
+                data={"message": "Dates must be in the YYYY-MM-DD format."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        if start > end:
+            return Response(
+                data={"message": "Start must not be after end."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            breakdown = get_category_breakdown(request.user, transfer_type, start, end)
+        except OverflowError:
+            return Response(
+                data={"message": "The previous range starts before 01.01.0001."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        return Response(breakdown, status=status.HTTP_200_OK)
+
+    def parse_date(self, name: str):
+        value = self.request.query_params.get(name)
+        return date.fromisoformat(value) if value else None
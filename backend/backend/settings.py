@@ -66,6 +66,8 @@ MIDDLEWARE = [
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "corsheaders.middleware.CorsMiddleware",
+    "api.middleware.MetricsMiddleware",
+    "api.middleware.QueryLoggingMiddleware",
     "api.middleware.ChatIDMiddleware"
 ]
 
@@ -99,6 +101,22 @@ DATABASES = {
     }
 }
 
+# Cache
+# https://docs.djangoproject.com/en/5.0/topics/cache/
+
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv(
+            "CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.getenv("CACHE_LOCATION", "finance-tracker"),
+    }
+}
+
+# Cache used by ChatIDMiddleware to resolve chat ids to users
+CHAT_ID_CACHE_ALIAS = "default"
+CHAT_ID_CACHE_TTL = 300
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
@@ -141,8 +159,43 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 CORS_ALLOW_ALL_ORIGINS = True
 
 REST_FRAMEWORK = {
+    "DEFAULT_PAGINATION_CLASS": "api.pagination.TransferCursorPagination",
+    "PAGE_SIZE": 50,
 }
 
+# Rows validated and inserted at once by the bulk create endpoints, and the
+# number of invalid rows after which a bulk create stops reporting errors
+BULK_CREATE_BATCH_SIZE = 500
+BULK_CREATE_MAX_ERRORS = 100
+
+# Number of rows fetched from the database at once when building reports
+REPORT_CHUNK_SIZE = 2000
+
+# Generated reports are cached on disk per user data version, the least
+# recently used ones are deleted beyond REPORT_CACHE_MAX_SIZE bytes
+REPORT_CACHE_DIRECTORY = reports_directory / "cache"
+REPORT_CACHE_MAX_SIZE = int(os.getenv("REPORT_CACHE_MAX_SIZE", 256 * 1024 * 1024))
+
+# Background report jobs: where finished reports are kept, for how many
+# seconds, after how many seconds a running job is failed as left behind by
+# a stopped worker, and how many processes the report worker runs them in
+REPORT_JOBS_DIRECTORY = reports_directory / "jobs"
+REPORT_JOB_RETENTION = int(os.getenv("REPORT_JOB_RETENTION", 24 * 60 * 60))
+REPORT_JOB_TIMEOUT = int(os.getenv("REPORT_JOB_TIMEOUT", 10 * 60))
+REPORT_WORKER_PROCESSES = int(os.getenv("REPORT_WORKER_PROCESSES", 2))
+REPORT_WORKER_POLL_INTERVAL = 1
+
+# Request, database and report metrics exported at /metrics, to the
+# comma-separated METRICS_ALLOWED_IPS only ("*" allows every address)
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+METRICS_ALLOWED_IPS = [
+    ip.strip() for ip in os.getenv("METRICS_ALLOWED_IPS", "127.0.0.1,::1").split(",") if ip.strip()
+]
+
+# Share of the requests whose number and duration of queries are logged to
+# the api.queries logger, from 0 (off) to 1 (every request)
+QUERY_LOG_SAMPLE_RATE = float(os.getenv("QUERY_LOG_SAMPLE_RATE", 0))
+
 # Logging configuration
 LOGGING = {
     "version": 1,
@@ -181,5 +234,10 @@ LOGGING = {
             "level": "ERROR",
             "propagate": False,
         },
+        "api.queries": {
+            "handlers": ["console"],
+            "level": "INFO",
+            "propagate": False,
+        },
     },
 }
@@ -1,7 +1,10 @@
 from django.contrib import admin
 from django.urls import path, include
 
+from api.views import MetricsView
+
 urlpatterns = [
     path('admin/', admin.site.urls),
-    path("api/", include("api.urls"))
+    path("api/", include("api.urls")),
+    path("metrics", MetricsView.as_view(), name="metrics"),
 ]
@@ -0,0 +1,87 @@
+"""
+Compares rows per second of creating incomes one request at a time with the
+bulk create endpoint, fed a JSON array or a CSV body.
+
+    python -m benchmarks.bulk_create --rows 20000
+
+The requests go through the test client, so the numbers leave out the HTTP
+server and the network, which only widen the gap for per-row requests.
+"""
+
+import argparse
+import json
+import time
+
+from .common import benchmark_database, setup_django
+
+
+def make_rows(count: int) -> list:
+    return [{"amount": "12.34", "description": f"Statement row {index}"} for index in range(count)]
+
+
+def per_row_requests(client, rows):
+    for row in rows:
+        response = client.post("/api/income/", row, format="json")
+        assert response.status_code == 201, response.content
+
+
+def bulk_json(client, rows):
+    response = client.post("/api/income/bulk/", rows, format="json")
+    assert response.status_code == 201, response.content
+
+
+def bulk_csv(client, rows):
+    body = "amount,description\n" + "".join(
+        f"{row['amount']},{row['description']}\n" for row in rows
+    )
+    response = client.post("/api/income/bulk/", body, content_type="text/csv")
+    assert response.status_code == 201, response.content
+
+
+def main(rows: int, per_row_rows: int):
+    setup_django()
+
+    from django.conf import settings
+    from rest_framework.test import APIClient
+    from api.models import User, Income
+
+    settings.ALLOWED_HOSTS = ["*"]
+    variants = (
+        ("per_row_requests", per_row_requests, per_row_rows),
+        ("bulk_json", bulk_json, rows),
+        ("bulk_csv", bulk_csv, rows),
+    )
+
+    results = {}
+    with benchmark_database():
+        user = User.objects.create_user(username="benchmark", chat_id="1", password="benchmark")
+        client = APIClient()
+        client.force_authenticate(user=user)
+
+        for name, create, count in variants:
+            Income.objects.all().delete()
+            started = time.perf_counter()
+            create(client, make_rows(count))
+            elapsed = time.perf_counter() - started
+            assert Income.objects.count() == count
+
+            results[name] = {
+                "rows": count,
+                "seconds": round(elapsed, 3),
+                "rows_per_second": round(count / elapsed),
+            }
+
+    print(json.dumps(results, indent=4))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument(
+        "--per-row-rows",
+        type=int,
+        default=1000,
+        help="Rows created one request at a time, which is much slower.",
+    )
+    args = parser.parse_args()
+    main(args.rows, args.per_row_rows)
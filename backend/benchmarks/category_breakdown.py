@@ -0,0 +1,143 @@
+"""
+Measures the category breakdown on a large history.
+
+    python -m benchmarks.category_breakdown --rows 1000000
+
+The expenses of one user are spread over a year and 20 categories. The
+breakdown read from the daily summaries is compared with grouping the
+expenses themselves, and with summing them in Python.
+"""
+
+import argparse
+import json
+import random
+import time
+from collections import defaultdict
+from datetime import date, datetime, time as day_time, timedelta, timezone
+from decimal import Decimal
+
+from .common import benchmark_database, setup_django
+
+FIRST_DAY = date(2024, 1, 1)
+DAYS = 365
+CATEGORIES = 20
+
+
+def create_expenses(user, categories, count: int, batch_size: int = 10000):
+    from api.models import Expense
+
+    generator = random.Random(42)
+    first_moment = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    # Plain bulk_create, the daily summaries are rebuilt once afterwards
+    for start in range(0, count, batch_size):
+        Expense.objects.bulk_create(
+            Expense(
+                user=user,
+                amount=Decimal(generator.randint(100, 10000)) / 100,
+                description="Benchmark expense",
+                category=generator.choice(categories),
+                created=first_moment + timedelta(seconds=generator.randrange(DAYS * 86400)),
+            )
+            for _ in range(min(batch_size, count - start))
+        )
+
+
+def get_day_start(day: date) -> datetime:
+    return datetime.combine(day, day_time(), tzinfo=timezone.utc)
+
+
+def get_ranges(start: date, end: date):
+    previous_end = start - timedelta(days=1)
+    previous_start = previous_end - (end - start)
+    return ((previous_start, previous_end), (start, end))
+
+
+def grouped_breakdown(user, start: date, end: date) -> list:
+    """
+    The totals grouped by the database from the expenses of the ranges.
+    """
+    from django.db.models import Count, Sum
+    from api.models import Expense
+
+    return [
+        list(
+            Expense.objects.filter(
+                user=user,
+                created__gte=get_day_start(range_start),
+                created__lt=get_day_start(range_end + timedelta(days=1)),
+            )
+            .values("category")
+            .annotate(total=Sum("amount"), count=Count("id"))
+            .order_by()
+        )
+        for range_start, range_end in get_ranges(start, end)
+    ]
+
+
+def python_breakdown(user, start: date, end: date) -> dict:
+    """
+    The same totals summed in Python from the expenses of the ranges.
+    """
+    from api.models import Expense
+
+    totals = defaultdict(lambda: [Decimal(0), 0])
+    for range_start, range_end in get_ranges(start, end):
+        rows = Expense.objects.filter(
+            user=user,
+            created__gte=get_day_start(range_start),
+            created__lt=get_day_start(range_end + timedelta(days=1)),
+        ).values_list("category", "amount")
+        for category, amount in rows.iterator(chunk_size=10000):
+            totals[category][0] += amount
+            totals[category][1] += 1
+    return totals
+
+
+def timed(function, *args, repeat: int = 3) -> float:
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function(*args)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return round(best * 1000, 1)
+
+
+def main(rows: int):
+    setup_django()
+
+    from api.models import User, Category, DailySummary, Expense
+    from api.utils import get_category_breakdown
+
+    results = {"rows": rows}
+    with benchmark_database():
+        user = User.objects.create_user(username="benchmark", chat_id="1", password="benchmark")
+        categories = [
+            Category.objects.create(user=user, name=f"category {index}") for index in range(CATEGORIES)
+        ]
+
+        started = time.perf_counter()
+        create_expenses(user, categories, rows)
+        results["setup_seconds"] = round(time.perf_counter() - started, 1)
+
+        started = time.perf_counter()
+        results["summaries"] = DailySummary.rebuild()
+        results["rebuild_seconds"] = round(time.perf_counter() - started, 1)
+
+        for days in (30, 180):
+            end = FIRST_DAY + timedelta(days=DAYS - 1)
+            start = end - timedelta(days=days - 1)
+            results[f"{days}_days"] = {
+                "summaries_ms": timed(get_category_breakdown, user, Expense, start, end),
+                "grouped_ms": timed(grouped_breakdown, user, start, end),
+                "python_ms": timed(python_breakdown, user, start, end, repeat=1),
+            }
+
+    print(json.dumps(results, indent=4))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1000000)
+    args = parser.parse_args()
+    main(args.rows)
@@ -0,0 +1,68 @@
+"""
+Helpers shared by the benchmark scripts.
+
+The scripts are run from the backend folder, e.g.:
+
+    python -m benchmarks.excel_report --rows 100000
+
+Every run works on a fresh test database, so the development database is
+never touched.
+"""
+
+import os
+import resource
+import sys
+from contextlib import contextmanager
+
+import django
+
+
+def setup_django():
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
+    os.environ.setdefault("SECRET_KEY_DJANGO", "benchmark")
+    django.setup()
+
+
+@contextmanager
+def benchmark_database():
+    """
+    Creates a test database for the duration of the block.
+    """
+    from django.db import connection
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+def peak_rss_mb() -> float:
+    """
+    Returns the peak resident set size of the current process in MB.
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def create_transfers(user, count: int, batch_size: int = 5000):
+    """
+    Inserts `count` incomes and expenses of the user with bulk_create.
+    """
+    from api.models import Income, Expense
+
+    for start in range(0, count, batch_size):
+        size = min(batch_size, count - start)
+        for transfer_type, share in ((Income, size // 2), (Expense, size - size // 2)):
+            transfer_type.objects.bulk_create(
+                transfer_type(
+                    user=user,
+                    amount="12.34",
+                    description=f"Benchmark {transfer_type.__name__.lower()} {index}",
+                )
+                for index in range(share)
+            )
@@ -0,0 +1,174 @@
+"""
+Benchmarks the hot endpoints of the API on synthetic data.
+
+    python -m benchmarks.endpoints --users 10 --transfers 10000 --output results.json
+
+Every scenario is run `--requests` times after a warm-up request and reports
+operations per second, median and 99th percentile latency, queries per
+request and the peak of memory allocated while handling one request. The
+results are printed as JSON and written to `--output`, together with the
+commit and the data sizes, so runs can be compared over time.
+
+The requests go through the test client, so the numbers leave out the HTTP
+server and the network.
+"""
+
+import argparse
+import json
+import platform
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+from .common import benchmark_database, peak_rss_mb, setup_django
+
+
+def get_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def get_scenarios(user):
+    """
+    Returns (name, request) pairs; every request returns the response.
+    """
+    from api.models import User
+
+    def get(url, **params):
+        return lambda client: client.get(url, params)
+
+    def cold_report(url):
+        # A new data version misses the report cache, like the first request
+        # after a write
+        def request(client):
+            User.bump_data_version(user.pk)
+            return client.get(url, {"stream": "true"})
+        return request
+
+    def post_expense(client):
+        return client.post(
+            "/api/expense/", {"amount": "1.00", "description": "Benchmark"}, format="json"
+        )
+
+    return (
+        ("GET /api/expense/", get("/api/expense/")),
+        ("GET /api/expense/?page_size=500", get("/api/expense/", page_size=500)),
+        ("POST /api/expense/", post_expense),
+        ("GET /api/weekly_expenses/", get("/api/weekly_expenses/")),
+        ("GET /api/monthly_expenses/", get("/api/monthly_expenses/")),
+        ("GET /api/weekly_incomes/", get("/api/weekly_incomes/")),
+        ("GET /api/monthly_incomes/", get("/api/monthly_incomes/")),
+        ("GET /api/category_breakdown/", get("/api/category_breakdown/")),
+        ("CSV report, generated", cold_report("/api/generate_csv_report/")),
+        ("CSV report, cached", get("/api/generate_csv_report/", stream="true")),
+        ("XLSX report, generated", cold_report("/api/generate_excel_report/")),
+        ("XLSX report, cached", get("/api/generate_excel_report/", stream="true")),
+    )
+
+
+def consume(response):
+    assert response.status_code < 300, (response.status_code, response.content[:200])
+    if response.streaming:
+        for _ in response.streaming_content:
+            pass
+    response.close()
+
+
+def percentile(values, q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def run_scenario(client, request, requests: int) -> dict:
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    consume(request(client))
+
+    latencies = []
+    queries = 0
+    for _ in range(requests):
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            consume(request(client))
+            latencies.append(time.perf_counter() - started)
+        queries += len(captured)
+
+    # Measured in a separate request, tracing slows the requests down
+    tracemalloc.start()
+    consume(request(client))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    total = sum(latencies)
+    return {
+        "requests": requests,
+        "ops_per_second": round(requests / total, 1),
+        "p50_ms": round(percentile(latencies, 0.5) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        "queries_per_request": round(queries / requests, 1),
+        "peak_memory_mb": round(peak / (1024 * 1024), 2),
+    }
+
+
+def main(users: int, transfers: int, categories: int, requests: int, only: str, output: str):
+    setup_django()
+
+    import django
+    from django.conf import settings
+    from django.test import override_settings
+    from rest_framework.test import APIClient
+    from api.models import User
+    from api.utils import generate_synthetic_data
+
+    settings.ALLOWED_HOSTS = ["*"]
+    results = {
+        "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": get_commit(),
+        "python": platform.python_version(),
+        "django": django.get_version(),
+        "data": {"users": users, "transfers_per_user": transfers, "categories": categories},
+        "scenarios": {},
+    }
+
+    with benchmark_database(), tempfile.TemporaryDirectory() as cache_directory, \
+            override_settings(REPORT_CACHE_DIRECTORY=Path(cache_directory)):
+        started = time.perf_counter()
+        generated = generate_synthetic_data(users, transfers, categories, seed=42)
+        results["data"]["setup_seconds"] = round(time.perf_counter() - started, 1)
+
+        user = User.objects.get(pk=generated["users"][0])
+        client = APIClient()
+        client.force_authenticate(user=user)
+
+        for name, request in get_scenarios(user):
+            if only and only not in name:
+                continue
+            results["scenarios"][name] = run_scenario(client, request, requests)
+
+    results["peak_rss_mb"] = round(peak_rss_mb(), 1)
+
+    text = json.dumps(results, indent=4)
+    print(text)
+    if output:
+        with open(output, "w") as file:
+            file.write(text + "\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--transfers", type=int, default=10000, help="Transfers per user.")
+    parser.add_argument("--categories", type=int, default=10, help="Categories per user.")
+    parser.add_argument("--requests", type=int, default=50, help="Requests per scenario.")
+    parser.add_argument("--only", default="", help="Run the scenarios whose name contains this.")
+    parser.add_argument("--output", help="File the JSON results are written to.")
+    args = parser.parse_args()
+    main(args.users, args.transfers, args.categories, args.requests, args.only, args.output)
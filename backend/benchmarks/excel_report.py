@@ -0,0 +1,101 @@
+"""
+Compares peak memory of the in-memory and the write-only Excel report.
+
+    python -m benchmarks.excel_report --rows 100000
+
+Each variant runs in its own process, so their peak RSS don't mix.
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import time
+from io import BytesIO
+
+from .common import benchmark_database, create_transfers, peak_rss_mb, setup_django
+
+VARIANTS = ("in_memory", "write_only")
+
+
+def in_memory_report(user, file):
+    """
+    The report as it was built before write-only workbooks: the whole history
+    is loaded, sorted and kept as cells of a regular workbook.
+    """
+    import openpyxl
+
+    transfers = sorted(
+        list(user.expense_set.all().order_by("created"))
+        + list(user.income_set.all().order_by("created")),
+        key=lambda transfer: transfer.created,
+    )
+
+    excel_file = openpyxl.Workbook()
+    excel_file_list = excel_file.active
+    excel_file_list.append(["Data", "Type", "Amount", "Description", "Category"])
+    for transfer in transfers:
+        excel_file_list.append([
+            transfer.created.strftime("%d.%m.%Y, %H:%M:%S"),
+            transfer.__class__.__name__,
+            transfer.amount,
+            transfer.description or "-",
+            str(transfer.category or "-"),
+        ])
+    excel_file.save(file)
+
+
+def run_variant(variant: str, rows: int) -> dict:
+    setup_django()
+
+    from api.models import User
+    from api.utils import write_excel_report
+
+    with benchmark_database():
+        user = User.objects.create_user(username="benchmark", chat_id="1", password="benchmark")
+        create_transfers(user, rows)
+
+        setup_rss = peak_rss_mb()
+        started = time.perf_counter()
+
+        report = BytesIO()
+        if variant == "in_memory":
+            in_memory_report(user, report)
+        else:
+            write_excel_report(user, report)
+
+        return {
+            "variant": variant,
+            "rows": rows,
+            "seconds": round(time.perf_counter() - started, 2),
+            "report_mb": round(report.tell() / (1024 * 1024), 2),
+            "setup_peak_rss_mb": round(setup_rss, 1),
+            "peak_rss_mb": round(peak_rss_mb(), 1),
+            "report_rss_mb": round(peak_rss_mb() - setup_rss, 1),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--variant", choices=VARIANTS)
+    args = parser.parse_args()
+
+    if args.variant:
+        print(json.dumps(run_variant(args.variant, args.rows)))
+        return
+
+    results = []
+    for variant in VARIANTS:
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.excel_report",
+             "--variant", variant, "--rows", str(args.rows)],
+            check=True, capture_output=True, text=True,
+        ).stdout
+        results.append(json.loads(output.splitlines()[-1]))
+
+    print(json.dumps(results, indent=4))
+
+
+if __name__ == "__main__":
+    main()
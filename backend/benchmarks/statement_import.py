@@ -0,0 +1,68 @@
+"""
+Imports a synthetic bank statement twice and measures both runs.
+
+    python -m benchmarks.statement_import --rows 50000
+
+The second import finds every row by its fingerprint and creates nothing.
+"""
+
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+from datetime import date, timedelta
+
+from .common import benchmark_database, peak_rss_mb, setup_django
+
+
+def write_statement(path: str, rows: int):
+    generator = random.Random(42)
+    first_day = date(2024, 1, 1)
+    with open(path, "w", newline="") as file:
+        file.write("date,amount,description,category\n")
+        for index in range(rows):
+            day = first_day + timedelta(days=index * 365 // rows)
+            if index % 10 == 0:
+                file.write(f"{day.isoformat()},{generator.randint(500, 3000)}.00,Salary,\n")
+            else:
+                amount = generator.randint(100, 5000) / 100
+                file.write(f"{day.isoformat()},-{amount:.2f},Shop {index % 300},food\n")
+
+
+def main(rows: int):
+    setup_django()
+
+    from api.models import User
+    from api.utils import import_statement
+
+    results = {}
+    with tempfile.TemporaryDirectory() as directory, benchmark_database():
+        path = os.path.join(directory, "statement.csv")
+        write_statement(path, rows)
+        user = User.objects.create_user(username="benchmark", chat_id="1", password="benchmark")
+
+        for run in ("first_import", "reimport"):
+            started = time.perf_counter()
+            with open(path, newline="") as file:
+                result = import_statement(user, file, "csv")
+            elapsed = time.perf_counter() - started
+
+            results[run] = {
+                "rows": rows,
+                "created": result["incomes"] + result["expenses"],
+                "duplicates": result["duplicates"],
+                "seconds": round(elapsed, 3),
+                "rows_per_second": round(rows / elapsed),
+            }
+        results["peak_rss_mb"] = round(peak_rss_mb(), 1)
+
+    print(json.dumps(results, indent=4))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=50000)
+    args = parser.parse_args()
+    main(args.rows)
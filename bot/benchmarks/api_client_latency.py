@@ -0,0 +1,98 @@
+"""
+Compares API request latency of a session per request with the shared
+pooled session of the bot.
+
+    python -m benchmarks.api_client_latency --requests 2000 --concurrency 10
+
+The requests go to a local aiohttp server, so the numbers show the cost of
+connection setup without network latency or TLS handshakes, which make
+the difference bigger against the real backend.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+
+import aiohttp
+from aiohttp import web
+
+os.environ.setdefault("API_TOKEN", "42:benchmark")
+
+from handlers import aio_client  # noqa: E402
+
+
+async def per_request_session(url: str) -> dict:
+    """
+    The request as it was made before the shared session.
+    """
+    async with aiohttp.ClientSession() as session:
+        async with session.request("GET", url) as response:
+            response.raise_for_status()
+            return await response.json()
+
+
+async def ok(request: web.Request) -> web.Response:
+    return web.json_response({"status": "success"})
+
+
+async def measure(request_once, total: int, concurrency: int) -> dict:
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def timed():
+        async with semaphore:
+            started = time.perf_counter()
+            await request_once()
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(timed() for _ in range(total)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": total,
+        "concurrency": concurrency,
+        "requests_per_second": round(total / elapsed),
+        "p50_ms": round(statistics.median(latencies), 3),
+        "p99_ms": round(latencies[int(len(latencies) * 0.99) - 1], 3),
+    }
+
+
+async def main(total: int, concurrency: int):
+    app = web.Application()
+    app.router.add_get("/ping", ok)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+
+    aio_client.API_BASE_URL = f"http://127.0.0.1:{port}"
+    url = f"{aio_client.API_BASE_URL}/ping"
+
+    try:
+        results = {
+            "per_request_session": await measure(
+                lambda: per_request_session(url), total, concurrency
+            ),
+            "shared_session": await measure(
+                lambda: aio_client.api_request_with_retry("GET", "ping"), total, concurrency
+            ),
+        }
+    finally:
+        await aio_client.close_session()
+        await runner.cleanup()
+
+    print(json.dumps(results, indent=4))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=10)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.concurrency))
@@ -0,0 +1,123 @@
+"""
+Posts synthetic message updates to a webhook and measures update throughput.
+
+    python -m benchmarks.webhook_load --updates 2000 --chats 200 --workers 1 8 32
+    python -m benchmarks.webhook_load --url http://127.0.0.1:8080/webhook --secret ...
+
+Without --url, the webhook of the bot runs locally for every worker count with
+a handler that waits --handler-ms like a handler calling the API, and the
+numbers include the time until every update has been processed. With --url,
+the updates go to a running bot and only the acknowledgement is measured.
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import time
+from typing import Optional
+
+import aiohttp
+from aiogram import Bot, Dispatcher
+from aiogram.types import Message
+from aiohttp import web
+
+os.environ.setdefault("API_TOKEN", "42:benchmark")
+
+from webhook import SECRET_TOKEN_HEADER, UpdateWorkerPool, create_app  # noqa: E402
+
+update_ids = itertools.count(1)
+
+
+def make_update(chat_id: int) -> dict:
+    update_id = next(update_ids)
+    user = {"id": chat_id, "is_bot": False, "first_name": "Load", "username": f"load_{chat_id}"}
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "from": user,
+            "text": f"{update_id} Lunch",
+        },
+    }
+
+
+async def post_updates(
+    url: str, total: int, chats: int, concurrency: int, secret: Optional[str]
+) -> float:
+    headers = {SECRET_TOKEN_HEADER: secret} if secret else {}
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async with aiohttp.ClientSession(headers=headers) as session:
+
+        async def post(index: int):
+            async with semaphore:
+                async with session.post(url, json=make_update(index % chats + 1)) as response:
+                    response.raise_for_status()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(post(index) for index in range(total)))
+        return time.perf_counter() - started
+
+
+async def run_local(workers: int, total: int, chats: int, concurrency: int, handler_ms: float):
+    dispatcher = Dispatcher()
+    processed = 0
+
+    @dispatcher.message()
+    async def handle(message: Message):
+        nonlocal processed
+        await asyncio.sleep(handler_ms / 1000)
+        processed += 1
+
+    bot = Bot("42:benchmark")
+    pool = UpdateWorkerPool(dispatcher, bot, workers, queue_size=100)
+    runner = web.AppRunner(create_app(pool, "/webhook"), access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+
+    started = time.perf_counter()
+    try:
+        await post_updates(f"http://127.0.0.1:{port}/webhook", total, chats, concurrency, None)
+    finally:
+        # Waits for the queued updates to be processed
+        await runner.cleanup()
+        await bot.session.close()
+    elapsed = time.perf_counter() - started
+
+    return {
+        "workers": workers,
+        "updates": processed,
+        "updates_per_second": round(processed / elapsed),
+    }
+
+
+async def main(args):
+    if args.url:
+        elapsed = await post_updates(
+            args.url, args.updates, args.chats, args.concurrency, args.secret
+        )
+        results = {"updates": args.updates, "updates_per_second": round(args.updates / elapsed)}
+    else:
+        results = [
+            await run_local(workers, args.updates, args.chats, args.concurrency, args.handler_ms)
+            for workers in args.workers
+        ]
+    print(json.dumps(results, indent=4))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--updates", type=int, default=2000)
+    parser.add_argument("--chats", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--handler-ms", type=float, default=20)
+    parser.add_argument("--url")
+    parser.add_argument("--secret")
+    asyncio.run(main(parser.parse_args()))
@@ -1,6 +1,7 @@
 import logging
 import os
 from aiogram import Bot, Dispatcher, Router
+from aiogram.fsm.storage.base import BaseStorage
 from aiogram.fsm.storage.memory import MemoryStorage
 from aiogram.types import Update
 from aiogram import BaseMiddleware
@@ -9,6 +10,7 @@ from aiogram.enums import ParseMode
 from aiogram.client.bot import DefaultBotProperties
 from aiogram.fsm.state import State, StatesGroup
 from pathlib import Path
+from metrics import MetricsMiddleware
 
 load_dotenv()
 
@@ -49,19 +51,113 @@ class LoggingMiddleware(BaseMiddleware):
         return await handler(event, data)
 
 
+# "polling" pulls updates from Telegram, "webhook" serves WEBHOOK_PATH and
+# lets Telegram push them to WEBHOOK_URL
+BOT_MODE = os.getenv("BOT_MODE", "polling")
+WEBHOOK_URL = os.getenv("WEBHOOK_URL", "")
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "/webhook")
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET") or None
+WEBHOOK_HOST = os.getenv("WEBHOOK_HOST", "0.0.0.0")
+WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", 8080))
+# Updates are processed by this many workers, each keeping the order of its chats
+WEBHOOK_WORKERS = int(os.getenv("WEBHOOK_WORKERS", 32))
+WEBHOOK_QUEUE_SIZE = int(os.getenv("WEBHOOK_QUEUE_SIZE", 100))
+
+# The webhook server exports the metrics at METRICS_PATH; a summary of them
+# is logged every METRICS_LOG_INTERVAL seconds, 0 turns the log off
+METRICS_PATH = os.getenv("METRICS_PATH", "/metrics")
+METRICS_LOG_INTERVAL = float(os.getenv("METRICS_LOG_INTERVAL", 300))
+
+# Where the FSM keeps conversation state. "memory" pins it to one process,
+# "redis" shares it between all bot workers.
+FSM_STORAGE = os.getenv("FSM_STORAGE", "memory")
+FSM_REDIS_URL = os.getenv("FSM_REDIS_URL", "redis://localhost:6379/0")
+FSM_STATE_TTL = int(os.getenv("FSM_STATE_TTL", 24 * 60 * 60))
+
+
+def create_storage(backend: str = FSM_STORAGE, redis_url: str = FSM_REDIS_URL) -> BaseStorage:
+    """
+    Creates the FSM storage of the dispatcher.
+
+    Args:
+        backend (str): "memory" or "redis".
+        redis_url (str): URL of the Redis server for the "redis" backend.
+
+    Returns:
+        BaseStorage: The storage.
+
+    Raises:
+        RuntimeError: If Redis was asked for but isn't installed; falling back
+            to memory would split the state between the bot workers.
+    """
+    if backend == "memory":
+        return MemoryStorage()
+    if backend != "redis":
+        raise ValueError(f"Unknown FSM storage: {backend}")
+
+    try:
+        from aiogram.fsm.storage.redis import DefaultKeyBuilder, RedisStorage
+    except ImportError as error:
+        raise RuntimeError("FSM_STORAGE is redis, but redis is not installed") from error
+
+    return RedisStorage.from_url(
+        redis_url,
+        key_builder=DefaultKeyBuilder(with_bot_id=True),
+        state_ttl=FSM_STATE_TTL,
+        data_ttl=FSM_STATE_TTL,
+    )
+
+
+async def check_storage(storage: BaseStorage) -> None:
+    """
+    Checks that the Redis server of a Redis storage can be reached, so the bot
+    fails at startup instead of on the first update.
+
+    Raises:
+        RuntimeError: If the server can't be reached.
+    """
+    redis = getattr(storage, "redis", None)
+    if redis is None:
+        return
+    try:
+        await redis.ping()
+    except Exception as error:
+        raise RuntimeError(f"Can't reach the Redis server of the FSM storage: {error}") from error
+
+
 bot = Bot(
     token=os.getenv("API_TOKEN"),
     default=DefaultBotProperties(parse_mode=ParseMode.HTML),
 )
-storage = MemoryStorage()
+storage = create_storage()
 dp = Dispatcher(storage=storage)
 dp.update.middleware(LoggingMiddleware())
+dp.update.middleware(MetricsMiddleware())
 router = Router()
 API_BASE_URL = "https://127.0.0.1:8000/api/"
 API_ENDPOINT_EXPENSE = "expense/"
 API_ENDPOINT_INCOME = "income/"
 MAX_AMOUNT = 10000000
 
+# Connection pool of the shared API session
+API_POOL_LIMIT = int(os.getenv("API_POOL_LIMIT", 100))
+API_KEEPALIVE_TIMEOUT = float(os.getenv("API_KEEPALIVE_TIMEOUT", 30))
+API_DNS_CACHE_TTL = int(os.getenv("API_DNS_CACHE_TTL", 300))
+
+# Threads running the blocking database queries of the validators
+DB_EXECUTOR_WORKERS = int(os.getenv("DB_EXECUTOR_WORKERS", 8))
+
+# Reports are generated by the backend in the background; the bot checks the
+# job every REPORT_POLL_INTERVAL seconds and gives up after REPORT_POLL_TIMEOUT
+REPORT_POLL_INTERVAL = float(os.getenv("REPORT_POLL_INTERVAL", 1))
+REPORT_POLL_TIMEOUT = float(os.getenv("REPORT_POLL_TIMEOUT", 120))
+
+# In-process cache of registered users. Unknown users are cached shortly,
+# so a user who has just registered is recognized soon.
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", 10000))
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", 300))
+USER_CACHE_NEGATIVE_TTL = float(os.getenv("USER_CACHE_NEGATIVE_TTL", 10))
+
 
 class Expense(StatesGroup):
     waiting_for_expense_details = State()
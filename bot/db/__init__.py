@@ -1 +1 @@
-from .models import User, Finance, db_session
\ No newline at end of file
+from .models import User, Finance, Session, db_session
@@ -5,15 +5,60 @@ This module handles the API requests for the Telegram bot.
 import aiohttp
 import logging
 import asyncio
-from typing import Dict, Any, Optional
-from config import API_BASE_URL
+import time
+from typing import Dict, Any, Optional, Set
+from aiogram.types import BufferedInputFile
+from config import (
+    API_BASE_URL,
+    API_POOL_LIMIT,
+    API_KEEPALIVE_TIMEOUT,
+    API_DNS_CACHE_TTL,
+    REPORT_POLL_INTERVAL,
+    REPORT_POLL_TIMEOUT,
+)
 from keyboards import (
     get_start_keyboard,
     get_back_to_start_keyboard,
 )
+from metrics import bot_metrics
 
 logging.basicConfig(level=logging.INFO)
 
+_session: Optional[aiohttp.ClientSession] = None
+# Reports being waited for in the background, referenced until they finish
+_report_tasks: Set[asyncio.Task] = set()
+
+
+async def open_session() -> aiohttp.ClientSession:
+    """
+    Opens the session shared by all API requests, if it isn't open yet.
+
+    The session keeps a pool of keep-alive connections to the API and caches
+    DNS lookups, so requests don't pay for connection setup every time.
+
+    Returns:
+        aiohttp.ClientSession: The shared session.
+    """
+    global _session
+    if _session is None or _session.closed:
+        connector = aiohttp.TCPConnector(
+            limit=API_POOL_LIMIT,
+            keepalive_timeout=API_KEEPALIVE_TIMEOUT,
+            ttl_dns_cache=API_DNS_CACHE_TTL,
+        )
+        _session = aiohttp.ClientSession(connector=connector)
+    return _session
+
+
+async def close_session() -> None:
+    """
+    Closes the shared session and its pooled connections.
+    """
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
+
 
 async def api_request_with_retry(
     method: str,
@@ -41,19 +86,26 @@ async def api_request_with_retry(
         Exception: Raises an exception for HTTP errors or connection issues.
     """
     url = f"{API_BASE_URL}/{endpoint}"
+    session = await open_session()
+    started = time.perf_counter()
     for attempt in range(retries):
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.request(
-                    method, url, params=params, json=json, headers=headers
-                ) as response:
-                    response.raise_for_status()
-                    return await response.json()
+            async with session.request(
+                method, url, params=params, json=json, headers=headers
+            ) as response:
+                response.raise_for_status()
+                result = await response.json()
         except aiohttp.ClientError as e:
             logging.error(f"Network error on attempt {attempt + 1}: {str(e)}")
             if attempt == retries - 1:
+                bot_metrics.observe_api_call(
+                    method, endpoint, time.perf_counter() - started, attempt, error=True
+                )
                 raise Exception(f"Network error after {retries} attempts: {str(e)}")
             await asyncio.sleep(2**attempt)
+        else:
+            bot_metrics.observe_api_call(method, endpoint, time.perf_counter() - started, attempt)
+            return result
 
 
 async def handle_api_request(
@@ -93,41 +145,152 @@ async def handle_api_request(
         )
 
 
-async def generate_csv_report(chat_id: str, msg: Any) -> None:
+async def api_download(endpoint: str, params: Optional[Dict[str, Any]] = None) -> bytes:
+    """
+    Downloads a file from the API.
+
+    Args:
+        endpoint (str): API endpoint returning the file.
+        params (dict, optional): Query parameters for the API request.
+
+    Returns:
+        bytes: Content of the file.
+    """
+    session = await open_session()
+    started = time.perf_counter()
+    error = True
+    try:
+        async with session.get(f"{API_BASE_URL}/{endpoint}", params=params) as response:
+            response.raise_for_status()
+            content = await response.read()
+        error = False
+        return content
+    finally:
+        bot_metrics.observe_api_call("GET", endpoint, time.perf_counter() - started, error=error)
+
+
+async def wait_for_report(chat_id: str, report_format: str) -> bytes:
+    """
+    Enqueues a report job in the API and polls it until the report is ready.
+
+    Args:
+        chat_id (str): User's chat ID to include in the requests.
+        report_format (str): "csv" or "xlsx".
+
+    Returns:
+        bytes: Content of the report.
+
+    Raises:
+        Exception: Raises an exception if the job failed or took too long.
+    """
+    params = {"chat_id": chat_id}
+    job = await api_request_with_retry(
+        "POST", "report_jobs/", params=params, json={"format": report_format}
+    )
+
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + REPORT_POLL_TIMEOUT
+    while job["status"] in ("pending", "running"):
+        if loop.time() >= deadline:
+            raise Exception("Report is taking too long")
+        await asyncio.sleep(REPORT_POLL_INTERVAL)
+        job = await api_request_with_retry("GET", f"report_jobs/{job['id']}/", params=params)
+
+    if job["status"] != "done":
+        raise Exception(job.get("error") or "Report generation failed")
+
+    return await api_download(f"report_jobs/{job['id']}/download/", params=params)
+
+
+async def send_report(
+    chat_id: str, report_format: str, msg: Any, success_message: str, error_message: str
+) -> None:
+    """
+    Waits for the report of the user and sends it as a document.
+
+    Args:
+        chat_id (str): User's chat ID to include in the requests.
+        report_format (str): "csv" or "xlsx".
+        msg (Any): Message object to respond to the user.
+        success_message (str): Message to send with the report.
+        error_message (str): Message to send if the report couldn't be generated.
+    """
+    try:
+        report = await wait_for_report(chat_id, report_format)
+        await msg.answer_document(
+            BufferedInputFile(report, filename=f"report.{report_format}")
+        )
+        await msg.answer(success_message, reply_markup=get_start_keyboard())
+    except Exception as e:
+        await msg.answer(
+            f"{error_message}\nError: {str(e)}", reply_markup=get_start_keyboard()
+        )
+
+
+def start_report(
+    chat_id: str, report_format: str, msg: Any, success_message: str, error_message: str
+) -> asyncio.Task:
     """
-    Requests a CSV report from the API and sends the file name to the user.
+    Sends the report of the user in a background task, so the handler
+    returns right away instead of holding its update worker while the report
+    is generated.
+
+    Returns:
+        asyncio.Task: The task sending the report.
+    """
+    task = asyncio.create_task(
+        send_report(chat_id, report_format, msg, success_message, error_message)
+    )
+    _report_tasks.add(task)
+    task.add_done_callback(_report_tasks.discard)
+    return task
+
+
+def cancel_report_tasks() -> None:
+    """
+    Cancels the reports still being waited for, on shutdown.
+    """
+    for task in list(_report_tasks):
+        task.cancel()
+
+
+def generate_csv_report(chat_id: str, msg: Any) -> asyncio.Task:
+    """
+    Requests a CSV report from the API and sends it to the user in the
+    background.
 
     Args:
         chat_id (str): User's chat ID to include in the request.
         msg (Any): Message object to respond to the user.
+
+    Returns:
+        asyncio.Task: The task sending the report.
     """
-    params = {"chat_id": chat_id}
-    await handle_api_request(
-        "GET",
-        params,
-        "generate_csv_report",
-        None,
-        "CSV report generated successfully.",
-        "Failed to generate CSV report.",
+    return start_report(
+        chat_id,
+        "csv",
         msg,
+        "Here is your report.",
+        "Failed to generate report. Please try again later.",
     )
 
 
-async def generate_excel_report(chat_id: str, msg: Any) -> None:
+def generate_excel_report(chat_id: str, msg: Any) -> asyncio.Task:
     """
-    Requests an Excel report from the API and sends the file name to the user.
+    Requests an Excel report from the API and sends it to the user in the
+    background.
 
     Args:
         chat_id (str): User's chat ID to include in the request.
         msg (Any): Message object to respond to the user.
+
+    Returns:
+        asyncio.Task: The task sending the report.
     """
-    params = {"chat_id": chat_id}
-    await handle_api_request(
-        "GET",
-        params,
-        "generate_excel_report",
-        None,
-        "Excel report generated successfully.",
-        "Failed to generate Excel report.",
+    return start_report(
+        chat_id,
+        "xlsx",
         msg,
+        "Here is your Excel report.",
+        "Failed to generate Excel report. Please try again later.",
     )
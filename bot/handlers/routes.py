@@ -2,7 +2,6 @@
 This module handles the routes  the Telegram bot.
 """
 
-import os
 from aiogram import F
 from aiogram.fsm.context import FSMContext
 from aiogram.types import Message, CallbackQuery
@@ -25,9 +24,8 @@ from config import (
 from .validators import (
     validate_amount_description,
     validate_user_exists,
-    validate_expense_id,
-    validate_income_id,
     validate_message_not_empty,
+    load_validation_context,
 )
 from .aio_client import handle_api_request, generate_csv_report, generate_excel_report
 
@@ -71,51 +69,22 @@ async def report(callback: CallbackQuery, state: FSMContext):
     )
 
 
-async def send_report(
-    callback: CallbackQuery, file_path: str, success_message: str, failure_message: str
-):
-    """
-    Sends the report file to the user and handles file cleanup.
-    """
-    try:
-        with open(file_path, "rb") as file:
-            await callback.message.answer_document(file)
-        os.remove(file_path)
-        await callback.message.answer(
-            success_message, reply_markup=get_start_keyboard()
-        )
-    except Exception as e:
-        await callback.message.answer(
-            f"{failure_message}\nError: {str(e)}", reply_markup=get_start_keyboard()
-        )
-
-
 @dp.callback_query(F.data == "get_report")
 async def get_report(callback: CallbackQuery, state: FSMContext):
     """
-    Generates and sends the CSV report to the user.
+    Generates and sends the CSV report to the user, in the background.
     """
-    file_path = generate_csv_report()
-    await send_report(
-        callback,
-        file_path,
-        "Here is your report.",
-        "Failed to generate report. Please try again later.",
-    )
+    await callback.message.answer("Generating your report...")
+    generate_csv_report(callback.from_user.id, callback.message)
 
 
 @dp.callback_query(F.data == "generate_excel_report")
 async def generate_excel(callback: CallbackQuery, state: FSMContext):
     """
-    Generates and sends the Excel report to the user.
+    Generates and sends the Excel report to the user, in the background.
     """
-    file_path = generate_excel_report()
-    await send_report(
-        callback,
-        file_path,
-        "Here is your Excel report.",
-        "Failed to generate Excel report. Please try again later.",
-    )
+    await callback.message.answer("Generating your Excel report...")
+    generate_excel_report(callback.from_user.id, callback.message)
 
 
 @dp.callback_query(F.data == "view_expenses")
@@ -223,15 +192,16 @@ async def process_expense_update_details(msg: Message, state: FSMContext):
             reply_markup=get_back_to_start_keyboard(),
         )
 
-    is_valid_id = await validate_expense_id(expense_id)
-    if not is_valid_id:
+    context = await load_validation_context(
+        msg.from_user.username, "expenses", expense_id
+    )
+    if not context.record_exists:
         return await msg.answer(
             "Expense ID not found. Please check and try again.",
             reply_markup=get_back_to_start_keyboard(),
         )
 
-    user_exists = await validate_user_exists(msg.from_user.username)
-    if user_exists:
+    if context.user_exists:
         payload = {"amount": amount, "description": description}
         await handle_api_request(
             "PUT",
@@ -274,15 +244,16 @@ async def process_delete_expense(msg: Message, state: FSMContext):
         )
 
     expense_id = msg.text.strip()
-    is_valid_id = await validate_expense_id(expense_id)
-    if not is_valid_id:
+    context = await load_validation_context(
+        msg.from_user.username, "expenses", expense_id
+    )
+    if not context.record_exists:
         return await msg.answer(
             "Expense ID not found. Please check and try again.",
             reply_markup=get_back_to_start_keyboard(),
         )
 
-    user_exists = await validate_user_exists(msg.from_user.username)
-    if user_exists:
+    if context.user_exists:
         await handle_api_request(
             "DELETE",
             f"{API_ENDPOINT_EXPENSE}{expense_id}/",
@@ -404,15 +375,16 @@ async def process_income_update_details(msg: Message, state: FSMContext):
             reply_markup=get_back_to_start_keyboard(),
         )
 
-    is_valid_id = await validate_income_id(income_id)
-    if not is_valid_id:
+    context = await load_validation_context(
+        msg.from_user.username, "incomes", income_id
+    )
+    if not context.record_exists:
         return await msg.answer(
             "Income ID not found. Please check and try again.",
             reply_markup=get_back_to_start_keyboard(),
         )
 
-    user_exists = await validate_user_exists(msg.from_user.username)
-    if user_exists:
+    if context.user_exists:
         payload = {"amount": amount, "description": description}
         await handle_api_request(
             "PUT",
@@ -455,15 +427,16 @@ async def process_delete_income(msg: Message, state: FSMContext):
         )
 
     income_id = msg.text.strip()
-    is_valid_id = await validate_income_id(income_id)
-    if not is_valid_id:
+    context = await load_validation_context(
+        msg.from_user.username, "incomes", income_id
+    )
+    if not context.record_exists:
         return await msg.answer(
             "Income ID not found. Please check and try again.",
             reply_markup=get_back_to_start_keyboard(),
         )
 
-    user_exists = await validate_user_exists(msg.from_user.username)
-    if user_exists:
+    if context.user_exists:
         await handle_api_request(
             "DELETE",
             f"{API_ENDPOINT_INCOME}{income_id}/",
@@ -2,82 +2,224 @@
 This module contains validation functions for the finance tracker bot.
 """
 
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Optional
 from sqlalchemy.sql import text
-from db import db_session
+from config import (
+    DB_EXECUTOR_WORKERS,
+    USER_CACHE_SIZE,
+    USER_CACHE_TTL,
+    USER_CACHE_NEGATIVE_TTL,
+)
+from db import Session
+from utils import AsyncTTLCache
+
+# SQLAlchemy sessions are synchronous, so queries run on a bounded pool of
+# threads instead of blocking the event loop for every other chat.
+db_executor = ThreadPoolExecutor(
+    max_workers=DB_EXECUTOR_WORKERS, thread_name_prefix="bot-db"
+)
+
+
+def fetch_exists(query: str, params: dict) -> bool:
+    """
+    Runs the query in a new session and checks if it returned any row.
 
+    Args:
+        query (str): SQL query to execute.
+        params (dict): Parameters of the query.
 
-async def validate_amount_description(text: str):
+    Returns:
+        bool: True if the query returned a row, False otherwise.
     """
-    Validates if the given text contains both amount and description.
+    with Session() as session:
+        result = session.execute(text(query), params)
+        return result.scalar() is not None
+
+
+async def run_in_db_executor(func, *args):
+    """
+    Runs a blocking database function on the database thread pool.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(db_executor, func, *args)
+
+
+# Whether a username belongs to a registered user, so hot users don't hit the
+# database on every message.
+user_exists_cache = AsyncTTLCache(maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_TTL)
+
+
+def get_user_cache_ttl(user_exists: bool) -> float:
+    return USER_CACHE_TTL if user_exists else USER_CACHE_NEGATIVE_TTL
+
+
+def forget_user(username: str) -> None:
+    """
+    Drops the cached existence of the user, e.g. after registration.
 
     Args:
-        text (str): Input string with amount and description.
+        username (str): The username to forget.
+    """
+    user_exists_cache.invalidate(username)
 
-    Returns:
-        tuple: (amount, description) if valid, else (None, error message).
+
+RECORD_TABLES = ("expenses", "incomes")
+
+
+@dataclass(frozen=True)
+class ValidationContext:
     """
-    parts = text.split(" ", 1)
-    if len(parts) != 2:
-        return None, "Invalid format. Please provide both amount and description."
+    Everything a handler needs to know from the database about an update.
 
-    amount_str, description = parts
-    try:
-        amount = float(amount_str)
-        return amount, description
-    except ValueError:
-        return None, "Invalid amount. Please enter a numeric value."
+    Attributes:
+        user_exists (bool): Whether the sender is a registered user.
+        record_exists (bool, optional): Whether the record the message refers
+            to exists, None if the message doesn't refer to a record.
+    """
 
+    user_exists: bool
+    record_exists: Optional[bool] = None
 
-async def validate_user_exists(username: str):
+
+def check_record_table(record_table: str) -> None:
+    # The table name is interpolated into the query, so only known ones pass
+    if record_table not in RECORD_TABLES:
+        raise ValueError(f"Unknown record table: {record_table}")
+
+
+def fetch_record_exists(record_table: str, record_id: str) -> bool:
     """
-    Validates if the user exists in the database.
+    Checks if the record exists in the table.
+
+    Args:
+        record_table (str): Table of the record.
+        record_id (str): ID of the record.
+
+    Returns:
+        bool: True if the record exists, False otherwise.
+    """
+    check_record_table(record_table)
+    return fetch_exists(f"SELECT * FROM {record_table} WHERE id = :id", {"id": record_id})
+
+
+def fetch_validation_context(
+    username: str, record_table: Optional[str] = None, record_id: Optional[str] = None
+) -> ValidationContext:
+    """
+    Checks the user and the referenced record with a single query.
 
     Args:
         username (str): The username to check.
+        record_table (str, optional): Table of the referenced record.
+        record_id (str, optional): ID of the referenced record.
 
     Returns:
-        bool: True if the user exists, False otherwise.
+        ValidationContext: The results of both checks.
     """
-    with db_session as session:
-        result =  session.execute(
-            text("SELECT * FROM users WHERE username = :username"),
-            {"username": username},
+    if record_table is None:
+        return ValidationContext(
+            user_exists=fetch_exists(
+                "SELECT * FROM users WHERE username = :username",
+                {"username": username},
+            )
         )
-        return result.scalar() is not None
+
+    check_record_table(record_table)
+
+    with Session() as session:
+        user_exists, record_exists = session.execute(
+            text(
+                "SELECT EXISTS(SELECT 1 FROM users WHERE username = :username), "
+                f"EXISTS(SELECT 1 FROM {record_table} WHERE id = :id)"
+            ),
+            {"username": username, "id": record_id},
+        ).one()
+    return ValidationContext(bool(user_exists), bool(record_exists))
 
 
-async def validate_expense_id(expense_id: str):
+async def load_validation_context(
+    username: str, record_table: Optional[str] = None, record_id: Optional[str] = None
+) -> ValidationContext:
     """
-    Validates if the expense ID exists in the database.
+    Resolves the validation context of an update in one database round-trip.
 
     Args:
-        expense_id (str): The expense ID to check.
+        username (str): The username of the sender.
+        record_table (str, optional): Table of the record the message refers to.
+        record_id (str, optional): ID of the record the message refers to.
 
     Returns:
-        bool: True if the expense ID exists, False otherwise.
+        ValidationContext: The user and record checks of the update.
     """
-    with db_session as session:
-        result =  session.execute(
-            text("SELECT * FROM expenses WHERE id = :id"), {"id": expense_id}
+    loaded_context = None
+
+    async def load_user_exists() -> bool:
+        # The record is checked in the same query as the missing user
+        nonlocal loaded_context
+        loaded_context = await run_in_db_executor(
+            fetch_validation_context, username, record_table, record_id
         )
-        return result.scalar() is not None
+        return loaded_context.user_exists
 
+    user_exists = await user_exists_cache.get_or_load(
+        username, load_user_exists, ttl_for=get_user_cache_ttl
+    )
+    if loaded_context is not None:
+        return loaded_context
 
-async def validate_income_id(income_id: str):
+    # The user was cached or loaded by a concurrent update
+    if record_table is None:
+        return ValidationContext(user_exists)
+    return ValidationContext(
+        user_exists,
+        await run_in_db_executor(fetch_record_exists, record_table, record_id),
+    )
+
+
+async def validate_amount_description(text: str):
     """
-    Validates if the income ID exists in the database.
+    Validates if the given text contains both amount and description.
 
     Args:
-        income_id (str): The income ID to check.
+        text (str): Input string with amount and description.
 
     Returns:
-        bool: True if the income ID exists, False otherwise.
+        tuple: (amount, description) if valid, else (None, error message).
     """
-    with db_session as session:
-        result =  session.execute(
-            text("SELECT * FROM incomes WHERE id = :id"), {"id": income_id}
-        )
-        return result.scalar() is not None
+    parts = text.split(" ", 1)
+    if len(parts) != 2:
+        return None, "Invalid format. Please provide both amount and description."
+
+    amount_str, description = parts
+    try:
+        amount = float(amount_str)
+        return amount, description
+    except ValueError:
+        return None, "Invalid amount. Please enter a numeric value."
+
+
+async def validate_user_exists(username: str):
+    """
+    Validates if the user exists in the database.
+
+    Args:
+        username (str): The username to check.
+
+    Returns:
+        bool: True if the user exists, False otherwise.
+    """
+    return await user_exists_cache.get_or_load(
+        username,
+        lambda: run_in_db_executor(
+            fetch_exists,
+            "SELECT * FROM users WHERE username = :username",
+            {"username": username},
+        ),
+        ttl_for=get_user_cache_ttl,
+    )
 
 
 async def validate_message_not_empty(message: str):
@@ -1,5 +1,24 @@
 import logging, asyncio, sys, handlers
-from config import dp, bot
+from aiohttp import web
+from config import (
+    dp,
+    bot,
+    check_storage,
+    BOT_MODE,
+    WEBHOOK_URL,
+    WEBHOOK_PATH,
+    WEBHOOK_SECRET,
+    WEBHOOK_HOST,
+    WEBHOOK_PORT,
+    WEBHOOK_WORKERS,
+    WEBHOOK_QUEUE_SIZE,
+    METRICS_PATH,
+    METRICS_LOG_INTERVAL,
+)
+from handlers.aio_client import open_session, close_session, cancel_report_tasks
+from handlers.validators import db_executor
+from metrics import start_metrics_log
+from webhook import UpdateWorkerPool, create_app
 
 
 @dp.startup()
@@ -7,6 +26,9 @@ async def on_startup(dispatcher):
     """
     Called on bot startup. Initializes necessary components and logs the startup.
     """
+    await check_storage(dispatcher.storage)
+    await open_session()
+    dispatcher["metrics_log"] = start_metrics_log(METRICS_LOG_INTERVAL)
     logging.info("Bot has started")
 
 
@@ -15,14 +37,46 @@ async def on_shutdown(dispatcher):
     """
     Called on bot shutdown. Cleans up resources and logs the shutdown.
     """
+    if dispatcher.get("metrics_log"):
+        dispatcher["metrics_log"].cancel()
+    cancel_report_tasks()
+    await close_session()
+    db_executor.shutdown(wait=False)
     logging.info("Bot has stopped")
 
 
+async def run_webhook():
+    """
+    Serves the webhook and registers it with Telegram.
+    """
+    pool = UpdateWorkerPool(dp, bot, WEBHOOK_WORKERS, WEBHOOK_QUEUE_SIZE)
+    runner = web.AppRunner(create_app(pool, WEBHOOK_PATH, WEBHOOK_SECRET, METRICS_PATH))
+    await runner.setup()
+    await dp.emit_startup(bot=bot, bots=[bot], dispatcher=dp)
+
+    try:
+        await web.TCPSite(runner, WEBHOOK_HOST, WEBHOOK_PORT).start()
+        await bot.set_webhook(
+            f"{WEBHOOK_URL}{WEBHOOK_PATH}",
+            secret_token=WEBHOOK_SECRET,
+            allowed_updates=dp.resolve_used_update_types(),
+        )
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+        await dp.emit_shutdown(bot=bot, bots=[bot], dispatcher=dp)
+        await dp.storage.close()
+        await bot.session.close()
+
+
 async def main():
     """
-    Main entry point for the bot. Starts polling for updates.
+    Main entry point for the bot. Starts polling for updates or serves the webhook.
     """
-    await dp.start_polling(bot)
+    if BOT_MODE == "webhook":
+        await run_webhook()
+    else:
+        await dp.start_polling(bot)
 
 
 if __name__ == "__main__":
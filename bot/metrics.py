@@ -0,0 +1,229 @@
+"""
+Latency and throughput metrics of the bot.
+
+Handlers are keyed by the callback data or FSM state they handle, backend
+API calls by method and endpoint. The metrics are exported by the webhook
+server and logged as a periodic summary.
+"""
+
+import asyncio
+import logging
+import re
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+from aiogram import BaseMiddleware
+from aiogram.types import Update
+
+logger = logging.getLogger("aiogram")
+
+# Ids in API endpoints, replaced so every job or transfer shares one key
+ENDPOINT_ID = re.compile(r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}|\d+")
+QUANTILES = (0.5, 0.95, 0.99)
+# Commands registered in handlers.routes; the text of a message is user
+# input, so any other command shares one key
+COMMANDS = frozenset({"/start"})
+UNKNOWN_COMMAND = "command:unknown"
+# Keys kept per kind of metric, further keys share OTHER_KEY
+MAX_KEYS = 200
+OTHER_KEY = "other"
+
+
+def escape_label(value: str) -> str:
+    """
+    Escapes a label value for the Prometheus text format.
+    """
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class LatencyStats:
+    """
+    Count, errors and total duration of an operation, with the durations of
+    the last `window` calls for quantiles.
+    """
+
+    def __init__(self, window: int = 1000):
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.samples = deque(maxlen=window)
+
+    def observe(self, seconds: float, error: bool = False) -> None:
+        self.count += 1
+        self.errors += error
+        self.total += seconds
+        self.samples.append(seconds)
+
+    def quantile(self, q: float) -> float:
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "avg_ms": round(self.total / self.count * 1000, 1) if self.count else 0.0,
+            **{
+                f"p{round(q * 100)}_ms": round(self.quantile(q) * 1000, 1)
+                for q in QUANTILES
+            },
+        }
+
+
+class BotMetrics:
+    """
+    Metrics of one bot process.
+
+    Updated from the event loop only, so no locking is needed.
+    """
+
+    def __init__(self, window: int = 1000, max_keys: int = MAX_KEYS):
+        self.window = window
+        self.max_keys = max_keys
+        self.handlers: Dict[str, LatencyStats] = {}
+        self.api_calls: Dict[str, LatencyStats] = {}
+        self.api_retries: Counter = Counter()
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def _get_key(self, stats: Dict[str, LatencyStats], key: str) -> str:
+        # Bounds the memory of the metrics whatever the keys are
+        if key not in stats and len(stats) >= self.max_keys:
+            return OTHER_KEY
+        return key
+
+    def _get_stats(self, stats: Dict[str, LatencyStats], key: str) -> LatencyStats:
+        if key not in stats:
+            stats[key] = LatencyStats(self.window)
+        return stats[key]
+
+    def observe_handler(self, key: str, seconds: float, error: bool = False) -> None:
+        key = self._get_key(self.handlers, key)
+        self._get_stats(self.handlers, key).observe(seconds, error)
+
+    def observe_api_call(
+        self, method: str, endpoint: str, seconds: float, retries: int = 0, error: bool = False
+    ) -> None:
+        key = self._get_key(self.api_calls, f"{method} {ENDPOINT_ID.sub('<id>', endpoint)}")
+        self._get_stats(self.api_calls, key).observe(seconds, error)
+        if retries:
+            self.api_retries[key] += retries
+
+    @contextmanager
+    def track_update(self):
+        """
+        Counts the update as in flight while the block runs.
+        """
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "handlers": {key: stats.as_dict() for key, stats in sorted(self.handlers.items())},
+            "api_calls": {
+                key: {**stats.as_dict(), "retries": self.api_retries[key]}
+                for key, stats in sorted(self.api_calls.items())
+            },
+        }
+
+    def render(self) -> str:
+        """
+        Returns the metrics in the Prometheus text format.
+        """
+        lines = [
+            "# TYPE bot_updates_in_flight gauge",
+            f"bot_updates_in_flight {self.in_flight}",
+        ]
+        for prefix, label, stats in (
+            ("bot_handler", "handler", self.handlers),
+            ("bot_api_call", "call", self.api_calls),
+        ):
+            lines.append(f"# TYPE {prefix}_duration_seconds summary")
+            for key, latency in sorted(stats.items()):
+                labels = f'{label}="{escape_label(key)}"'
+                for q in QUANTILES:
+                    lines.append(
+                        f'{prefix}_duration_seconds{{{labels},quantile="{q}"}} {latency.quantile(q)}'
+                    )
+                lines.append(f"{prefix}_duration_seconds_sum{{{labels}}} {latency.total}")
+                lines.append(f"{prefix}_duration_seconds_count{{{labels}}} {latency.count}")
+            lines.append(f"# TYPE {prefix}_errors_total counter")
+            for key, latency in sorted(stats.items()):
+                lines.append(
+                    f'{prefix}_errors_total{{{label}="{escape_label(key)}"}} {latency.errors}'
+                )
+
+        lines.append("# TYPE bot_api_call_retries_total counter")
+        for key, retries in sorted(self.api_retries.items()):
+            lines.append(f'bot_api_call_retries_total{{call="{escape_label(key)}"}} {retries}')
+        return "\n".join(lines) + "\n"
+
+
+bot_metrics = BotMetrics()
+
+
+def get_handler_key(event: Update, data: Dict[str, Any]) -> str:
+    """
+    Returns the key of the handler of the update: the callback data of a
+    button, the FSM state the message is answered in, or the command if it
+    is one of COMMANDS.
+    """
+    if event.callback_query:
+        return f"callback:{event.callback_query.data}"
+    state = data.get("raw_state")
+    if state:
+        return f"state:{state}"
+    if event.message and event.message.text and event.message.text.startswith("/"):
+        # "/start@bot_name" is the same command
+        command = event.message.text.split()[0].split("@")[0]
+        return f"command:{command}" if command in COMMANDS else UNKNOWN_COMMAND
+    return event.event_type
+
+
+class MetricsMiddleware(BaseMiddleware):
+    """
+    Records the in-flight count and the handling time of every update.
+    """
+
+    def __init__(self, metrics: BotMetrics = bot_metrics):
+        self.metrics = metrics
+
+    async def __call__(self, handler, event: Update, data: dict):
+        key = get_handler_key(event, data)
+        started = time.perf_counter()
+        error = True
+        with self.metrics.track_update():
+            try:
+                result = await handler(event, data)
+                error = False
+                return result
+            finally:
+                self.metrics.observe_handler(key, time.perf_counter() - started, error)
+
+
+async def log_metrics_periodically(interval: float, metrics: BotMetrics = bot_metrics) -> None:
+    """
+    Logs the summary of the metrics every `interval` seconds, until cancelled.
+    """
+    while True:
+        await asyncio.sleep(interval)
+        logger.info(f"Metrics: {metrics.summary()}")
+
+
+def start_metrics_log(interval: float) -> Optional[asyncio.Task]:
+    """
+    Starts the periodic summary log, None if `interval` isn't positive.
+    """
+    if interval <= 0:
+        return None
+    return asyncio.create_task(log_metrics_periodically(interval))
@@ -0,0 +1,9 @@
+import os
+import sys
+from pathlib import Path
+
+# The bot modules import each other as top-level modules (`from config import
+# ...`), the same way they do when the bot is started from its folder.
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+os.environ.setdefault("API_TOKEN", "42:TEST")
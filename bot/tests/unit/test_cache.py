@@ -0,0 +1,77 @@
+import asyncio
+
+import pytest
+
+from utils.cache import AsyncTTLCache
+
+
+class FakeTimer:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_entries_expire_after_ttl():
+    timer = FakeTimer()
+    cache = AsyncTTLCache(maxsize=10, ttl=5, timer=timer)
+    cache.set("alice", True)
+    cache.set("bob", False, ttl=1)
+
+    timer.now = 2
+    assert cache.get("alice") is True
+    assert cache.get("bob") is None
+
+    timer.now = 5
+    assert cache.get("alice") is None
+    assert len(cache) == 0
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = AsyncTTLCache(maxsize=2, ttl=60)
+    cache.set("alice", 1)
+    cache.set("bob", 2)
+    cache.get("alice")
+    cache.set("carol", 3)
+
+    assert cache.get("bob") is None
+    assert cache.get("alice") == 1
+    assert cache.get("carol") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_share_one_load():
+    cache = AsyncTTLCache(maxsize=10, ttl=60)
+    loads = 0
+
+    async def loader():
+        nonlocal loads
+        loads += 1
+        await asyncio.sleep(0.01)
+        return True
+
+    results = await asyncio.gather(*(cache.get_or_load("alice", loader) for _ in range(20)))
+
+    assert all(results)
+    assert loads == 1
+    assert await cache.get_or_load("alice", loader)
+    assert loads == 1
+    assert cache.stats()["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_load_is_not_cached():
+    cache = AsyncTTLCache(maxsize=10, ttl=60)
+
+    async def failing_loader():
+        raise ConnectionError
+
+    async def loader():
+        return False
+
+    with pytest.raises(ConnectionError):
+        await cache.get_or_load("alice", failing_loader)
+    assert await cache.get_or_load("alice", loader, ttl_for=lambda value: 1) is False
+    assert cache.stats()["misses"] == 2
@@ -0,0 +1,166 @@
+from unittest.mock import patch
+
+import pytest
+import pytest_asyncio
+from aiogram import Bot, Dispatcher, F
+from aiogram.fsm.state import State, StatesGroup
+from aiogram.types import CallbackQuery, Message, Update
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+
+from handlers import aio_client
+from metrics import BotMetrics, MetricsMiddleware, bot_metrics
+from webhook import UpdateWorkerPool, create_app
+
+
+class Form(StatesGroup):
+    waiting_for_amount = State()
+
+
+def make_message(update_id, text):
+    return Update.model_validate({
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": 0,
+            "chat": {"id": 1, "type": "private"},
+            "from": {"id": 1, "is_bot": False, "first_name": "Test"},
+            "text": text,
+        },
+    })
+
+
+def make_callback(update_id, data):
+    return Update.model_validate({
+        "update_id": update_id,
+        "callback_query": {
+            "id": str(update_id),
+            "chat_instance": "1",
+            "from": {"id": 1, "is_bot": False, "first_name": "Test"},
+            "data": data,
+        },
+    })
+
+
+@pytest.fixture
+def metrics():
+    return BotMetrics()
+
+
+@pytest.fixture
+def dispatcher(metrics):
+    dispatcher = Dispatcher()
+    dispatcher.update.middleware(MetricsMiddleware(metrics))
+
+    @dispatcher.message(F.text == "/start")
+    async def start(message: Message, state):
+        assert metrics.in_flight == 1
+        await state.set_state(Form.waiting_for_amount)
+
+    @dispatcher.message(Form.waiting_for_amount)
+    async def amount(message: Message, state):
+        raise ValueError("Invalid amount")
+
+    @dispatcher.callback_query(F.data == "report")
+    async def report(callback: CallbackQuery):
+        pass
+
+    return dispatcher
+
+
+@pytest.mark.asyncio
+async def test_handlers_are_keyed_by_command_state_and_callback(dispatcher, metrics):
+    bot = Bot("42:TEST")
+
+    await dispatcher.feed_update(bot, make_message(1, "/start"))
+    with pytest.raises(ValueError):
+        await dispatcher.feed_update(bot, make_message(2, "abc"))
+    await dispatcher.feed_update(bot, make_callback(3, "report"))
+    await dispatcher.feed_update(bot, make_callback(4, "report"))
+
+    handlers = metrics.summary()["handlers"]
+    assert handlers["command:/start"]["count"] == 1
+    assert handlers["state:Form:waiting_for_amount"]["errors"] == 1
+    assert handlers["callback:report"]["count"] == 2
+    assert metrics.in_flight == 0
+    assert metrics.max_in_flight == 1
+
+
+@pytest.mark.asyncio
+async def test_unknown_commands_share_a_key(dispatcher, metrics):
+    bot = Bot("42:TEST")
+
+    for update_id, text in enumerate(("/x0", '/x1"y', "/start@test_bot")):
+        await dispatcher.feed_update(bot, make_message(update_id, text))
+
+    handlers = metrics.summary()["handlers"]
+    assert handlers["command:unknown"]["count"] == 2
+    assert handlers["command:/start"]["count"] == 1
+
+
+def test_keys_are_bounded_and_escaped():
+    metrics = BotMetrics(max_keys=2)
+    metrics.observe_handler('callback:a"b\\c', 0.01)
+    metrics.observe_handler("callback:b", 0.01)
+    metrics.observe_handler("callback:c", 0.01)
+    metrics.observe_handler("callback:d", 0.01)
+
+    assert set(metrics.handlers) == {'callback:a"b\\c', "callback:b", "other"}
+    assert metrics.handlers["other"].count == 2
+    assert 'bot_handler_errors_total{handler="callback:a\\"b\\\\c"} 0' in metrics.render()
+
+
+@pytest_asyncio.fixture
+async def api():
+    """
+    Local stand-in of the API failing the first request to each endpoint.
+    """
+    seen = set()
+
+    async def flaky(request):
+        if request.path not in seen:
+            seen.add(request.path)
+            return web.json_response({}, status=503)
+        return web.json_response({"status": "success"})
+
+    app = web.Application()
+    app.router.add_get("/expense/{pk}", flaky)
+
+    server = TestServer(app)
+    await server.start_server()
+    with patch.object(aio_client, "API_BASE_URL", str(server.make_url("")).rstrip("/")):
+        yield
+    await aio_client.close_session()
+    await server.close()
+
+
+@pytest.mark.asyncio
+async def test_api_calls_record_latency_and_retries(api):
+    with patch.object(aio_client, "bot_metrics", BotMetrics()) as metrics:
+        await aio_client.api_request_with_retry("GET", "expense/1")
+        await aio_client.api_request_with_retry("GET", "expense/1")
+        with pytest.raises(Exception):
+            await aio_client.api_request_with_retry("GET", "expense/2", retries=1)
+
+    call = metrics.summary()["api_calls"]["GET expense/<id>"]
+    assert call["count"] == 3
+    assert call["errors"] == 1
+    assert call["retries"] == 1
+    assert 'bot_api_call_retries_total{call="GET expense/<id>"} 1' in metrics.render()
+
+
+@pytest.mark.asyncio
+async def test_webhook_exports_metrics():
+    bot_metrics.observe_handler("callback:report", 0.01)
+    pool = UpdateWorkerPool(Dispatcher(), Bot("42:TEST"), workers=1, queue_size=1)
+    client = TestClient(TestServer(create_app(pool, "/webhook", metrics_path="/metrics")))
+    await client.start_server()
+    try:
+        response = await client.get("/metrics")
+        text = await response.text()
+    finally:
+        await client.close()
+
+    assert response.status == 200
+    assert "bot_updates_in_flight 0" in text
+    assert 'bot_handler_duration_seconds_count{handler="callback:report"}' in text
@@ -0,0 +1,75 @@
+from unittest.mock import AsyncMock, patch
+
+import pytest
+import pytest_asyncio
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from handlers import aio_client
+
+
+@pytest_asyncio.fixture
+async def api():
+    """
+    Local stand-in of the report job endpoints of the API.
+    """
+    state = {"polls": 0, "final_status": "done"}
+
+    async def enqueue(request):
+        assert (await request.json()) == {"format": "csv"}
+        return web.json_response({"id": "job-1", "status": "pending"}, status=202)
+
+    async def job_status(request):
+        state["polls"] += 1
+        if state["polls"] < 3:
+            return web.json_response({"id": "job-1", "status": "running"})
+        return web.json_response(
+            {"id": "job-1", "status": state["final_status"], "error": "Disk full"}
+        )
+
+    async def download(request):
+        return web.Response(body=b"Data,Type\n", content_type="text/csv")
+
+    app = web.Application()
+    app.router.add_post("/report_jobs/", enqueue)
+    app.router.add_get("/report_jobs/job-1/", job_status)
+    app.router.add_get("/report_jobs/job-1/download/", download)
+
+    server = TestServer(app)
+    await server.start_server()
+    with patch.object(aio_client, "API_BASE_URL", str(server.make_url("")).rstrip("/")), \
+            patch.object(aio_client, "REPORT_POLL_INTERVAL", 0.01):
+        yield state
+    await aio_client.close_session()
+    await server.close()
+
+
+@pytest.mark.asyncio
+async def test_report_is_downloaded_once_the_job_is_done(api):
+    report = await aio_client.wait_for_report("111", "csv")
+
+    assert report == b"Data,Type\n"
+    assert api["polls"] == 3
+
+
+@pytest.mark.asyncio
+async def test_failed_job_is_reported_to_the_user(api):
+    api["final_status"] = "failed"
+    msg = AsyncMock()
+
+    await aio_client.generate_csv_report("111", msg)
+
+    msg.answer_document.assert_not_called()
+    assert "Disk full" in msg.answer.call_args.args[0]
+
+
+@pytest.mark.asyncio
+async def test_report_is_sent_in_the_background(api):
+    msg = AsyncMock()
+
+    task = aio_client.generate_csv_report("111", msg)
+
+    assert not task.done()
+    await task
+    assert msg.answer_document.call_args.args[0].filename == "report.csv"
+    assert msg.answer.call_args.args[0] == "Here is your report."
@@ -0,0 +1,85 @@
+import sys
+from unittest.mock import patch
+
+import pytest
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.storage.base import StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+
+from config import Expense, check_storage, create_storage
+
+fakeredis = pytest.importorskip("fakeredis")
+redis_storage = pytest.importorskip("aiogram.fsm.storage.redis")
+
+BOT_ID = 42
+CHAT_ID = 111
+
+
+@pytest.fixture
+def workers():
+    """
+    FSM storages of two bot workers sharing one Redis server.
+    """
+    server = fakeredis.FakeServer()
+    storages = [
+        redis_storage.RedisStorage(
+            redis=fakeredis.aioredis.FakeRedis(server=server),
+            key_builder=redis_storage.DefaultKeyBuilder(with_bot_id=True),
+        )
+        for _ in range(2)
+    ]
+    return [
+        FSMContext(storage, StorageKey(bot_id=BOT_ID, chat_id=CHAT_ID, user_id=CHAT_ID))
+        for storage in storages
+    ]
+
+
+@pytest.mark.asyncio
+async def test_state_moves_between_workers(workers):
+    first, second = workers
+
+    await first.set_state(Expense.waiting_for_update_details)
+    await first.update_data(expense_id="7")
+
+    assert await second.get_state() == Expense.waiting_for_update_details.state
+    assert await second.get_data() == {"expense_id": "7"}
+
+    await second.clear()
+    assert await first.get_state() is None
+    assert await first.get_data() == {}
+
+
+def test_memory_storage_is_the_default():
+    assert isinstance(create_storage("memory"), MemoryStorage)
+
+
+def test_redis_storage_from_url():
+    storage = create_storage("redis", "redis://localhost:6379/1")
+    assert isinstance(storage, redis_storage.RedisStorage)
+    assert storage.redis.connection_pool.connection_kwargs["db"] == 1
+
+
+def test_unknown_storage_is_rejected():
+    with pytest.raises(ValueError):
+        create_storage("sqlite")
+
+
+def test_missing_redis_is_an_error():
+    with patch.dict(sys.modules, {"aiogram.fsm.storage.redis": None}):
+        with pytest.raises(RuntimeError):
+            create_storage("redis")
+
+
+@pytest.mark.asyncio
+async def test_unreachable_redis_fails_the_check():
+    storage = create_storage("redis", "redis://127.0.0.1:1/0")
+    with pytest.raises(RuntimeError):
+        await check_storage(storage)
+    await storage.close()
+
+
+@pytest.mark.asyncio
+async def test_reachable_redis_passes_the_check():
+    storage = redis_storage.RedisStorage(redis=fakeredis.aioredis.FakeRedis())
+    await check_storage(storage)
+    await check_storage(MemoryStorage())
@@ -0,0 +1,164 @@
+import asyncio
+import time
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from handlers import validators
+
+QUERY_SECONDS = 0.05
+
+
+@pytest.fixture(autouse=True)
+def empty_user_cache():
+    validators.user_exists_cache.clear()
+    yield
+    validators.user_exists_cache.clear()
+
+
+class SlowSession:
+    """
+    Session stand-in whose queries block the calling thread like a slow DB.
+    """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def execute(self, query, params):
+        time.sleep(QUERY_SECONDS)
+        return self
+
+    def scalar(self):
+        return 1
+
+
+@pytest.mark.asyncio
+async def test_concurrent_users_are_not_serialized():
+    users = 40
+
+    with patch.object(validators, "Session", SlowSession):
+        started = time.perf_counter()
+        results = await asyncio.gather(
+            *(validators.validate_user_exists(f"user_{index}") for index in range(users))
+        )
+        elapsed = time.perf_counter() - started
+
+    assert all(results)
+    # One query after another would take users * QUERY_SECONDS = 2 seconds
+    workers = validators.db_executor._max_workers
+    assert elapsed < users / workers * QUERY_SECONDS * 2
+
+
+@pytest.mark.asyncio
+async def test_event_loop_keeps_running_during_queries():
+    ticks = 0
+
+    async def heartbeat():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.005)
+            ticks += 1
+
+    with patch.object(validators, "Session", SlowSession):
+        heartbeat_task = asyncio.create_task(heartbeat())
+        await asyncio.gather(
+            *(
+                validators.run_in_db_executor(
+                    validators.fetch_record_exists, "expenses", str(index)
+                )
+                for index in range(8)
+            )
+        )
+        heartbeat_task.cancel()
+
+    # The loop ticked while the blocking queries were running
+    assert ticks >= 5
+
+
+@pytest.fixture
+def database():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE users (id INTEGER PRIMARY KEY, username TEXT)"))
+        connection.execute(text("CREATE TABLE expenses (id INTEGER PRIMARY KEY)"))
+        connection.execute(text("INSERT INTO users (username) VALUES ('alice')"))
+        connection.execute(text("INSERT INTO expenses (id) VALUES (7)"))
+
+    statements = []
+    event.listen(
+        engine, "before_cursor_execute", lambda *args: statements.append(args[2])
+    )
+
+    with patch.object(validators, "Session", sessionmaker(bind=engine)):
+        yield statements
+
+
+@pytest.mark.asyncio
+async def test_validation_context_uses_one_query(database):
+    context = await validators.load_validation_context("alice", "expenses", "7")
+
+    assert context == validators.ValidationContext(user_exists=True, record_exists=True)
+    assert len(database) == 1
+
+
+@pytest.mark.asyncio
+async def test_validation_context_of_missing_rows(database):
+    assert await validators.load_validation_context("bob", "expenses", "8") == (
+        validators.ValidationContext(user_exists=False, record_exists=False)
+    )
+    assert await validators.load_validation_context("alice") == (
+        validators.ValidationContext(user_exists=True)
+    )
+
+
+@pytest.mark.asyncio
+async def test_validation_context_rejects_unknown_tables(database):
+    with pytest.raises(ValueError):
+        await validators.load_validation_context("alice", "users; --", "1")
+
+
+@pytest.mark.asyncio
+async def test_hot_users_do_not_hit_the_database(database):
+    for _ in range(5):
+        assert await validators.validate_user_exists("alice")
+    assert len(database) == 1
+
+    context = await validators.load_validation_context("alice", "expenses", "7")
+    assert context == validators.ValidationContext(user_exists=True, record_exists=True)
+    # Only the record is checked for a cached user
+    assert len(database) == 2
+    assert "users" not in database[-1]
+
+
+@pytest.mark.asyncio
+async def test_forgotten_user_is_checked_again(database):
+    assert not await validators.validate_user_exists("bob")
+    assert not await validators.validate_user_exists("bob")
+    assert len(database) == 1
+
+    validators.forget_user("bob")
+    assert not await validators.validate_user_exists("bob")
+    assert len(database) == 2
+
+
+@pytest.mark.asyncio
+async def test_concurrent_contexts_of_a_user_share_the_user_check(database):
+    misses = validators.user_exists_cache.misses
+    contexts = await asyncio.gather(
+        *(validators.load_validation_context("alice", "expenses", "7") for _ in range(5))
+    )
+
+    assert set(contexts) == {validators.ValidationContext(user_exists=True, record_exists=True)}
+    # The other updates only check the record
+    assert sum("users" in statement for statement in database) == 1
+    assert validators.user_exists_cache.misses == misses + 5
@@ -0,0 +1,94 @@
+import asyncio
+
+import pytest
+from aiogram import Bot, Dispatcher
+from aiogram.types import Message
+from aiohttp.test_utils import TestClient, TestServer
+
+from webhook import SECRET_TOKEN_HEADER, UpdateWorkerPool, create_app
+
+HANDLER_SECONDS = 0.02
+
+
+def make_update(update_id, chat_id):
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": 0,
+            "chat": {"id": chat_id, "type": "private"},
+            "from": {"id": chat_id, "is_bot": False, "first_name": "Test"},
+            "text": str(update_id),
+        },
+    }
+
+
+@pytest.fixture
+def handled():
+    return []
+
+
+@pytest.fixture
+def dispatcher(handled):
+    dispatcher = Dispatcher()
+
+    @dispatcher.message()
+    async def handle(message: Message):
+        await asyncio.sleep(HANDLER_SECONDS)
+        handled.append((message.chat.id, int(message.text)))
+
+    return dispatcher
+
+
+async def post_all(dispatcher, updates, workers=4, secret_token=None, headers=None):
+    bot = Bot("42:TEST")
+    pool = UpdateWorkerPool(dispatcher, bot, workers, queue_size=10)
+    client = TestClient(TestServer(create_app(pool, "/webhook", secret_token)))
+    await client.start_server()
+    try:
+        responses = await asyncio.gather(
+            *(client.post("/webhook", json=update, headers=headers) for update in updates)
+        )
+    finally:
+        # Waits for the queued updates to be processed
+        await client.close()
+        await bot.session.close()
+    return [response.status for response in responses]
+
+
+@pytest.mark.asyncio
+async def test_updates_of_a_chat_keep_their_order(dispatcher, handled):
+    updates = [make_update(update_id, chat_id=update_id % 3) for update_id in range(1, 31)]
+
+    assert set(await post_all(dispatcher, updates)) == {200}
+
+    assert len(handled) == 30
+    for chat_id in range(3):
+        update_ids = [update_id for chat, update_id in handled if chat == chat_id]
+        assert update_ids == sorted(update_ids)
+
+
+@pytest.mark.asyncio
+async def test_chats_are_processed_in_parallel(dispatcher, handled):
+    updates = [make_update(update_id, chat_id=update_id) for update_id in range(1, 17)]
+
+    started = asyncio.get_running_loop().time()
+    await post_all(dispatcher, updates, workers=16)
+    elapsed = asyncio.get_running_loop().time() - started
+
+    assert len(handled) == 16
+    # One update after another would take 16 * HANDLER_SECONDS
+    assert elapsed < 16 * HANDLER_SECONDS / 2
+
+
+@pytest.mark.asyncio
+async def test_updates_without_secret_token_are_rejected(dispatcher, handled):
+    statuses = await post_all(
+        dispatcher,
+        [make_update(1, 1)],
+        secret_token="secret",
+        headers={SECRET_TOKEN_HEADER: "wrong"},
+    )
+
+    assert statuses == [401]
+    assert handled == []
@@ -1 +1,2 @@
 from .auth_utils import get_all_users, generate_csv_report, generate_xlsx_report
+from .cache import AsyncTTLCache
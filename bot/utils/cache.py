@@ -0,0 +1,135 @@
+"""
+This module provides an in-process cache for asyncio code.
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+
+class AsyncTTLCache:
+    """
+    LRU cache whose entries expire after a time to live.
+
+    Concurrent loads of the same missing key share one call of the loader,
+    so a burst of updates from one user still costs a single lookup.
+
+    Attributes:
+        maxsize (int): Maximum number of entries, least recently used
+            entries are evicted first.
+        ttl (float): Default time to live of an entry in seconds.
+    """
+
+    def __init__(
+        self, maxsize: int, ttl: float, timer: Callable[[], float] = time.monotonic
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._timer = timer
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._pending: Dict[Hashable, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Returns the cached value of the key, or `default` if it is missing
+        or expired.
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return default
+
+        value, expires_at = entry
+        if expires_at <= self._timer():
+            del self._entries[key]
+            return default
+
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """
+        Caches the value of the key for `ttl` seconds (the default TTL if None).
+        """
+        self._entries[key] = (value, self._timer() + (self.ttl if ttl is None else ttl))
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        """
+        Drops the cached value of the key.
+        """
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    async def get_or_load(
+        self,
+        key: Hashable,
+        loader: Callable[[], Awaitable[Any]],
+        ttl_for: Optional[Callable[[Any], float]] = None,
+    ) -> Any:
+        """
+        Returns the cached value of the key, loading it with `loader` on a miss.
+
+        Args:
+            key (Hashable): Key of the value.
+            loader (callable): Coroutine function loading the value.
+            ttl_for (callable, optional): Returns the TTL for a loaded value.
+
+        Returns:
+            Any: The cached or loaded value.
+        """
+        missing = object()
+        value = self.get(key, missing)
+        if value is not missing:
+            self.hits += 1
+            return value
+
+        self.misses += 1
+        pending = self._pending.get(key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending[key] = future
+        try:
+            value = await loader()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as error:
+            future.set_exception(error)
+            # Nobody else may be waiting for the result
+            future.exception()
+            raise
+        finally:
+            del self._pending[key]
+
+        self.set(key, value, ttl_for(value) if ttl_for else None)
+        future.set_result(value)
+        return value
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns the size and hit statistics of the cache.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
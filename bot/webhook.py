@@ -0,0 +1,151 @@
+"""
+This module runs the bot behind a webhook.
+
+Telegram posts every update to an aiohttp endpoint which answers right away
+and hands the update to a bounded pool of workers. Updates of one chat always
+go to the same worker, so they are processed in the order they arrived while
+different chats are processed in parallel.
+"""
+
+import asyncio
+import logging
+from typing import List, Optional
+
+from aiogram import Bot, Dispatcher
+from aiogram.types import Update
+from aiohttp import web
+
+from metrics import bot_metrics
+
+logger = logging.getLogger("aiogram")
+
+SECRET_TOKEN_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+
+def get_chat_id(update: Update) -> Optional[int]:
+    """
+    Returns the ID of the chat the update belongs to, None if it has no chat.
+    """
+    event = update.event
+    chat = getattr(event, "chat", None)
+    if chat is None:
+        # Callback queries carry the chat in their message
+        message = getattr(event, "message", None)
+        chat = getattr(message, "chat", None)
+    if chat is not None:
+        return chat.id
+
+    user = getattr(event, "from_user", None)
+    return user.id if user is not None else None
+
+
+class UpdateWorkerPool:
+    """
+    Bounded pool of workers feeding updates to the dispatcher.
+
+    Every worker owns a queue. An update is put into the queue of the worker
+    its chat is sharded to, so the updates of one chat never run concurrently.
+    When a queue is full, `submit` waits, which slows down the webhook instead
+    of piling up unbounded work.
+
+    Attributes:
+        workers (int): Number of workers.
+        queue_size (int): Maximum number of waiting updates per worker.
+    """
+
+    def __init__(self, dispatcher: Dispatcher, bot: Bot, workers: int, queue_size: int):
+        self.dispatcher = dispatcher
+        self.bot = bot
+        self.workers = workers
+        self.queue_size = queue_size
+        self._queues: List[asyncio.Queue] = []
+        self._tasks: List[asyncio.Task] = []
+        self._next_worker = 0
+
+    def start(self) -> None:
+        self._queues = [asyncio.Queue(self.queue_size) for _ in range(self.workers)]
+        self._tasks = [
+            asyncio.create_task(self._work(queue), name=f"bot-update-worker-{index}")
+            for index, queue in enumerate(self._queues)
+        ]
+
+    async def stop(self) -> None:
+        """
+        Processes the updates still in the queues and stops the workers.
+        """
+        await asyncio.gather(*(queue.join() for queue in self._queues))
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def shard(self, update: Update) -> int:
+        """
+        Returns the index of the worker the update should be processed by.
+        """
+        chat_id = get_chat_id(update)
+        if chat_id is None:
+            # Updates without a chat have no order to keep
+            self._next_worker = (self._next_worker + 1) % self.workers
+            return self._next_worker
+        return chat_id % self.workers
+
+    async def submit(self, update: Update) -> None:
+        await self._queues[self.shard(update)].put(update)
+
+    async def _work(self, queue: asyncio.Queue) -> None:
+        while True:
+            update = await queue.get()
+            try:
+                await self.dispatcher.feed_update(self.bot, update)
+            except Exception:
+                logger.exception(f"Failed to process update {update.update_id}")
+            finally:
+                queue.task_done()
+
+
+def create_app(
+    pool: UpdateWorkerPool,
+    path: str,
+    secret_token: Optional[str] = None,
+    metrics_path: Optional[str] = None,
+) -> web.Application:
+    """
+    Creates the aiohttp application receiving the updates.
+
+    Args:
+        pool (UpdateWorkerPool): Pool processing the updates.
+        path (str): Path of the webhook endpoint.
+        secret_token (str, optional): Token Telegram sends with every update.
+        metrics_path (str, optional): Path exporting the bot metrics.
+
+    Returns:
+        web.Application: The application, the pool runs while it runs.
+    """
+
+    async def receive_update(request: web.Request) -> web.Response:
+        if secret_token and request.headers.get(SECRET_TOKEN_HEADER) != secret_token:
+            return web.json_response({"message": "Invalid secret token."}, status=401)
+
+        update = Update.model_validate(await request.json(), context={"bot": pool.bot})
+        await pool.submit(update)
+        return web.json_response({})
+
+    async def export_metrics(request: web.Request) -> web.Response:
+        return web.Response(
+            text=bot_metrics.render(), content_type="text/plain", charset="utf-8"
+        )
+
+    async def on_startup(app: web.Application):
+        pool.start()
+
+    async def on_cleanup(app: web.Application):
+        await pool.stop()
+
+    app = web.Application()
+    app.router.add_post(path, receive_update)
+    if metrics_path:
+        app.router.add_get(metrics_path, export_metrics)
+    app.on_startup.append(on_startup)
+    app.on_cleanup.append(on_cleanup)
+    return app